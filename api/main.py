@@ -1,18 +1,58 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from enum import Enum
 from typing import List, Optional
+import asyncio
+import os
 import sqlite3 
+import threading
 import time
 from contextlib import asynccontextmanager
 
 app = FastAPI()
 DB_NAME = "vulnerable.db"
 
+# Режим продуктивності (API_PERF_MODE=1): для навантажувальних бенчмарків тестувальника.
+# Вразливості ті самі, але ціль не є "пляшковим горлечком":
+#   - одне з'єднання з БД на потік (WAL), а не нове на кожен запит;
+#   - робота з БД - у пулі потоків, а не в event loop;
+#   - затримка 'SLEEP' - asyncio.sleep, яка не блокує інші запити.
+# Запуск: API_PERF_MODE=1 uvicorn api.main:app --workers 4
+PERF_MODE = os.getenv("API_PERF_MODE", "").lower() in ("1", "true", "yes")
+
+_local = threading.local()
+
+def get_connection() -> sqlite3.Connection:
+    """Звичайний режим - нове з'єднання; режим продуктивності - з'єднання цього потоку."""
+    if not PERF_MODE:
+        return sqlite3.connect(DB_NAME)
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
+def release_connection(conn: sqlite3.Connection):
+    """Закриває з'єднання, якщо воно не з пулу потоку."""
+    if not PERF_MODE:
+        conn.close()
+
+async def run_db(func, *args):
+    """Виконує синхронну роботу з БД: у режимі продуктивності - в пулі потоків."""
+    if PERF_MODE:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
 def init_db():
     """Створює нашу базу даних та таблицю, якщо їх немає."""
     try:
         conn = sqlite3.connect(DB_NAME)
+        if PERF_MODE:
+            # WAL: читання не блокуються записом (важливо для кількох воркерів uvicorn)
+            conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         # Створюємо таблицю
         cursor.execute("""
@@ -62,23 +102,35 @@ current_id = 0
 async def read_root():
     return {"message": "My First FastAPI Application!"}
 
-@app.post("/items/", status_code=201)
-async def create_item(item: Item):
+def _insert_item(item: Item) -> int:
+    conn = get_connection()
+    # finally: SQL-помилки від ін'єкцій - очікувана річ, з'єднання не має "витікати" на кожній з них
     try:
-        conn = sqlite3.connect(DB_NAME)
         cursor = conn.cursor()
-        
-        # Використання executescript саме по собі є ризиком
-        # Хоча Pydantic нас тут рятує від SQLi в `item.title`
-        sql_script = f"""
-        INSERT INTO items (title, description, status) 
-        VALUES ('{item.title}', '{item.description}', '{item.status.value}');
-        """
-        cursor.executescript(sql_script) # .executescript() може виконати SLEEP!
-        
+        try:
+            # Використання executescript саме по собі є ризиком
+            # Хоча Pydantic нас тут рятує від SQLi в `item.title`
+            sql_script = f"""
+            INSERT INTO items (title, description, status) 
+            VALUES ('{item.title}', '{item.description}', '{item.status.value}');
+            """
+            cursor.executescript(sql_script) # .executescript() може виконати SLEEP!
+        except Exception:
+            if PERF_MODE:
+                # З'єднання потоку використовується далі - не лишаємо в ньому відкриту транзакцію
+                conn.rollback()
+            raise
+
         new_id = cursor.lastrowid
         conn.commit()
-        conn.close()
+        return new_id
+    finally:
+        release_connection(conn)
+
+@app.post("/items/", status_code=201)
+async def create_item(item: Item):
+    try:
+        new_id = await run_db(_insert_item, item)
         
         # Повертаємо створений об'єкт
         new_item = item.model_copy(update={"id": new_id})
@@ -86,15 +138,21 @@ async def create_item(item: Item):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
+def _fetch(sql_query: str, one: bool):
+    conn = get_connection()
+    # finally: навмисні SQL-помилки (напр., `1'`) не мають лишати з'єднання відкритим
+    try:
+        conn.row_factory = sqlite3.Row # Щоб отримувати dict-подібні рядки
+        cursor = conn.cursor()
+        cursor.execute(sql_query)
+        return cursor.fetchone() if one else cursor.fetchall()
+    finally:
+        release_connection(conn)
+
 @app.get("/items/")
 async def get_items():
     """Повертає всі елементи з БД."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row # Щоб отримувати dict-подібні рядки
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM items")
-    rows = cursor.fetchall()
-    conn.close()
+    rows = await run_db(_fetch, "SELECT * FROM items", False)
     return [dict(row) for row in rows] # Конвертуємо у список dict
 
 @app.get("/items/{item_id}")
@@ -108,22 +166,19 @@ async def get_item_by_id(item_id: str): # <-- ❗️ ВРАЗЛИВІСТЬ №1
     # Якщо payload містить 'sleep', ми чекаємо 5 секунд
     if "sleep" in item_id.lower():
         print("!!! Атака 'SLEEP' виявлена! Симулюємо затримку 5 сек... !!!")
-        time.sleep(5)
+        if PERF_MODE:
+            await asyncio.sleep(5) # Інші запити обробляються, поки цей "спить"
+        else:
+            time.sleep(5)
     
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
         # ❗️ ВРАЗЛИВІСТЬ №3: Небезпечний f-string
         # Якщо item_id = "1 OR 1=1", запит стане "SELECT * ... WHERE id = 1 OR 1=1"
         sql_query = f"SELECT * FROM items WHERE id = {item_id}" 
         
         print(f"  > Виконую небезпечний SQL: {sql_query}") # (для дебагу)
         
-        cursor.execute(sql_query)
-        row = cursor.fetchone()
-        conn.close()
+        row = await run_db(_fetch, sql_query, True)
         
         if row:
             return dict(row)
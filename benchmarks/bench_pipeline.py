@@ -0,0 +1,314 @@
+# Цей файл знаходиться в: benchmarks/bench_pipeline.py
+#
+# Офлайн-бенчмарк повного конвеєра parse -> generate -> execute -> analyze.
+# Запуск (з кореня проєкту):
+#     python -m benchmarks.bench_pipeline --sizes 10 100 1000
+#     python -m benchmarks.bench_pipeline --sizes 100 --compare benchmarks/results/bench_<...>.json
+#     python -m benchmarks.bench_pipeline --sizes 100 --asgi   (ціль у процесі, без uvicorn і мережі)
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+import httpx
+import requests
+
+from tester.analyzer import APIAnalyzer
+from tester.executor import AsyncAPIExecutor
+from tester.generator import AttackGenerator
+from tester.llm import FakeLLMClient
+from tester.parser import APIParser
+from tester.pipeline import ScanPipeline
+from tester.transport import ASGI_BASE_URL, make_transport
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+TARGET_APP = "api.main:app"
+
+
+def make_spec(operations: int) -> Dict[str, Any]:
+    """
+    Синтетична OpenAPI-специфікація з заданою кількістю операцій.
+    Чергуємо POST з тілом ($ref на спільну схему) та GET з параметром шляху.
+    Шляхи /bench/... не існують у api/main.py, тож ціль відповідає швидким 404:
+    вимірюємо сам тестувальник, а не бізнес-логіку цілі.
+    """
+    paths = {}
+    for i in range(operations):
+        if i % 2 == 0:
+            paths[f"/bench/{i}/items/"] = {"post": {
+                "summary": f"Create {i}",
+                "requestBody": {"content": {"application/json": {
+                    "schema": {"$ref": "#/components/schemas/Item"}}}, "required": True},
+                "responses": {"201": {"description": "Created"}},
+            }}
+        else:
+            paths[f"/bench/{i}/items/{{item_id}}"] = {"get": {
+                "summary": f"Get {i}",
+                "parameters": [{"name": "item_id", "in": "path", "required": True,
+                                "schema": {"type": "string", "title": "Item Id"}}],
+                "responses": {"200": {"description": "OK"}},
+            }}
+    return {
+        "openapi": "3.1.0",
+        "info": {"title": "Bench", "version": "0.1.0"},
+        "paths": paths,
+        "components": {"schemas": {"Item": {
+            "type": "object", "title": "Item", "required": ["title"],
+            "properties": {
+                "title": {"type": "string", "title": "Title"},
+                "description": {"anyOf": [{"type": "string"}, {"type": "null"}], "title": "Description"},
+            },
+        }}},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_target(workdir: str, perf_mode: bool = True) -> Tuple[subprocess.Popen, str]:
+    """
+    Запускає api/main.py через uvicorn у тимчасовій папці
+    (щоб vulnerable.db проєкту не змінювався) і чекає, поки він відповість.
+    perf_mode - режим продуктивності цілі (API_PERF_MODE), щоб міряти тестувальник, а не ціль.
+    """
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, API_PERF_MODE="1" if perf_mode else "0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(base_url + "/", timeout=0.5)
+            return process, base_url
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Не вдалося запустити api/main.py для бенчмарку")
+
+
+def peak_rss_mb() -> float:
+    # На Linux ru_maxrss у кілобайтах. Це максимум за все життя процесу,
+    # тому кожен розмір специфікації виконується в окремому процесі (див. main)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _TimedStream(httpx.AsyncByteStream):
+    """Тіло відповіді, читання якого зараховується до часу транспорту."""
+
+    def __init__(self, stream, timings: Dict[str, float]):
+        self._stream = stream
+        self._timings = timings
+
+    async def __aiter__(self):
+        iterator = self._stream.__aiter__()
+        while True:
+            started = time.perf_counter()
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self._timings["transport"] += time.perf_counter() - started
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+
+class _TimedHTTPXTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport, timings: Dict[str, float]):
+        self._inner = inner
+        self._timings = timings
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        finally:
+            self._timings["transport"] += time.perf_counter() - started
+        response.stream = _TimedStream(response.stream, self._timings)
+        return response
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class TimedTransport:
+    """
+    Транспорт виконавця (tester/transport.py), що рахує сумарний час самих викликів транспорту:
+    надсилання запиту і читання тіла відповіді.
+    """
+
+    def __init__(self, inner, timings: Dict[str, float]):
+        self.inner = inner
+        self.name = inner.name
+        self.timings = timings
+
+    async def open(self, limits: httpx.Limits) -> httpx.AsyncBaseTransport:
+        return _TimedHTTPXTransport(await self.inner.open(limits), self.timings)
+
+    async def close(self):
+        await self.inner.close()
+
+
+def timed_executor(base_url: str, args, timings: Dict[str, float]) -> AsyncAPIExecutor:
+    """
+    Виконавець, у якого окремо міряється час _send_once (запит у слоті ліміту) і час транспорту.
+    Різниця - накладні витрати самого виконавця: клієнт httpx, збирання тіла, метрики, ліміти.
+    """
+    executor = AsyncAPIExecutor(base_url, concurrency=args.concurrency, per_endpoint_concurrency=args.per_endpoint,
+                                transport=TimedTransport(make_transport(TARGET_APP if args.asgi else None), timings))
+    send_once = executor._send_once
+
+    async def timed_send_once(*send_args, **send_kwargs):
+        started = time.perf_counter()
+        try:
+            return await send_once(*send_args, **send_kwargs)
+        finally:
+            timings["send"] += time.perf_counter() - started
+            timings["requests"] += 1
+
+    executor._send_once = timed_send_once
+    return executor
+
+
+def run_benchmark(operations: int, base_url: str, workdir: str, args) -> Dict[str, Any]:
+    """Один прогін: окремо кожен етап, потім увесь конвеєр разом."""
+    spec_path = os.path.join(workdir, f"spec_{operations}.json")
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(make_spec(operations), f)
+
+    stages = {}
+
+    started = time.perf_counter()
+    endpoints = APIParser(filepath=spec_path, cache_dir=None).parse_endpoints()
+    stages["parse"] = time.perf_counter() - started
+
+    generator = AttackGenerator(client=FakeLLMClient(latency_seconds=args.llm_latency), workers=args.gen_workers)
+    started = time.perf_counter()
+    plans = [{"endpoint": ep, "tests": tests} for ep, tests in generator.generate_all(endpoints) if tests]
+    stages["generate"] = time.perf_counter() - started
+    tests_total = sum(len(plan['tests']) for plan in plans)
+
+    timings = {"send": 0.0, "transport": 0.0, "requests": 0}
+    executor = timed_executor(base_url, args, timings)
+    started = time.perf_counter()
+    results = executor.execute_plans(plans)
+    stages["execute"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    APIAnalyzer().analyze_results(results)
+    stages["analyze"] = time.perf_counter() - started
+
+    # Накладні витрати виконавця на один запит: час _send_once мінус час транспорту
+    overhead = max(0.0, timings["send"] - timings["transport"]) / max(1, timings["requests"])
+    del results
+
+    pipeline = ScanPipeline(
+        AttackGenerator(client=FakeLLMClient(latency_seconds=args.llm_latency), workers=args.gen_workers),
+        AsyncAPIExecutor(base_url, concurrency=args.concurrency, per_endpoint_concurrency=args.per_endpoint,
+                         transport=make_transport(TARGET_APP if args.asgi else None)),
+        APIAnalyzer())
+    stats = pipeline.run_sync(endpoints)
+
+    return {
+        "operations": operations,
+        "endpoints": len(endpoints),
+        "tests": tests_total,
+        "stages_seconds": stages,
+        "pipeline_seconds": stats["elapsed_seconds"],
+        "tests_per_second": stats["results"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else None,
+        "executor_overhead_ms_per_request": overhead * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(current: List[Dict[str, Any]], baseline_path: str):
+    """Друкує зміну tests/sec та часу конвеєра відносно збереженого прогону."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {run['operations']: run for run in json.load(f)['runs']}
+    print(f"\nПорівняння з {baseline_path}:")
+    for run in current:
+        old = baseline.get(run['operations'])
+        if not old:
+            continue
+        for metric in ("tests_per_second", "pipeline_seconds", "executor_overhead_ms_per_request", "peak_rss_mb"):
+            if old.get(metric):
+                change = (run[metric] - old[metric]) / old[metric] * 100
+                print(f"  {run['operations']:>5} оп. | {metric:<34}: {old[metric]:10.3f} -> {run[metric]:10.3f} ({change:+.1f}%)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Офлайн-бенчмарк тестувальника")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000],
+                            help="Кількість операцій у синтетичних специфікаціях (10..5000)")
+    arg_parser.add_argument("--concurrency", type=int, default=10)
+    arg_parser.add_argument("--per-endpoint", type=int, default=4)
+    arg_parser.add_argument("--gen-workers", type=int, default=4)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.0,
+                            help="Штучна затримка фейкової моделі на один запит, сек.")
+    arg_parser.add_argument("--legacy-target", action="store_true",
+                            help="Запустити ціль у звичайному режимі (без API_PERF_MODE)")
+    arg_parser.add_argument("--asgi", action="store_true",
+                            help=f"Ціль {TARGET_APP} у процесі тестувальника (ASGI, без uvicorn і мережі)")
+    arg_parser.add_argument("--compare", default=None, help="JSON попереднього прогону для порівняння")
+    args = arg_parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    if args.asgi:
+        # Застосунок імпортується з проєкту, а vulnerable.db, як і з uvicorn, створюється в workdir
+        os.environ["API_PERF_MODE"] = "0" if args.legacy_target else "1"
+        sys.path.insert(0, PROJECT_ROOT)
+        if args.compare:
+            args.compare = os.path.abspath(args.compare)
+        os.chdir(workdir)
+        process, base_url = None, ASGI_BASE_URL
+    else:
+        process, base_url = start_target(workdir, perf_mode=not args.legacy_target)
+    runs = []
+    try:
+        for operations in args.sizes:
+            print(f"> {operations} операцій...")
+            # Свіжий процес на кожен розмір: peak_rss_mb - пік саме цього прогону, а не найбільшого з попередніх
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                run = pool.submit(run_benchmark, operations, base_url, workdir, args).result()
+            print(f"  {run['tests']} тестів | {run['tests_per_second']:.1f} тестів/сек | "
+                  f"етапи: " + ", ".join(f"{k} {v:.2f}с" for k, v in run['stages_seconds'].items()) +
+                  f" | накладні {run['executor_overhead_ms_per_request']:.2f} мс/запит | RSS {run['peak_rss_mb']:.0f} МБ")
+            runs.append(run)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        else:
+            os.chdir(PROJECT_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(BENCH_RESULTS_DIR, exist_ok=True)
+    output_path = os.path.join(BENCH_RESULTS_DIR, f"bench_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"created_at": datetime.now().isoformat(), "config": vars(args), "runs": runs}, f, indent=2)
+    print(f"\n✅ Результати збережено у {output_path}")
+
+    if args.compare:
+        compare(runs, args.compare)
+
+
+if __name__ == "__main__":
+    main()
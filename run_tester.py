@@ -1,7 +1,14 @@
-from tester.parser import APIParser
-from tester.generator import AttackGenerator
-from tester.executor import APIExecutor
-from tester.analyzer import APIAnalyzer
+from tester.parser import APIParser, DEFAULT_PARSE_CACHE_DIR
+from tester.analyzer import APIAnalyzer, TIME_BASED_THRESHOLD
+from tester.metrics import METRICS, serve_metrics
+from tester.pruning import DEFAULT_PRUNE_AFTER
+from tester.report import (DEFAULT_MAX_BODY_BYTES, JSONLResultSink, format_finding_line, format_limit_decision,
+                           format_result_lines, format_skipped_line, read_records, render_text_report)
+from tester.state import ScanState, endpoint_key
+from tester.incremental import SpecDiff, carried_findings, find_last_scan
+from tester.commands import (build_executor, build_generator, cmd_analyze, cmd_execute, cmd_generate, cmd_parse,
+                             describe_target, log_profiles, profiles_record, scan_targets, target_urls)
+import argparse
 import json
 import os                 
 from datetime import datetime 
@@ -10,82 +17,398 @@ OPENAPI_FILE_PATH = "openapi.json"
 BASE_URL = "http://127.0.0.1:8000" 
 RESULTS_DIR = "results"          
 
+def _add_parse_options(arg_parser):
+    """Опції парсингу специфікації (повне сканування і команда parse)."""
+    arg_parser.add_argument("--spec", default=OPENAPI_FILE_PATH,
+                            help=f"Файл специфікації OpenAPI, JSON або YAML (за замовчуванням {OPENAPI_FILE_PATH})")
+    arg_parser.add_argument("--tags", nargs="+", default=None,
+                            help="Тестувати лише операції з цими тегами")
+    arg_parser.add_argument("--paths", nargs="+", default=None,
+                            help="Тестувати лише ці шляхи (можна шаблони, напр. '/items/*')")
+    arg_parser.add_argument("--methods", nargs="+", default=None,
+                            help="Тестувати лише ці HTTP-методи")
+    arg_parser.add_argument("--no-parse-cache", action="store_true",
+                            help="Не використовувати кеш парсингу специфікації (.cache/parse)")
+
+def _add_generate_options(arg_parser):
+    """Опції генерації тест-кейсів (повне сканування і команда generate)."""
+    arg_parser.add_argument("--generator", choices=["llm", "template", "hybrid"], default="llm",
+                            help="Джерело тест-кейсів: llm (Gemini), template (локальні шаблони, швидко і детерміновано) "
+                                 "або hybrid (обидва)")
+    arg_parser.add_argument("--refresh-generation", action="store_true",
+                            help="Ігнорувати кеш тест-кейсів і згенерувати їх заново (кеш буде оновлено)")
+    arg_parser.add_argument("--no-generation-cache", action="store_true",
+                            help="Не використовувати кеш тест-кейсів взагалі")
+    arg_parser.add_argument("--gen-workers", type=int, default=4,
+                            help="Кількість паралельних запитів до LLM (за замовчуванням 4)")
+    arg_parser.add_argument("--gen-rpm", type=float, default=None,
+                            help="Максимум запитів до LLM за хвилину (за замовчуванням без обмежень)")
+    arg_parser.add_argument("--gen-batch", type=int, default=1,
+                            help="Скільки малих ендпоінтів пакувати в один промпт (за замовчуванням 1)")
+    arg_parser.add_argument("--fake-llm", action="store_true",
+                            help="Використати локальну детерміновану модель замість Gemini (офлайн)")
+
+def _add_execute_options(arg_parser):
+    """Опції виконання тестів (повне сканування і команда execute)."""
+    arg_parser.add_argument("--concurrency", type=int, default=10,
+                            help="Максимальна кількість одночасних запитів - жорстка стеля адаптивного ліміту (за замовчуванням 10)")
+    arg_parser.add_argument("--per-endpoint", type=int, default=4,
+                            help="Максимальна кількість одночасних запитів до одного ендпоінта (за замовчуванням 4)")
+    arg_parser.add_argument("--min-concurrency", type=int, default=1,
+                            help="Нижче цього адаптивний ліміт не опускається (за замовчуванням 1)")
+    arg_parser.add_argument("--no-adaptive", action="store_true",
+                            help="Не підлаштовувати паралельність під ціль: завжди --concurrency запитів")
+    arg_parser.add_argument("--max-retry-after", type=float, default=60.0,
+                            help="Найдовша пауза за заголовком Retry-After, сек. (за замовчуванням 60)")
+    arg_parser.add_argument("--no-timing-isolation", action="store_true",
+                            help="Не виділяти time-based атаки в окрему смугу та не перевіряти затримки повторно")
+    arg_parser.add_argument("--warmup", type=int, default=5,
+                            help="Кількість звичайних запитів на ендпоінт для профілю затримок (0 - фіксований поріг)")
+    arg_parser.add_argument("--queue-size", type=int, default=100,
+                            help="Розмір черг між етапами генерації, виконання та аналізу (за замовчуванням 100)")
+    arg_parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES,
+                            help=f"Скільки байтів тіла відповіді читати (за замовчуванням {DEFAULT_MAX_BODY_BYTES})")
+    arg_parser.add_argument("--no-dedup", action="store_true",
+                            help="Надсилати кожен тест, навіть якщо такий самий запит вже надіслано")
+    arg_parser.add_argument("--no-pruning", action="store_true",
+                            help="Надсилати всі тести, навіть ті, що гарантовано відхилить валідація типів")
+    arg_parser.add_argument("--prune-after", type=int, default=DEFAULT_PRUNE_AFTER,
+                            help="Після скількох однакових відхилень валідацією поспіль не надсилати решту "
+                                 f"тестів класу атаки для параметра (за замовчуванням {DEFAULT_PRUNE_AFTER})")
+    arg_parser.add_argument("--target", action="append", metavar="URL", default=None,
+                            help="Ціль сканування (можна кілька: репліки, оточення); план атак генерується один раз "
+                                 "і виконується проти всіх цілей одночасно. За замовчуванням {BASE_URL}".format(BASE_URL=BASE_URL))
+    arg_parser.add_argument("--asgi-app", metavar="MODULE:APP", default=None,
+                            help="Тестувати ASGI-застосунок (напр., api.main:app) прямо в процесі, без запуску "
+                                 "сервера і без мережі; за замовчуванням - HTTP-запити до {BASE_URL}".format(BASE_URL=BASE_URL))
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(
+        description="Тестувальник безпеки API. Без команди - повне сканування (парсинг, генерація, "
+                    "виконання та аналіз); команди parse / generate / execute / analyze виконують "
+                    "окремий етап і обмінюються файлами у {RESULTS_DIR}/.".format(RESULTS_DIR=RESULTS_DIR))
+    _add_parse_options(arg_parser)
+    _add_generate_options(arg_parser)
+    _add_execute_options(arg_parser)
+    arg_parser.add_argument("--resume", metavar="SCAN_ID", default=None,
+                            help="Продовжити перерване сканування (SCAN_ID - час запуску, напр. 2025-10-28_14-50-26)")
+    arg_parser.add_argument("--incremental", nargs="?", const="last", metavar="SCAN_ID", default=None,
+                            help="Тестувати лише нові та змінені операції відносно останнього завершеного "
+                                 "сканування (або SCAN_ID); знахідки незмінених операцій переносяться")
+    arg_parser.add_argument("--shards", type=int, default=0,
+                            help="Розділити сканування на N шардів для окремих процесів/машин (0 - один процес)")
+    arg_parser.add_argument("--shard-backend", choices=["process", "queue"], default="process",
+                            help="process - локальні процеси; queue - черга в папці --queue-dir для воркерів на інших машинах")
+    arg_parser.add_argument("--queue-dir", default=None,
+                            help="Папка черги завдань (спільна з воркерами: python -m tester.coordinator --queue-dir ...)")
+    arg_parser.add_argument("--local-workers", type=int, default=None,
+                            help="Скільки воркерів черги запустити локально (за замовчуванням - по одному на шард)")
+    arg_parser.add_argument("--metrics-port", type=int, default=None,
+                            help="Віддавати метрики (OpenMetrics) на http://127.0.0.1:<порт>/metrics під час сканування")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="Записати cProfile кожного етапу (parse, generate, execute, analyze) у results/")
+
+    commands = arg_parser.add_subparsers(dest="command", metavar="КОМАНДА")
+    command = commands.add_parser("parse", help="Розібрати специфікацію -> endpoints_<час>.json")
+    _add_parse_options(command)
+    command.add_argument("-o", "--output", default=None, help="Куди записати ендпоінти")
+
+    command = commands.add_parser("generate", help="Згенерувати тест-кейси для ендпоінтів -> plans_<час>.jsonl")
+    command.add_argument("endpoints", help="Файл команди parse")
+    _add_generate_options(command)
+    command.add_argument("-o", "--output", default=None, help="Куди записати плани")
+
+    command = commands.add_parser("execute", help="Виконати плани проти цілі -> test_results_<час>.jsonl")
+    command.add_argument("plans", help="Файл команди generate")
+    _add_execute_options(command)
+    command.add_argument("-o", "--output", default=None, help="Куди записати результати")
+
+    command = commands.add_parser("analyze", help="Заново проаналізувати збережені результати (без мережі і моделі)")
+    command.add_argument("results", help="Файл результатів (execute або повного сканування)")
+    command.add_argument("-o", "--output", default=None, help="Куди записати звіт аналізу")
+    return arg_parser.parse_args()
+
 def main():
+    args = parse_args()
+    if args.command == "parse":
+        return cmd_parse(args, RESULTS_DIR)
+    if args.command == "generate":
+        return cmd_generate(args, RESULTS_DIR)
+    if args.command == "execute":
+        return cmd_execute(args, BASE_URL, RESULTS_DIR)
+    if args.command == "analyze":
+        return cmd_analyze(args, RESULTS_DIR)
+
+    # Повне сканування: виконавець (httpx), координатор і сховище (numpy) потрібні лише тут
+    from tester.pipeline import ScanPipeline
+    from tester.coordinator import ScanCoordinator
+    from tester.store import ResultStore
+    from tester.targets import executor_stats, merge_findings, profile_targets
+
+    if args.profile:
+        METRICS.enable_profiling()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"Метрики доступні на http://127.0.0.1:{args.metrics_port}/metrics")
     os.makedirs(RESULTS_DIR, exist_ok=True) # Створюємо папку, якщо її немає
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    # Ідентифікатор сканування - час першого запуску (при --resume береться з аргументу)
+    timestamp = args.resume or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     report_filename = f"test_report_{timestamp}.txt"
     report_filepath = os.path.join(RESULTS_DIR, report_filename)
+    results_filepath = os.path.join(RESULTS_DIR, f"test_results_{timestamp}.jsonl")
     
-    report_lines = [] # Тут будемо збирати весь наш вивід
+    if args.resume and args.incremental:
+        print("Помилка: --resume і --incremental не можна використовувати разом.")
+        exit(1)
+    if args.resume and args.shards:
+        print("Помилка: --resume не підтримується разом із --shards.")
+        exit(1)
+    if args.shards and len(target_urls(args, BASE_URL)) > 1:
+        print("Помилка: кілька --target не підтримуються разом із --shards.")
+        exit(1)
+    if args.shard_backend == "queue" and not args.queue_dir:
+        print("Помилка: для --shard-backend queue потрібно вказати --queue-dir.")
+        exit(1)
+
+    if args.resume:
+        try:
+            state = ScanState.load(RESULTS_DIR, args.resume)
+        except FileNotFoundError:
+            print(f"Помилка: Стан сканування {args.resume} не знайдено у папці {RESULTS_DIR}.")
+            exit(1)
+    else:
+        state = ScanState(RESULTS_DIR, timestamp)
+
+    # Весь вивід одразу пишемо у JSONL, а текстовий звіт рендеримо з нього в кінці
+    sink = JSONLResultSink(results_filepath)
+    # Тест позначається виконаним у стані тільки після того, як його результат на диску
+    state.before_flush = sink.flush
     
     # Створимо маленьку функцію, щоб одночасно друкувати і зберігати
     def log(message):
         print(message)
-        report_lines.append(message)
+        sink.log(message)
 
-    log("--- [Запуск Тестувальника Безпеки API] ---")
-    log(f"Час запуску: {timestamp}")
+    if args.resume:
+        log(f"\n--- [Відновлення сканування {args.resume}] ---")
+        log(f"Вже виконано тестів: {len(state.completed)}, збережено планів: {len(state.plans)}")
+    else:
+        log("--- [Запуск Тестувальника Безпеки API] ---")
+        log(f"Час запуску: {timestamp}")
+    log(f"Ціль: {describe_target(args, BASE_URL)}")
     
     # --- КРОК 1: ПАРСИНГ ---
-    log(f"\n[Крок 1] Аналіз файлу {OPENAPI_FILE_PATH}...")
-    parser = APIParser(filepath=OPENAPI_FILE_PATH)
-    all_endpoints = parser.parse_endpoints()
-    log(f"✅ Успішно проаналізовано! Знайдено {len(all_endpoints)} ендпоінтів.")
-
-    # --- КРОК 2: ГЕНЕРАЦІЯ АТАК (LLM) ---
-    log("\n[Крок 2] Генерація тест-кейсів (LLM)...")
-    generator = AttackGenerator()
-    all_test_plans = [] 
-    
-    for ep in all_endpoints:
-        log(f"  > Генерую тести для [{ep['method']}] {ep['path']}...")
-        test_cases = generator.generate_test_cases_for_endpoint(ep)
-        if test_cases:
-            all_test_plans.append({"endpoint": ep, "tests": test_cases})
-    log(f"✅ Згенеровано плани атак для {len(all_test_plans)} ендпоінтів.")
-
-
-    # --- КРОК 3: ВИКОНАННЯ АТАК ---
-    log("\n[Крок 3] Виконання атак...")
-    executor = APIExecutor(base_url=BASE_URL)
-    all_results = [] 
-    
-    for plan in all_test_plans:
-        ep = plan['endpoint']
-        log(f"\n  > Тестую [{ep['method']}] {ep['path']}...")
-        
-        for test in plan['tests']:
-            json_payload = None
-            url_param_payload = None
-            param_name = None
-            if ep['requestBodySchema']:
-                json_payload = test['payload']
-            elif ep['parameters']:
-                url_param_payload = str(test['payload'])
-                param_name = ep['parameters'][0]['name'] 
-            
-            result = executor.execute_test(
-                method=ep['method'],
-                path=ep['path'],
-                json_payload=json_payload,
-                url_param_payload=url_param_payload,
-                param_name=param_name
-            )
-            
-            log(f"    - Атака: {test['description'][:70]}...")
-            log(f"    - > РЕЗУЛЬТАТ: Статус {result['status_code']} за {result['time_seconds']:.2f} сек.")
-            if result['error']:
-                log(f"    - > ❗️ ПОМИЛКА: {result['body']}") 
-            
-            all_results.append({ "endpoint": ep, "test": test, "result": result })
-
-    # --- КРОК 4: АНАЛІЗ РЕЗУЛЬТАТІВ ---
+    if state.endpoints is not None:
+        all_endpoints = state.endpoints
+        log(f"\n[Крок 1] Ендпоінти взято зі збереженого стану: {len(all_endpoints)}.")
+    else:
+        log(f"\n[Крок 1] Аналіз файлу {args.spec}...")
+        parser = APIParser(filepath=args.spec, cache_dir=None if args.no_parse_cache else DEFAULT_PARSE_CACHE_DIR)
+        filters = {name: value for name, value in
+                   (("tags", args.tags), ("paths", args.paths), ("methods", args.methods)) if value}
+        with METRICS.stage("parse"):
+            all_endpoints = parser.parse_endpoints(**filters)
+        state.save_endpoints(all_endpoints)
+        log(f"✅ Успішно проаналізовано! Знайдено {len(all_endpoints)} ендпоінтів"
+            f"{' (з кешу парсингу)' if parser.cache_hit else ''}.")
+
+    # --- КРОК 1.1: ІНКРЕМЕНТАЛЬНЕ СКАНУВАННЯ (tester/incremental.py) ---
+    scan_endpoints = all_endpoints
+    if state.incremental is not None:
+        # Відновлення інкрементального сканування: знахідки вже перенесені у першому запуску
+        operations = set(state.incremental['operations'])
+        scan_endpoints = [ep for ep in all_endpoints if endpoint_key(ep) in operations]
+        log(f"  Інкрементальне сканування відносно {state.incremental['base']}: {len(scan_endpoints)} операцій.")
+    elif args.incremental:
+        base_id = find_last_scan(RESULTS_DIR, exclude=timestamp) if args.incremental == "last" else args.incremental
+        base_state = None
+        if base_id:
+            try:
+                base_state = ScanState.load(RESULTS_DIR, base_id)
+            except FileNotFoundError:
+                print(f"Помилка: Сканування {base_id} не знайдено у папці {RESULTS_DIR}.")
+                exit(1)
+        if base_state is None or base_state.finished is None or base_state.endpoints is None:
+            log("\n[Крок 1.1] Немає завершеного попереднього сканування - тестуємо всі операції.")
+        elif base_state.finished.get('generator') != args.generator:
+            log(f"\n[Крок 1.1] Сканування {base_id} виконано з іншим генератором "
+                f"({base_state.finished.get('generator')}) - тестуємо всі операції.")
+        elif base_state.finished.get('targets') != scan_targets(args, BASE_URL):
+            # Знахідки іншої цілі (або іншого набору --target) не можна переносити на цю
+            previous = ", ".join(base_state.finished.get('targets') or []) or "невідома"
+            log(f"\n[Крок 1.1] Сканування {base_id} виконано для іншої цілі ({previous}) - тестуємо всі операції.")
+        else:
+            diff = SpecDiff(base_state.endpoints, all_endpoints)
+            log(f"\n[Крок 1.1] Порівняння зі скануванням {base_id}: нових {len(diff.added)}, "
+                f"змінених {len(diff.changed)}, без змін {len(diff.unchanged)}, видалених {len(diff.removed)}.")
+            for title, items in (("нова", diff.added), ("змінена", diff.changed)):
+                for ep in items:
+                    log(f"    - {title}: {endpoint_key(ep)}")
+            for key in diff.removed:
+                log(f"    - видалена: {key}")
+            carried = carried_findings(RESULTS_DIR, base_id, diff.unchanged)
+            for finding in carried:
+                print(format_finding_line(sink.record(finding)))
+            log(f"  Перенесено знахідок незмінених операцій: {len(carried)}")
+            state.save_incremental(base_id, diff.to_scan)
+            scan_endpoints = diff.to_scan
+
+    # --- КРОК 2: ПРОФІЛЬ ЗАТРИМОК ЦІЛІ ---
+    executor = build_executor(args, BASE_URL, on_limit_decision=lambda decision: log(format_limit_decision(decision)))
+
+    target_profiles = {url: {} for url in target_urls(args, BASE_URL)}
+    if args.warmup > 0:
+        log(f"\n[Крок 2] Розігрів: {args.warmup} звичайних запитів на ендпоінт...")
+        with METRICS.stage("warmup"):
+            target_profiles = profile_targets(executor, scan_endpoints, args.warmup)
+        log_profiles(log, target_profiles)
+    # Пороги затримок - для повторного аналізу результатів (run_tester.py analyze)
+    profiles = sink.record(profiles_record(target_profiles))
+    latency_profiles = profiles['profiles']
+
+    # --- КРОК 3: ГЕНЕРАЦІЯ -> ВИКОНАННЯ -> АНАЛІЗ (конвеєр) ---
+    # Кожен тест виконується, щойно його згенеровано, а кожен результат
+    # аналізується, щойно він надійшов (див. tester/pipeline.py)
+    log(f"\n[Крок 3] Генерація ({args.generator}), виконання та аналіз атак "
+        f"(паралельно: {args.concurrency}, на ендпоінт: {args.per_endpoint})...")
+    generator, cache = build_generator(args)
+    analyzer = APIAnalyzer(latency_profiles=latency_profiles, target_profiles=profiles.get('target_profiles'))
+
+    def on_plan(ep, test_cases):
+        log(f"  > Згенеровано {len(test_cases)} тестів для [{ep['method']}] {ep['path']}")
+
+    def on_result(entry):
+        record = sink.result(entry)
+        print("\n".join(format_result_lines(record)))
+
+    def on_finding(vuln):
+        print(format_finding_line(sink.finding(vuln)))
+
+    def on_skip(entry):
+        print(format_skipped_line(sink.skipped(entry)))
+
+    if args.shards:
+        # Розподілене сканування: спочатку всі плани, потім шарди на воркери (див. tester/coordinator.py)
+        plans = []
+        with METRICS.stage("generate"):
+            for ep, test_cases in generator.generate_all(scan_endpoints):
+                if test_cases:
+                    on_plan(ep, test_cases)
+                    state.save_plan(ep, test_cases)
+                    plans.append({"endpoint": ep, "tests": test_cases})
+
+        def on_record(record):
+            sink.record(record)
+            if record['type'] == 'result':
+                print("\n".join(format_result_lines(record)))
+            elif record['type'] == 'skipped':
+                print(format_skipped_line(record))
+            else:
+                print(format_finding_line(record))
+
+        config = {"base_url": target_urls(args, BASE_URL)[0],
+                  "asgi_app": args.asgi_app,
+                  "concurrency": args.concurrency,
+                  "per_endpoint_concurrency": args.per_endpoint,
+                  "isolate_timing": not args.no_timing_isolation,
+                  "max_body_bytes": args.max_body_bytes,
+                  "deduplicate": not args.no_dedup,
+                  "adaptive": not args.no_adaptive,
+                  "min_concurrency": args.min_concurrency,
+                  "max_retry_after": args.max_retry_after,
+                  "prune": not args.no_pruning,
+                  "prune_after": args.prune_after,
+                  "latency_profiles": latency_profiles,
+                  "queue_size": args.queue_size}
+        coordinator = ScanCoordinator(config, args.shards, backend=args.shard_backend,
+                                      work_dir=RESULTS_DIR, queue_dir=args.queue_dir,
+                                      local_workers=args.local_workers, on_record=on_record)
+        log(f"  Розподілене сканування: {args.shards} шардів ({args.shard_backend})...")
+        try:
+            stats = coordinator.run(plans)
+            # Сканування з невдалими шардами не завершене: частину тестів не виконано
+            if not stats['failed_shards']:
+                state.mark_finished(generator=args.generator, targets=scan_targets(args, BASE_URL))
+        finally:
+            sink.flush()
+            state.close()
+    else:
+        pipeline = ScanPipeline(generator, executor, analyzer, queue_size=args.queue_size, state=state,
+                                on_plan=on_plan, on_result=on_result, on_finding=on_finding, on_skip=on_skip)
+        try:
+            stats = pipeline.run_sync(scan_endpoints)
+            state.mark_finished(generator=args.generator, targets=scan_targets(args, BASE_URL))
+        finally:
+            # Навіть при збої (Ctrl+C, падіння цілі) зберігаємо все, що встигли виконати
+            sink.flush()
+            state.close()
+
+    log(f"\n✅ Плани атак: {stats['plans']} ендпоінтів, {stats['results']} тестів виконано "
+        f"за {stats['elapsed_seconds']:.2f} сек.")
+    failed_shards = stats.get('failed_shards') or []
+    if failed_shards:
+        log(f"  ❗️ Шардів з помилкою: {len(failed_shards)} з {stats['shards']} - їхні тести не виконано:")
+        for failure in failed_shards:
+            log(f"    - {failure['shard']}: {failure['error'].strip().splitlines()[-1]}")
+    # Статистика виконавців: у розподіленому режимі - зведена з усіх воркерів, для кількох цілей - з усіх цілей
+    sections = stats if args.shards else executor_stats(executor)
+    pruning_stats = sections.get('pruning')
+    if stats.get('skipped'):
+        log(f"  Пропущено безнадійних тестів: {stats['skipped']} (несумісний тип: {pruning_stats['type_mismatch']}, "
+            f"клас відхиляється валідацією: {pruning_stats['short_circuited']}; "
+            f"відсічено класів атак: {pruning_stats['pruned_classes']})")
+    if stats['resumed']:
+        log(f"  Пропущено вже виконаних тестів: {stats['resumed']}")
+    if not args.shards:
+        log(f"  Для відновлення при збої: python run_tester.py --resume {timestamp}")
+    if stats['time_to_first_finding'] is not None:
+        log(f"  Перша вразливість знайдена через {stats['time_to_first_finding']:.2f} сек.")
+    if cache:
+        log(f"  Кеш тест-кейсів: {cache.stats['hits']} з кешу, {cache.stats['misses']} згенеровано.")
+    timing_stats = sections.get('timing')
+    if timing_stats:
+        log(f"  Time-based атак: {timing_stats['timing_probes']}, затримок підтверджено: {timing_stats['confirmed']}, "
+            f"відхилено як шум: {timing_stats['rejected']}")
+
+    dedup_stats = sections.get('dedup')
+    if dedup_stats:
+        log(f"  Дедуплікація: {dedup_stats['unique']} унікальних запитів, "
+            f"заощаджено {dedup_stats['saved']} запитів (однакові метод, URL і тіло)")
+
+    rate_stats = sections.get('rate_limit')
+    if rate_stats:
+        log(f"  Адаптивний ліміт: зараз {rate_stats['final_limit']} із {rate_stats['max_limit']} "
+            f"(діапазон {rate_stats['min_limit_seen']}-{rate_stats['max_limit_seen']}), "
+            f"збільшень: {rate_stats['increases']}, зменшень: {rate_stats['decreases']}, "
+            f"пауз Retry-After: {rate_stats['pauses']}, повторів після 429/503: {rate_stats['retries']}")
+
+    # Де витрачено час: сума спанів кожного етапу, викликів LLM та HTTP-запитів
+    llm_calls = METRICS.counter('llm_requests_total')
+    stage_totals = METRICS.totals("stage_seconds", "stage")
+    log("  Час етапів (сумарно): " + ", ".join(f"{name} {seconds:.2f}" for name, seconds in stage_totals.items())
+        + f" | LLM: {sum(METRICS.totals('llm_request_seconds', 'model').values()):.2f}"
+        + f" | HTTP: {sum(METRICS.totals('http_request_seconds', 'endpoint').values()):.2f} сек.")
+    log(f"  Тестів: {METRICS.counter('tests_sent_total'):.0f}, HTTP-запитів: {METRICS.counter('http_requests_total'):.0f}, помилок: {METRICS.counter('http_errors_total'):.0f}, "
+        f"повторів LLM: {METRICS.counter('llm_retries_total'):.0f}, токенів LLM: "
+        f"{METRICS.counter('llm_prompt_tokens_total'):.0f} + {METRICS.counter('llm_response_tokens_total'):.0f}"
+        + (f" (на запит: {METRICS.counter('llm_prompt_tokens_total') / llm_calls:.0f} + "
+           f"{METRICS.counter('llm_response_tokens_total') / llm_calls:.0f})" if llm_calls else ""))
+    metrics_prefix = os.path.join(RESULTS_DIR, f"metrics_{timestamp}")
+    METRICS.write(f"{metrics_prefix}.prom", f"{metrics_prefix}.json")
+    log(f"  Метрики: {metrics_prefix}.prom (Prometheus), {metrics_prefix}.json (зведення)")
+    if args.profile:
+        for path in METRICS.dump_profiles(os.path.join(RESULTS_DIR, f"profile_{timestamp}")):
+            log(f"  Профіль етапу: {path}")
+
+    # --- КРОК 4: ФІНАЛЬНИЙ ЗВІТ ---
     log("\n" + "="*50)
     log("--- 🏁 ФІНАЛЬНИЙ ЗВІТ ПРО ВРАЗЛИВОСТІ ---")
     log("="*50)
     
-    analyzer = APIAnalyzer()
-    vulnerabilities = analyzer.analyze_results(all_results)
+    # Вразливості читаємо з JSONL: туди ж потрапили знахідки з попередніх запусків (--resume)
+    sink.flush()
+    # Знахідки кількох цілей (--target) - одним записом з переліком уражених цілей
+    vulnerabilities = merge_findings([record for record in read_records(results_filepath) if record['type'] == 'finding'])
     
     if not vulnerabilities:
         log("\n✅ Вітаємо! Жодних критичних вразливостей не знайдено.")
@@ -97,27 +420,64 @@ def main():
         log("   - Статус 201 (Created) за 0.0 сек: Ваш API зберіг шкідливий рядок (напр., SQLi)")
         log("     як звичайний текст, але *не виконав* його. Це також безпечна поведінка.")
     else:
-        log(f"\n🚨 УВАГА! Знайдено {len(vulnerabilities)} вразливостей:")
+        carried_count = sum(1 for vuln in vulnerabilities if vuln.get('carried_forward'))
+        log(f"\n🚨 УВАГА! Знайдено {len(vulnerabilities)} вразливостей"
+            f"{f' (з них {carried_count} перенесено з попереднього сканування)' if carried_count else ''}:")
         for i, vuln in enumerate(vulnerabilities):
             log(f"\n--- Вразливість #{i+1} ---")
             log(f"  Тип      : {vuln['vulnerability']['type']}")
             log(f"  Ендпоінт : {vuln['endpoint']}")
             log(f"  Деталі   : {vuln['vulnerability']['details']}")
             log(f"  Payload  : {json.dumps(vuln['payload'])}")
+            if vuln['targets']:
+                log(f"  Цілі     : {', '.join(vuln['targets'])}")
+            if vuln.get('carried_forward'):
+                log(f"  Статус   : перенесено зі сканування {vuln['carried_from']} (операцію не змінено)")
     
+    # Аномалії по ендпоінтах: векторні запити до колонкового сховища результатів (tester/store.py)
+    store = ResultStore.from_records(read_records(results_filepath), all_endpoints)
+    thresholds = analyzer.endpoint_thresholds()
+    server_errors = store.count_by_endpoint(store.select(statuses=((500, 600),)))
+    slow = store.count_by_endpoint(store.select(min_time=TIME_BASED_THRESHOLD, endpoint_thresholds=thresholds,
+                                                exclude_rejected_timing=True))
+    slow_errors = store.count_by_endpoint(store.select(statuses=((500, 600),), min_time=TIME_BASED_THRESHOLD,
+                                                       endpoint_thresholds=thresholds, exclude_rejected_timing=True))
+    if server_errors or slow:
+        log(f"\nАномалії відповідей ({len(store)} результатів, {store.memory_bytes() / 1024:.0f} КБ у сховищі):")
+        for key in dict.fromkeys(list(server_errors) + list(slow)):
+            log(f"  - {key}: 5xx - {server_errors.get(key, 0)}, повільніше порогу - {slow.get(key, 0)}, "
+                f"5xx і повільніше порогу - {slow_errors.get(key, 0)}")
+
+    # Тести, які не надсилались (tester/pruning.py): скільки і чому, по кожному ендпоінту
+    skipped = {}
+    for record in read_records(results_filepath):
+        if record['type'] == 'skipped':
+            key = (record['endpoint'], record['reason'])
+            skipped[key] = skipped.get(key, 0) + 1
+    if skipped:
+        log(f"\nПропущені тести ({sum(skipped.values())}, не надсилались - див. рядки 'Пропущено' вище):")
+        for (endpoint, reason), count in skipped.items():
+            log(f"  - {endpoint}: {count} - {reason}")
+
     log("\n--- [Тестування завершено] ---")
 
-    # --- 5. Зберігаємо звіт у файл ---
+    sink.close()
+
+    # --- 5. Рендеримо текстовий звіт з JSONL ---
     try:
-        with open(report_filepath, 'w', encoding='utf-8') as f:
-            f.write("\n".join(report_lines))
+        render_text_report(results_filepath, report_filepath)
         print("\n" + "="*50)
         print(f"✅ Звіт успішно збережено у файл:")
         print(f"   {report_filepath}")
+        print(f"   (сирі результати: {results_filepath})")
         print("="*50)
     except Exception as e:
         print(f"\n❗️ Помилка під час збереження звіту у файл: {e}")
 
+    if failed_shards:
+        print(f"\n❗️ Сканування неповне: {len(failed_shards)} шардів завершились помилкою (див. звіт).")
+        exit(1)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
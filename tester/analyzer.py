@@ -1,5 +1,7 @@
 # Цей файл знаходиться в: tester/analyzer.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from tester.rules import Rule, RuleEngine
 
 # Визначаємо поріг для time-based атак (напр., 4 секунди).
 # Якщо атака SLEEP(5) тривала > 4 сек, ми вважаємо її успішною.
@@ -11,64 +13,77 @@ class APIAnalyzer:
     Аналізує результати та шукає докази вразливостей.
     """
     
-    def __init__(self):
+    def __init__(self, latency_profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 rules: Optional[List[Rule]] = None,
+                 target_profiles: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
         # Тут буде наш фінальний звіт
         self.vulnerabilities = []
+        # Правила детектора (див. tester/rules.py)
+        self.engine = RuleEngine(rules)
+        # Профілі затримок від LatencyProfiler (поріг для кожного ендпоінта)
+        self.latency_profiles = latency_profiles or {}
+        # Кілька цілей (tester/targets.py): у кожної свої профілі, {ціль: профілі}
+        self.target_profiles = target_profiles or {}
 
-    def _is_time_based_sqli(self, test: Dict, result: Dict) -> bool:
-        """Перевіряє на Time-based SQL Injection."""
-        
-        # 1. Перевіряємо, чи це взагалі була time-based атака
-        desc = test.get('description', '').lower()
-        if 'time-based' not in desc and 'sleep' not in desc and 'waitfor' not in desc:
-            return False
-        
-        # 2. Перевіряємо час виконання
-        if result['time_seconds'] >= TIME_BASED_THRESHOLD:
-            # 3. Перевіряємо, чи сервер не повернув помилку валідації (422)
-            # Успіх - це 2xx (успішно) або 5xx (помилка сервера, яку ми спричинили)
-            if 200 <= result['status_code'] < 300 or result['status_code'] >= 500:
-                return True
-        
-        return False
+    def _threshold_for(self, endpoint: Dict, target: Optional[str] = None) -> float:
+        profiles = self.target_profiles.get(target, self.latency_profiles) if target else self.latency_profiles
+        profile = profiles.get(f"[{endpoint['method']}] {endpoint['path']}")
+        return profile['threshold'] if profile else TIME_BASED_THRESHOLD
 
-    def _is_error_based_sqli(self, test: Dict, result: Dict) -> bool:
-        """Перевіряє на Error-based SQL Injection."""
-        
-        # 1. Перевіряємо, чи це була error-based атака
-        desc = test.get('description', '').lower()
-        if 'error-based' not in desc and 'помил' not in desc:
-            return False
-            
-        # 2. Перевіряємо, чи сервер повернув 500 Internal Server Error
-        if result['status_code'] == 500:
-            # 3. (Бонус) Перевіряємо, чи тіло відповіді містить ключові слова SQL
-            body = result.get('body', '').lower()
-            if 'sql' in body or 'syntax' in body or 'database' in body or 'query' in body:
-                return True
-
-        return False
+    def endpoint_thresholds(self) -> Dict[str, float]:
+        """Поріг часу для кожного ендпоінта; для кількох цілей - найменший з порогів цілей."""
+        thresholds = {key: profile['threshold'] for key, profile in self.latency_profiles.items()}
+        for profiles in self.target_profiles.values():
+            for key, profile in profiles.items():
+                thresholds[key] = min(thresholds.get(key, profile['threshold']), profile['threshold'])
+        return thresholds
 
-    def _is_reflected_xss(self, test: Dict, result: Dict) -> bool:
-        """Перевіряє на Reflected XSS (дуже базово)."""
-        
-        # 1. Перевіряємо, чи це була XSS атака
-        desc = test.get('description', '').lower()
-        if 'xss' not in desc:
-            return False
+    def analyze_result(self, res: Dict) -> Optional[Dict]:
+        """
+        Аналізує один результат {endpoint, test, result}.
+        Повертає знайдену вразливість (і додає її у звіт) або None.
+        Дозволяє аналізувати результати одразу, як тільки вони надходять.
+        """
+        endpoint = res['endpoint']
+        test = res['test']
+        result = res['result']
         
-        # 2. Перевіряємо, чи payload повернувся у тілі відповіді
-        payload = str(test.get('payload', ''))
-        # Видаляємо пробіли і ' з payload для кращого порівняння
-        payload_simple = payload.replace(" ", "").replace("'", "")
-        body_simple = result.get('body', '').replace(" ", "").replace("'", "")
+        # --- Головна логіка детектора: перше правило, що спрацювало ---
+        # (Time-based SQLi -> Error-based SQLi -> Reflected XSS, див. DEFAULT_RULES)
+        vulnerability_found = self.engine.evaluate(test, result, self._threshold_for(endpoint, res.get('target')))
         
-        # 3. Якщо наш "чистий" payload є в тілі відповіді і статус 200 OK
-        if payload_simple in body_simple and result['status_code'] == 200:
-             return True
+        # Додаємо вразливість у звіт, якщо знайшли
+        if not vulnerability_found:
+            return None
+        finding = {
+            "endpoint": f"[{endpoint['method']}] {endpoint['path']}",
+            "vulnerability": vulnerability_found,
+            "payload": test['payload']
+        }
+        if res.get('target'):
+            finding["target"] = res['target']
+        self.vulnerabilities.append(finding)
+        return finding
+
+    def analyze_store(self, store) -> List[Dict]:
+        """
+        Аналізує ResultStore (tester/store.py). Спершу векторним запитом по колонках відбираються
+        рядки, які проходять статус / час хоча б одного правила, і тільки вони йдуть у рушій правил
+        (решта не може дати знахідку). Повертає знахідки в порядку рядків.
+        """
+        self.vulnerabilities = []
+        thresholds = self.endpoint_thresholds()
+        candidates = set()
+        for rule in self.engine.rules:
+            if rule.requires_delay:
+                candidates.update(store.select(statuses=rule.statuses, min_time=TIME_BASED_THRESHOLD,
+                                               endpoint_thresholds=thresholds, exclude_rejected_timing=True))
+            else:
+                candidates.update(store.select(statuses=rule.statuses))
+        for entry in store.rows(sorted(candidates)):
+            self.analyze_result(entry)
+        return self.vulnerabilities
 
-        return False
-        
     def analyze_results(self, all_results: List[Dict]) -> List[Dict]:
         """
         Головний метод. Проходить по всіх результатах і шукає вразливості.
@@ -76,44 +91,6 @@ class APIAnalyzer:
         self.vulnerabilities = []
         
         for res in all_results:
-            endpoint = res['endpoint']
-            test = res['test']
-            result = res['result']
-            
-            vulnerability_found = None
-            
-            # --- Головна логіка детектора ---
-            
-            # 1. Перевірка на Time-based SQLi
-            if self._is_time_based_sqli(test, result):
-                vulnerability_found = {
-                    "type": "Time-based SQL Injection (CRITICAL)",
-                    "details": f"Атака '{test['description']}' змусила сервер 'зависнути' на {result['time_seconds']:.2f} сек. (Статус: {result['status_code']})",
-                }
-            
-            # 2. Перевірка на Error-based SQLi
-            elif self._is_error_based_sqli(test, result):
-                vulnerability_found = {
-                    "type": "Error-based SQL Injection (HIGH)",
-                    "details": f"Атака '{test['description']}' змусила сервер повернути Статус 500 з SQL-помилкою: {result['body'][:100]}...",
-                }
-            
-            # 3. Перевірка на Reflected XSS
-            # (Ми не знайдемо її у нашому API, бо в нас немає HTML-відповідей)
-            elif self._is_reflected_xss(test, result):
-                 vulnerability_found = {
-                    "type": "Reflected Cross-Site Scripting (MEDIUM)",
-                    "details": f"Атака '{test['description']}' була відображена у відповіді сервера.",
-                }
-            
-            # --- Кінець логіки ---
-            
-            # Додаємо вразливість у звіт, якщо знайшли
-            if vulnerability_found:
-                self.vulnerabilities.append({
-                    "endpoint": f"[{endpoint['method']}] {endpoint['path']}",
-                    "vulnerability": vulnerability_found,
-                    "payload": test['payload']
-                })
+            self.analyze_result(res)
         
-        return self.vulnerabilities
\ No newline at end of file
+        return self.vulnerabilities
@@ -0,0 +1,98 @@
+# Цей файл знаходиться в: tester/cache.py
+
+import hashlib
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "generation")
+
+
+class GenerationCache:
+    """
+    Кеш згенерованих тест-кейсів на диску.
+    Кожен запис - окремий JSON-файл, назва якого - sha256 від назви моделі та промпту.
+    Промпт вже містить метод, шлях, схему тіла та параметри ендпоінта, тож
+    будь-яка зміна в openapi.json дає новий ключ, а незмінні ендпоінти беруться з кешу.
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_CACHE_DIR,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 5000,
+                 refresh: bool = False):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # refresh=True: ігноруємо збережені записи, але перезаписуємо їх новими
+        self.refresh = refresh
+        self.stats = {"hits": 0, "misses": 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.evict()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_name}\n{prompt}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Повертає тест-кейси з кешу або None, якщо запису немає чи він застарів."""
+        if self.refresh:
+            self.stats["misses"] += 1
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stats["misses"] += 1
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return entry['test_cases']
+
+    def put(self, key: str, test_cases: List[Dict[str, Any]]):
+        """Зберігає тест-кейси. Пишемо у тимчасовий файл і перейменовуємо, щоб не лишити "битий" запис."""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": time.time(), "test_cases": test_cases}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Видаляє записи, старші за TTL, і найстаріші записи понад max_entries."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if now - mtime > self.ttl_seconds:
+                self._remove(path)
+            else:
+                entries.append((mtime, path))
+
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,266 @@
+# Цей файл знаходиться в: tester/commands.py
+
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+from tester.report import (JSONLResultSink, format_finding_line, format_limit_decision, format_result_lines,
+                           format_skipped_line, read_records)
+
+# Окремі етапи сканування (run_tester.py parse / generate / execute / analyze), які обмінюються файлами:
+#   parse    -> endpoints_<час>.json      {"spec": ..., "endpoints": [...]}
+#   generate -> plans_<час>.jsonl         один план на рядок: {"endpoint": ..., "tests": [...]}
+#   execute  -> test_results_<час>.jsonl  той самий формат, що й у повного сканування
+#   analyze  -> analysis_<час>.txt        знахідки, знайдені заново за результатами
+# Важкі модулі (httpx, SDK моделі) імпортуються лише в тих командах, яким вони потрібні.
+
+
+def _default_output(results_dir: str, prefix: str, extension: str) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    return os.path.join(results_dir, f"{prefix}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.{extension}")
+
+
+def build_generator(args):
+    """Генератор тест-кейсів за опціями --generator, --gen-* (повертає (генератор, кеш або None))."""
+    from tester.templates import TemplateGenerator, HybridGenerator
+
+    if args.generator == "template":
+        # Шаблонам не потрібні ні модель, ні кеш
+        return TemplateGenerator(), None
+
+    from tester.cache import GenerationCache
+    from tester.generator import AttackGenerator
+    from tester.llm import FakeLLMClient
+
+    cache = None if args.no_generation_cache else GenerationCache(refresh=args.refresh_generation)
+    generator = AttackGenerator(cache=cache,
+                                client=FakeLLMClient() if args.fake_llm else None,
+                                workers=args.gen_workers,
+                                requests_per_minute=args.gen_rpm,
+                                batch_size=args.gen_batch)
+    if args.generator == "hybrid":
+        generator = HybridGenerator(generator, TemplateGenerator())
+    return generator, cache
+
+
+def build_executor(args, base_url: str, on_limit_decision: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """
+    AsyncAPIExecutor за опціями виконання (--concurrency, --no-dedup, --no-pruning, --asgi-app, ...).
+    Кілька --target - TargetGroup: свій виконавець (пул з'єднань і ліміти) на кожну ціль.
+    """
+    from tester.executor import AsyncAPIExecutor
+    from tester.pruning import TestPruner
+    from tester.targets import TargetGroup
+    from tester.transport import make_transport
+
+    executors = [AsyncAPIExecutor(base_url=url,
+                                  concurrency=args.concurrency,
+                                  per_endpoint_concurrency=args.per_endpoint,
+                                  isolate_timing=not args.no_timing_isolation,
+                                  max_body_bytes=args.max_body_bytes,
+                                  deduplicate=not args.no_dedup,
+                                  adaptive=not args.no_adaptive,
+                                  min_concurrency=args.min_concurrency,
+                                  max_retry_after=args.max_retry_after,
+                                  on_limit_decision=on_limit_decision,
+                                  pruner=None if args.no_pruning else TestPruner(args.prune_after),
+                                  transport=make_transport(args.asgi_app))
+                 for url in target_urls(args, base_url)]
+    return executors[0] if len(executors) == 1 else TargetGroup(executors)
+
+
+def target_urls(args, base_url: str) -> List[str]:
+    """Адреси цілей: --target (кілька), умовний хост застосунку в процесі (--asgi-app) або base_url."""
+    from tester.transport import ASGI_BASE_URL
+
+    if args.asgi_app and args.target:
+        print("Помилка: --asgi-app і --target не можна використовувати разом.")
+        exit(1)
+    if args.asgi_app:
+        return [ASGI_BASE_URL]
+    urls = [url.rstrip('/') for url in args.target or [base_url]]
+    if len(set(urls)) != len(urls):
+        print("Помилка: кожна ціль --target має бути вказана один раз.")
+        exit(1)
+    return urls
+
+
+def scan_targets(args, base_url: str) -> List[str]:
+    """
+    Що саме сканували - для запису 'finished' у стані сканування (tester/incremental.py):
+    адреси цілей у сталому порядку, а для застосунку в процесі - його шлях імпорту.
+    """
+    if args.asgi_app:
+        return [f"asgi:{args.asgi_app}"]
+    return sorted(target_urls(args, base_url))
+
+
+def describe_target(args, base_url: str) -> str:
+    if args.asgi_app:
+        return f"ASGI-застосунок {args.asgi_app} у процесі (без мережі)"
+    return ", ".join(target_urls(args, base_url))
+
+
+def log_profiles(log: Callable[[str], None], target_profiles: Dict[str, Dict[str, Dict[str, Any]]]):
+    """Профілі затримок після розігріву (з назвою цілі, якщо їх кілька)."""
+    for target, profiles in target_profiles.items():
+        prefix = f"{target} " if len(target_profiles) > 1 else ""
+        for key, profile in profiles.items():
+            log(f"    - {prefix}{key}: p50 {profile['p50']:.3f} / p95 {profile['p95']:.3f} / p99 {profile['p99']:.3f} сек. "
+                f"-> поріг {profile['threshold']:.2f} сек., таймаут {profile['timeout']:.2f} сек.")
+
+
+def profiles_record(target_profiles: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Запис 'profiles' для файлу результатів: пороги затримок для команди analyze."""
+    if len(target_profiles) > 1:
+        return {"type": "profiles", "profiles": {}, "target_profiles": target_profiles}
+    return {"type": "profiles", "profiles": next(iter(target_profiles.values()), {})}
+
+
+def read_endpoints(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['endpoints']
+
+
+def iter_plans(path: str) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Плани з файлу команди generate, по одному (файл не читається в пам'ять цілком)."""
+    for record in read_records(path):
+        if record.get('type') == 'plan':
+            yield record['endpoint'], record['tests']
+
+
+class PlanFile:
+    """Готові плани з файлу замість генератора (інтерфейс generate_all, як у AttackGenerator)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def endpoints(self) -> List[Dict[str, Any]]:
+        return [endpoint for endpoint, _ in iter_plans(self.path)]
+
+    def generate_all(self, endpoints: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        wanted = {f"[{ep['method']}] {ep['path']}" for ep in endpoints}
+        for endpoint, tests in iter_plans(self.path):
+            if f"[{endpoint['method']}] {endpoint['path']}" in wanted:
+                yield endpoint, tests
+
+
+def cmd_parse(args, results_dir: str):
+    from tester.parser import APIParser, DEFAULT_PARSE_CACHE_DIR
+
+    parser = APIParser(filepath=args.spec, cache_dir=None if args.no_parse_cache else DEFAULT_PARSE_CACHE_DIR)
+    filters = {name: value for name, value in
+               (("tags", args.tags), ("paths", args.paths), ("methods", args.methods)) if value}
+    endpoints = parser.parse_endpoints(**filters)
+    output = args.output or _default_output(results_dir, "endpoints", "json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"spec": args.spec, "endpoints": endpoints}, f, ensure_ascii=False)
+    print(f"✅ Знайдено {len(endpoints)} ендпоінтів{' (з кешу парсингу)' if parser.cache_hit else ''}: {output}")
+
+
+def cmd_generate(args, results_dir: str):
+    endpoints = read_endpoints(args.endpoints)
+    generator, cache = build_generator(args)
+    output = args.output or _default_output(results_dir, "plans", "jsonl")
+    plans = tests = 0
+    with JSONLResultSink(output) as sink:
+        for endpoint, test_cases in generator.generate_all(endpoints):
+            if not test_cases:
+                continue
+            sink.record({"type": "plan", "endpoint": endpoint, "tests": test_cases})
+            plans += 1
+            tests += len(test_cases)
+            print(f"  > Згенеровано {len(test_cases)} тестів для [{endpoint['method']}] {endpoint['path']}")
+    print(f"✅ {plans} планів, {tests} тестів: {output}")
+    if cache:
+        print(f"  Кеш тест-кейсів: {cache.stats['hits']} з кешу, {cache.stats['misses']} згенеровано.")
+
+
+def cmd_execute(args, base_url: str, results_dir: str):
+    from tester.analyzer import APIAnalyzer
+    from tester.pipeline import ScanPipeline
+    from tester.targets import profile_targets
+
+    plans = PlanFile(args.plans)
+    endpoints = plans.endpoints()
+    output = args.output or _default_output(results_dir, "test_results", "jsonl")
+    with JSONLResultSink(output) as sink:
+        def log(message):
+            print(message)
+            sink.log(message)
+
+        log(f"Ціль: {describe_target(args, base_url)}")
+        executor = build_executor(args, base_url,
+                                  on_limit_decision=lambda decision: log(format_limit_decision(decision)))
+        target_profiles = {url: {} for url in target_urls(args, base_url)}
+        if args.warmup > 0:
+            log(f"Розігрів: {args.warmup} звичайних запитів на ендпоінт...")
+            target_profiles = profile_targets(executor, endpoints, args.warmup)
+        # Пороги затримок потрібні команді analyze
+        record = sink.record(profiles_record(target_profiles))
+
+        analyzer = APIAnalyzer(latency_profiles=record['profiles'], target_profiles=record.get('target_profiles'))
+        pipeline = ScanPipeline(plans, executor, analyzer,
+                                queue_size=args.queue_size,
+                                on_result=lambda entry: print("\n".join(format_result_lines(sink.result(entry)))),
+                                on_finding=lambda vuln: print(format_finding_line(sink.finding(vuln))),
+                                on_skip=lambda entry: print(format_skipped_line(sink.skipped(entry))))
+        stats = pipeline.run_sync(endpoints)
+        log(f"✅ {stats['results']} тестів виконано за {stats['elapsed_seconds']:.2f} сек., "
+            f"пропущено {stats['skipped']}, знахідок {stats['findings']}: {output}")
+
+
+def cmd_analyze(args, results_dir: str):
+    """
+    Заново аналізує збережені результати (execute або повного сканування) без мережі і без моделі.
+    Пороги затримок - із запису 'profiles' у файлі результатів. У файлі результатів є лише початок
+    тіла відповіді, тож результати з довшим тілом без знахідки звіт називає неперевіреними, а не чистими.
+    """
+    from tester.analyzer import APIAnalyzer
+    from tester.report import BODY_PREVIEW_BYTES
+    from tester.store import ResultStore
+    from tester.targets import merge_findings
+
+    profiles = {"profiles": {}}
+    for record in read_records(args.results):
+        if record['type'] == 'profiles':
+            profiles = record
+    store = ResultStore.from_records(read_records(args.results))
+    findings = APIAnalyzer(latency_profiles=profiles['profiles'],
+                           target_profiles=profiles.get('target_profiles')).analyze_store(store)
+    for vuln in findings:
+        print(format_finding_line({"type": "finding", **vuln}))
+    found = {(vuln['endpoint'], json.dumps(vuln['payload'], sort_keys=True), vuln.get('target')) for vuln in findings}
+    unchecked = []
+    for row, body_size in store.clipped.items():
+        entry = store.row(row)
+        endpoint = f"[{entry['endpoint']['method']}] {entry['endpoint']['path']}"
+        if (endpoint, json.dumps(entry['test']['payload'], sort_keys=True), entry.get('target')) not in found:
+            unchecked.append((endpoint, entry['test'].get('description', ''), body_size))
+    # Знахідки кількох цілей - одним записом з переліком уражених цілей
+    findings = merge_findings(findings)
+
+    output = args.output or _default_output(results_dir, "analysis", "txt")
+    lines = [f"Аналіз {args.results}: {len(store)} результатів, знайдено {len(findings)} вразливостей."]
+    if unchecked:
+        lines.append(f"Не перевірено повністю: {len(unchecked)} результатів - тіло довше за {BODY_PREVIEW_BYTES} байт, "
+                     f"а у файлі результатів лише його початок (знахідки далі в тілі тут не видно).")
+    for i, vuln in enumerate(findings):
+        lines += [f"\n--- Вразливість #{i + 1} ---",
+                  f"  Тип      : {vuln['vulnerability']['type']}",
+                  f"  Ендпоінт : {vuln['endpoint']}",
+                  f"  Деталі   : {vuln['vulnerability']['details']}",
+                  f"  Payload  : {json.dumps(vuln['payload'])}"]
+        if vuln['targets']:
+            lines.append(f"  Цілі     : {', '.join(vuln['targets'])}")
+    if unchecked:
+        lines.append("\n--- Не перевірено повністю ---")
+        lines += [f"  - {endpoint} | {description[:70]} (тіло {body_size} байт)"
+                  for endpoint, description, body_size in unchecked]
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    print(lines[0])
+    if unchecked:
+        print(lines[1])
+    print(f"Звіт: {output}")
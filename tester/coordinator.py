@@ -0,0 +1,460 @@
+# Цей файл знаходиться в: tester/coordinator.py
+#
+# Розподілене сканування: плани атак діляться на шарди, кожен шард виконує
+# окремий процес (локально через ProcessPoolExecutor) або окремий воркер
+# на іншій машині через чергу в спільній папці:
+#     python -m tester.coordinator --queue-dir /shared/queue
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+from tester.analyzer import APIAnalyzer
+from tester.executor import AsyncAPIExecutor
+from tester.metrics import METRICS
+from tester.pipeline import ScanPipeline
+from tester.pruning import TestPruner, DEFAULT_PRUNE_AFTER
+from tester.report import JSONLResultSink, read_records
+from tester.scheduler import is_time_based_probe
+from tester.transport import make_transport
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time-based атака триває секунди і виконується по одній - при розподілі рахуємо її "важчою"
+TIMING_PROBE_WEIGHT = 10
+
+# Скільки разів шард повертається в чергу після зниклого воркера (впав увесь процес), перш ніж вважати його невдалим
+MAX_SHARD_ATTEMPTS = 3
+
+
+def split_into_shards(plans: List[Dict[str, Any]], shards: int) -> List[List[Dict[str, Any]]]:
+    """
+    Ділить плани {endpoint, tests} на шарди з приблизно однаковою вагою.
+    Ендпоінт цілком потрапляє в один шард, тож ліміт на ендпоінт і смуга
+    time-based атак працюють так само, як і в одному процесі.
+    Жадібно: найважчий план - у найлегший шард.
+    """
+    def weight(plan):
+        return sum(TIMING_PROBE_WEIGHT if is_time_based_probe(test) else 1 for test in plan['tests'])
+
+    buckets: List[Tuple[int, List[Dict[str, Any]]]] = [(0, []) for _ in range(max(1, shards))]
+    for plan in sorted(plans, key=weight, reverse=True):
+        index = min(range(len(buckets)), key=lambda i: buckets[i][0])
+        total, bucket = buckets[index]
+        bucket.append(plan)
+        buckets[index] = (total + weight(plan), bucket)
+    return [bucket for _, bucket in buckets if bucket]
+
+
+class _ShardPlans:
+    """Готові плани шарду з інтерфейсом генератора (для ScanPipeline)."""
+
+    def __init__(self, plans: List[Dict[str, Any]]):
+        self.plans = plans
+
+    def generate_all(self, endpoints: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        for plan in self.plans:
+            yield plan['endpoint'], plan['tests']
+
+
+def run_shard(shard: Dict[str, Any], output_path: str) -> Dict[str, Any]:
+    """
+    Виконує один шард: {"shard_id", "config", "plans"}.
+    Результати та знахідки пишуться у JSONL output_path (формат JSONLResultSink),
+    повертається статистика конвеєра. Функція верхнього рівня - її можна передати в інший процес.
+    """
+    config = shard['config']
+    # Воркер черги може виконати кілька шардів поспіль - метрики рахуємо для кожного окремо
+    METRICS.reset()
+    executor = AsyncAPIExecutor(config['base_url'],
+                                concurrency=config['concurrency'],
+                                per_endpoint_concurrency=config['per_endpoint_concurrency'],
+                                isolate_timing=config['isolate_timing'],
+                                latency_profiles=config['latency_profiles'],
+                                max_body_bytes=config['max_body_bytes'],
+                                deduplicate=config.get('deduplicate', True),
+                                adaptive=config.get('adaptive', True),
+                                min_concurrency=config.get('min_concurrency', 1),
+                                max_retry_after=config.get('max_retry_after', 60.0),
+                                pruner=TestPruner(config.get('prune_after', DEFAULT_PRUNE_AFTER)) if config.get('prune', True) else None,
+                                transport=make_transport(config.get('asgi_app')))
+    analyzer = APIAnalyzer(latency_profiles=config['latency_profiles'])
+    plans = shard['plans']
+
+    with JSONLResultSink(output_path) as sink:
+        pipeline = ScanPipeline(_ShardPlans(plans), executor, analyzer,
+                                queue_size=config['queue_size'],
+                                on_result=sink.result, on_finding=sink.finding, on_skip=sink.skipped)
+        stats = pipeline.run_sync([plan['endpoint'] for plan in plans])
+
+    stats["timing"] = executor.scheduler.stats if executor.scheduler else None
+    stats["dedup"] = executor.dedup.stats if executor.dedup else None
+    stats["rate_limit"] = executor.limiter.summary() if executor.limiter else None
+    stats["pruning"] = executor.pruner.stats if executor.pruner else None
+    stats["metrics"] = METRICS.snapshot()
+    return stats
+
+
+def merge_stats(shard_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сумарна статистика шардів (час першої знахідки - найменший)."""
+    merged = {"plans": 0, "tests": 0, "results": 0, "findings": 0, "resumed": 0, "skipped": 0,
+              "time_to_first_finding": None, "timing": None, "dedup": None, "rate_limit": None,
+              "pruning": None}
+    for stats in shard_stats:
+        # Метрики воркерів додаються до реєстру координатора
+        if stats.get("metrics"):
+            METRICS.merge(stats["metrics"])
+        for key in ("plans", "tests", "results", "findings", "resumed", "skipped"):
+            merged[key] += stats.get(key, 0)
+        first = stats.get("time_to_first_finding")
+        if first is not None and (merged["time_to_first_finding"] is None or first < merged["time_to_first_finding"]):
+            merged["time_to_first_finding"] = first
+        for section in ("timing", "dedup", "pruning"):
+            if stats.get(section):
+                totals = merged[section] or {}
+                for key, value in stats[section].items():
+                    totals[key] = totals.get(key, 0) + value
+                merged[section] = totals
+        if stats.get("rate_limit"):
+            merged["rate_limit"] = _merge_rate_limit(merged["rate_limit"], stats["rate_limit"])
+    return merged
+
+
+def _merge_rate_limit(total: Optional[Dict[str, Any]], shard: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Адаптивний ліміт у кожного воркера свій (на хост цілі), тож лічильники рішень сумуються,
+    а final_limit і max_limit - це сумарна паралельність усіх воркерів.
+    """
+    if total is None:
+        return dict(shard)
+    for key in ("increases", "decreases", "pauses", "retries", "final_limit", "max_limit"):
+        total[key] = total.get(key, 0) + shard.get(key, 0)
+    total["min_limit_seen"] = min(total["min_limit_seen"], shard["min_limit_seen"])
+    total["max_limit_seen"] = max(total["max_limit_seen"], shard["max_limit_seen"])
+    if shard.get("baseline_latency") is not None:
+        total["baseline_latency"] = min(filter(None, (total.get("baseline_latency"), shard["baseline_latency"])))
+    return total
+
+
+class DirectoryWorkQueue:
+    """
+    Найпростіша черга завдань на файловій системі (локально або на спільному диску, напр. NFS).
+      pending/<шард>.json  - завдання, що чекає на воркера;
+      claimed/<шард>.json  - завдання, яке виконує воркер (mtime - його "пульс");
+      done/<шард>.jsonl    - результати шарду, done/<шард>.stats.json - ознака завершення;
+      failed/<шард>.json   - шард, який впав, failed/<шард>.error.txt - traceback (ознака невдачі).
+    Воркер забирає завдання атомарним os.rename, тож два воркери не візьмуть один шард.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.pending_dir = os.path.join(root, "pending")
+        self.claimed_dir = os.path.join(root, "claimed")
+        self.done_dir = os.path.join(root, "done")
+        self.failed_dir = os.path.join(root, "failed")
+        for directory in (self.pending_dir, self.claimed_dir, self.done_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def submit(self, name: str, shard: Dict[str, Any]):
+        tmp_path = os.path.join(self.root, f"{name}.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(shard, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.pending_dir, f"{name}.json"))
+
+    def claim(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Забирає наступне завдання або повертає None, якщо черга порожня."""
+        for filename in sorted(os.listdir(self.pending_dir)):
+            if not filename.endswith('.json'):
+                continue
+            claimed_path = os.path.join(self.claimed_dir, filename)
+            try:
+                os.rename(os.path.join(self.pending_dir, filename), claimed_path)
+            except FileNotFoundError:
+                continue  # Інший воркер встиг першим
+            os.utime(claimed_path)
+            with open(claimed_path, 'r', encoding='utf-8') as f:
+                return filename[:-len('.json')], json.load(f)
+        return None
+
+    def heartbeat(self, name: str):
+        try:
+            os.utime(os.path.join(self.claimed_dir, f"{name}.json"))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, name: str, results_path: str, stats: Dict[str, Any]):
+        """Переносить результати в done/ і тільки потім пише статистику (ознаку завершення)."""
+        os.replace(results_path, os.path.join(self.done_dir, f"{name}.jsonl"))
+        tmp_path = os.path.join(self.done_dir, f"{name}.stats.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, os.path.join(self.done_dir, f"{name}.stats.json"))
+        try:
+            os.remove(os.path.join(self.claimed_dir, f"{name}.json"))
+        except FileNotFoundError:
+            pass
+
+    def fail(self, name: str, error: str):
+        """Переносить шард у failed/ і тільки потім пише текст помилки (ознаку невдачі)."""
+        try:
+            os.replace(os.path.join(self.claimed_dir, f"{name}.json"), os.path.join(self.failed_dir, f"{name}.json"))
+        except FileNotFoundError:
+            pass
+        tmp_path = os.path.join(self.failed_dir, f"{name}.error.txt.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(error)
+        os.replace(tmp_path, os.path.join(self.failed_dir, f"{name}.error.txt"))
+
+    def failure(self, name: str) -> Optional[str]:
+        """Текст помилки шарду, якщо він впав (None - не впав або ще виконується)."""
+        try:
+            with open(os.path.join(self.failed_dir, f"{name}.error.txt"), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, name: str):
+        """Прибирає результати шарду після того, як координатор їх звів."""
+        for suffix in (".jsonl", ".stats.json"):
+            try:
+                os.remove(os.path.join(self.done_dir, f"{name}{suffix}"))
+            except FileNotFoundError:
+                pass
+
+    def results_path(self, name: str) -> str:
+        return os.path.join(self.done_dir, f"{name}.jsonl")
+
+    def stats(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.done_dir, f"{name}.stats.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def requeue_stale(self, lease_seconds: float, max_attempts: int = MAX_SHARD_ATTEMPTS) -> List[str]:
+        """
+        Повертає в pending/ завдання воркерів, які перестали подавати "пульс" (воркер впав).
+        Спроби рахуються у файлі шарду: після max_attempts шард переноситься у failed/,
+        інакше шард, що валить увесь процес воркера, ходив би по колу безкінечно.
+        """
+        requeued = []
+        now = time.time()
+        for filename in os.listdir(self.claimed_dir):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(self.claimed_dir, filename)
+            try:
+                if now - os.path.getmtime(path) <= lease_seconds:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    shard = json.load(f)
+            except FileNotFoundError:
+                continue
+            name = filename[:-len('.json')]
+            shard['attempts'] = shard.get('attempts', 0) + 1
+            if shard['attempts'] >= max_attempts:
+                self.fail(name, f"Воркер зник, не завершивши шард (спроб: {shard['attempts']})\n")
+                continue
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(shard, f, ensure_ascii=False)
+            try:
+                os.rename(path, os.path.join(self.pending_dir, filename))
+                requeued.append(filename)
+            except FileNotFoundError:
+                continue
+        return requeued
+
+
+def run_worker(queue_dir: str, exit_when_empty: bool = False, poll_interval: float = 1.0,
+               heartbeat_interval: float = 10.0):
+    """Цикл воркера: забирає шарди з черги, виконує їх і кладе результати в done/."""
+    queue = DirectoryWorkQueue(queue_dir)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    while True:
+        task = queue.claim()
+        if task is None:
+            if exit_when_empty:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        name, shard = task
+        print(f"[{worker_id}] Виконую шард {name} ({sum(len(p['tests']) for p in shard['plans'])} тестів)...")
+        # Пульс з окремого потоку: поки шард виконується, координатор не вважає воркера мертвим
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(heartbeat_interval):
+                queue.heartbeat(name)
+
+        heart = threading.Thread(target=beat, daemon=True)
+        heart.start()
+        results_path = os.path.join(queue.done_dir, f"{name}.{uuid.uuid4().hex}.jsonl.part")
+        try:
+            stats = run_shard(shard, results_path)
+        except Exception:
+            # Помилка в даних плану чи недоступна ціль: шард не повертається в чергу (він упав би
+            # і в наступного воркера), а йде у failed/ з traceback - координатор про нього повідомить
+            error = traceback.format_exc()
+            queue.fail(name, error)
+            if os.path.exists(results_path):
+                os.remove(results_path)
+            print(f"[{worker_id}] ❗️ Шард {name} завершився помилкою (перенесено у failed/):\n{error}")
+            continue
+        finally:
+            stop.set()
+            heart.join()
+        queue.complete(name, results_path, stats)
+        print(f"[{worker_id}] Шард {name} виконано: {stats['results']} тестів, {stats['findings']} знахідок.")
+
+
+class ScanCoordinator:
+    """
+    Координатор розподіленого сканування.
+    Ділить плани атак на шарди, роздає їх воркерам і зводить їхні
+    результати та знахідки APIAnalyzer в один JSONL (через on_record).
+      backend="process" - локальний ProcessPoolExecutor (по процесу на шард);
+      backend="queue"   - черга в папці queue_dir: шарди забирають воркери
+                          (python -m tester.coordinator --queue-dir ...) на будь-якій машині,
+                          яка бачить цю папку; local_workers - скільки таких воркерів
+                          запустити тут же (локальна заміна віддалених машин).
+    Кожен воркер має власні ліміти паралельності (concurrency - на воркер).
+    Шард, що впав, не зупиняє решту: run() повертає його в stats["failed_shards"]
+    ({"shard", "error"}), а його результати не зводяться.
+    """
+
+    def __init__(self,
+                 config: Dict[str, Any],
+                 shards: int,
+                 backend: str = "process",
+                 work_dir: str = "results",
+                 queue_dir: Optional[str] = None,
+                 local_workers: Optional[int] = None,
+                 lease_seconds: float = 300.0,
+                 on_record: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.config = config
+        self.shards = max(1, shards)
+        self.backend = backend
+        self.work_dir = work_dir
+        self.queue_dir = queue_dir
+        # За замовчуванням - стільки локальних воркерів, скільки шардів
+        self.local_workers = self.shards if local_workers is None else local_workers
+        self.lease_seconds = lease_seconds
+        self.on_record = on_record
+
+    def _merge(self, results_path: str):
+        """Передає записи шарду (result, finding) далі по одному, без завантаження файлу в пам'ять."""
+        for record in read_records(results_path):
+            if self.on_record and record['type'] in ('result', 'finding', 'skipped'):
+                self.on_record(record)
+
+    def _run_processes(self, shards: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        shard_dir = os.path.join(self.work_dir, f"shards_{uuid.uuid4().hex[:8]}")
+        os.makedirs(shard_dir, exist_ok=True)
+        all_stats, failed = [], []
+        try:
+            # spawn: чистий процес без потоків і event loop батьківського
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+                futures = {pool.submit(run_shard, shard, os.path.join(shard_dir, f"shard_{shard['shard_id']}.jsonl")):
+                           shard for shard in shards}
+                # Зводимо шарди в порядку завершення
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    try:
+                        all_stats.append(future.result())
+                    except Exception as exc:
+                        self._report_failure(failed, f"shard_{shard['shard_id']}",
+                                             "".join(traceback.format_exception(exc)))
+                        continue
+                    self._merge(os.path.join(shard_dir, f"shard_{shard['shard_id']}.jsonl"))
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        return all_stats, failed
+
+    @staticmethod
+    def _report_failure(failed: List[Dict[str, Any]], name: str, error: str):
+        failed.append({"shard": name, "error": error})
+        print(f"  > ❗️ Шард {name} завершився помилкою, його результати не враховано:\n{error}")
+
+    def _spawn_worker(self) -> subprocess.Popen:
+        env = dict(os.environ, PYTHONPATH=PROJECT_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        return subprocess.Popen([sys.executable, "-m", "tester.coordinator",
+                                 "--queue-dir", self.queue_dir, "--exit-when-empty"], env=env)
+
+    def _run_queue(self, shards: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        queue = DirectoryWorkQueue(self.queue_dir)
+        scan_id = uuid.uuid4().hex[:8]
+        names = [f"{scan_id}_shard_{shard['shard_id']}" for shard in shards]
+        for name, shard in zip(names, shards):
+            queue.submit(name, shard)
+
+        # Локальні воркери - окремі процеси, як і на інших машинах
+        workers = [self._spawn_worker() for _ in range(self.local_workers)]
+        all_stats, failed = [], []
+        remaining = list(names)
+        try:
+            while remaining:
+                for name in list(remaining):
+                    stats = queue.stats(name)
+                    if stats is not None:
+                        all_stats.append(stats)
+                        self._merge(queue.results_path(name))
+                        queue.remove(name)
+                        remaining.remove(name)
+                        continue
+                    error = queue.failure(name)
+                    if error is not None:
+                        # Шард і traceback лишаються у failed/ для розбору
+                        self._report_failure(failed, name, error)
+                        remaining.remove(name)
+                if remaining:
+                    for filename in queue.requeue_stale(self.lease_seconds):
+                        print(f"  > Воркер шарду {filename} не відповідає, шард повернуто в чергу.")
+                        # Локальні воркери могли вже завершитись - запускаємо ще одного
+                        if self.local_workers:
+                            workers.append(self._spawn_worker())
+                    time.sleep(0.5)
+        finally:
+            for worker in workers:
+                worker.wait()
+        return all_stats, failed
+
+    def run(self, plans: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Виконує всі плани і повертає зведену статистику."""
+        started_at = time.perf_counter()
+        shards = [{"shard_id": i, "config": self.config, "plans": bucket}
+                  for i, bucket in enumerate(split_into_shards(plans, self.shards))]
+        if self.backend == "queue":
+            all_stats, failed = self._run_queue(shards)
+        else:
+            all_stats, failed = self._run_processes(shards)
+        stats = merge_stats(all_stats)
+        stats["shards"] = len(shards)
+        stats["failed_shards"] = failed
+        stats["elapsed_seconds"] = time.perf_counter() - started_at
+        return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Воркер розподіленого сканування")
+    arg_parser.add_argument("--queue-dir", required=True, help="Папка черги (спільна з координатором)")
+    arg_parser.add_argument("--exit-when-empty", action="store_true",
+                            help="Завершитись, коли в черзі не лишилось завдань")
+    args = arg_parser.parse_args()
+    run_worker(args.queue_dir, exit_when_empty=args.exit_when_empty)
+
+
+if __name__ == "__main__":
+    main()
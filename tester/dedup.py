@@ -0,0 +1,101 @@
+# Цей файл знаходиться в: tester/dedup.py
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Tuple
+from urllib.parse import quote
+
+import httpx
+
+
+def fill_path_param(path: str, param_name: str, payload: Any) -> str:
+    """
+    Підставляє payload у параметр шляху, закодувавши його повністю (quote з safe=""):
+    '?' і '#' з payload інакше обрізали б шлях, а пробіли та лапки httpx кодував би по-своєму.
+    Ціль декодує параметр назад. '/' не рятує і кодування - сервери декодують %2F до
+    маршрутизації, тому шаблони не підставляють такі payload у параметри (tester/templates.py).
+    """
+    return path.replace(f"{{{param_name}}}", quote(str(payload), safe=""))
+
+
+def canonical_request(base_url: str, request_args: Dict[str, Any], timing_probe: bool = False) -> str:
+    """
+    Канонічний вигляд запиту, який реально піде в мережу:
+    метод, URL після підстановки payload і кодування (як його закодує httpx)
+    та JSON-тіло з відсортованими ключами.
+    Time-based атаки не змішуємо зі звичайними тестами: вони виконуються
+    в окремій смузі і з повторною перевіркою затримки (див. tester/scheduler.py).
+    """
+    path = request_args['path']
+    if request_args['param_name'] and request_args['url_param_payload'] is not None:
+        path = fill_path_param(path, request_args['param_name'], request_args['url_param_payload'])
+    try:
+        url = str(httpx.URL(base_url + path))
+    except httpx.InvalidURL:
+        url = base_url + path
+    body = request_args['json_payload']
+    body_text = "" if body is None else json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f"{'timing' if timing_probe else 'fast'}\n{request_args['method'].upper()}\n{url}\n{body_text}"
+
+
+class RequestDeduplicator:
+    """
+    Дедуплікація запитів у межах сканування.
+    Кожен унікальний (канонічний) запит надсилається один раз: тести з тим самим
+    запитом, що прийшли поки він виконується, чекають на його результат, а ті, що
+    прийшли пізніше, отримують збережений результат. Зберігається не більше
+    max_results останніх результатів (тіла відповідей займають пам'ять),
+    тож дублікати, розділені великою кількістю інших запитів, будуть надіслані знову.
+    Створюється всередині event loop (див. AsyncAPIExecutor.__aenter__).
+    """
+
+    def __init__(self, max_results: int = 2048):
+        self.max_results = max(0, max_results)
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.stats = {"unique": 0, "saved": 0}
+
+    @staticmethod
+    def make_key(canonical: str) -> str:
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        if not self.max_results:
+            return
+        self._results[key] = result
+        if len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    async def run(self, key: str, send: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """Повертає (результат, чи він спільний з іншим тестом)."""
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.stats["saved"] += 1
+            return result, True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.stats["saved"] += 1
+            # shield: скасування одного з тестів, що чекають, не скасовує сам запит
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        self.stats["unique"] += 1
+        try:
+            result = await send()
+        except BaseException as e:
+            del self._pending[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Помилку отримає той, хто чекає; без них - не логуємо її
+            raise
+        del self._pending[key]
+        future.set_result(result)
+        self._remember(key, result)
+        return result, False
@@ -1,8 +1,80 @@
 # Цей файл знаходиться в: tester/executor.py
 
+import asyncio
+import httpx
 import requests
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional
+
+from tester.dedup import RequestDeduplicator, canonical_request, fill_path_param
+from tester.metrics import METRICS
+from tester.pruning import TestPruner
+from tester.report import DEFAULT_MAX_BODY_BYTES
+from tester.scheduler import TimingScheduler, build_benign_test, is_time_based_probe
+from tester.throttle import AdaptiveLimiter, THROTTLE_STATUSES, parse_retry_after
+from tester.transport import HTTPTransport
+
+
+class ExecutionResult(dict):
+    """
+    Результат тесту у звичному форматі dict (status_code, body, time_seconds, error).
+    Тіло зберігається як bytes (raw_body, не більше max_body_bytes) і декодується
+    в рядок тільки при першому зверненні до result['body'] - тобто лише тоді,
+    коли правило аналізатора справді дивиться на тіло.
+    """
+
+    def __init__(self, status_code: int, raw_body: bytes, time_seconds: float,
+                 truncated: bool = False, encoding: Optional[str] = None):
+        super().__init__(status_code=status_code, time_seconds=time_seconds,
+                         error=None, body_truncated=truncated)
+        self.raw_body = raw_body
+        self.encoding = encoding or 'utf-8'
+
+    def __missing__(self, key):
+        if key != 'body':
+            raise KeyError(key)
+        body = self.raw_body.decode(self.encoding, errors='replace')
+        self['body'] = body
+        return body
+
+    def __contains__(self, key):
+        return key == 'body' or super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key == 'body':
+            return self['body']
+        return super().get(key, default)
+
+
+def build_request_args(endpoint: Dict[str, Any], test: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Перетворює пару (ендпоінт, тест-кейс) на аргументи для execute_test.
+    Якщо тест-кейс вказує параметр шляху ('param') - payload йде в нього
+    (а тіло, якщо воно потрібне, заповнюється безпечними значеннями).
+    Інакше, якщо є тіло запиту - payload йде у JSON, інакше - у перший параметр шляху.
+    """
+    json_payload = None
+    url_param_payload = None
+    param_name = None
+    if test.get('param'):
+        url_param_payload = str(test['payload'])
+        param_name = test['param']
+        if endpoint['requestBodySchema']:
+            json_payload = build_benign_test(endpoint)['payload']
+    elif endpoint['requestBodySchema']:
+        json_payload = test['payload']
+    elif endpoint['parameters']:
+        url_param_payload = str(test['payload'])
+        param_name = endpoint['parameters'][0]['name']
+
+    return {
+        "method": endpoint['method'],
+        "path": endpoint['path'],
+        "json_payload": json_payload,
+        "url_param_payload": url_param_payload,
+        "param_name": param_name,
+    }
+
 
 class APIExecutor:
     """
@@ -11,10 +83,11 @@ class APIExecutor:
     та вимірює час відповіді.
     """
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
         # Нормалізуємо URL (видаляємо / в кінці, якщо є)
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        self.max_body_bytes = max_body_bytes
         
         # ВАЖЛИВО: Встановимо таймаут 10 секунд.
         # Це довше, ніж атака SLEEP(5), але захистить від "зависання"
@@ -34,9 +107,9 @@ class APIExecutor:
         full_url = self.base_url + path
         
         # 2. Підставляємо payload в URL, якщо це атака на параметр шляху
-        # (напр., /items/{item_id} -> /items/1' OR 1=1)
+        # (напр., /items/{item_id} -> /items/1%27%20OR%201%3D1)
         if param_name and url_param_payload is not None:
-            full_url = self.base_url + path.replace(f"{{{param_name}}}", str(url_param_payload))
+            full_url = self.base_url + fill_path_param(path, param_name, url_param_payload)
 
         # 3. Вимірюємо час
         start_time = time.time()
@@ -47,18 +120,24 @@ class APIExecutor:
                 method=method,
                 url=full_url,
                 json=json_payload,  # 'json=' автоматично ставить правильний Content-Type
-                timeout=self.default_timeout 
+                timeout=self.default_timeout,
+                stream=True # Читаємо тіло частинами і зупиняємось на max_body_bytes
             )
+
+            raw_body = bytearray()
+            truncated = False
+            with response:
+                for chunk in response.iter_content(chunk_size=8192):
+                    raw_body += chunk
+                    if len(raw_body) >= self.max_body_bytes:
+                        truncated = True
+                        break
             
             response_time = time.time() - start_time
             
             # 5. Повертаємо чистий результат
-            return {
-                "status_code": response.status_code,
-                "body": response.text,
-                "time_seconds": response_time,
-                "error": None
-            }
+            return ExecutionResult(response.status_code, bytes(raw_body[:self.max_body_bytes]),
+                                   response_time, truncated=truncated, encoding=response.encoding)
 
         except requests.exceptions.Timeout as e:
             # Атака тривала довше, ніж наш таймаут
@@ -78,4 +157,249 @@ class APIExecutor:
                 "body": str(e),
                 "time_seconds": response_time,
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+
+
+class AsyncAPIExecutor:
+    """
+    Модуль 3 (асинхронна версія): Виконавець.
+    Надсилає тести паралельно через спільний пул keep-alive з'єднань,
+    обмежуючи загальну кількість одночасних запитів та кількість
+    одночасних запитів до одного ендпоінта.
+    Всередині цих жорстких меж кількість запитів у польоті підлаштовується
+    під можливості цілі (див. tester/throttle.py).
+    Транспорт змінний (див. tester/transport.py): мережа (за замовчуванням)
+    або ASGI-застосунок прямо в процесі.
+    Повертає результати у тому ж форматі, що й APIExecutor.
+    """
+
+    def __init__(self, base_url: str, concurrency: int = 10, per_endpoint_concurrency: int = 4,
+                 isolate_timing: bool = True, latency_profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES, deduplicate: bool = True,
+                 dedup_cache_size: int = 2048, adaptive: bool = True, min_concurrency: int = 1,
+                 max_retry_after: float = 60.0, throttle_retries: int = 2,
+                 on_limit_decision: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 pruner: Optional[TestPruner] = None, transport=None):
+        self.base_url = base_url.rstrip('/')
+        self.default_timeout = 10
+        self.max_body_bytes = max_body_bytes
+        # Профілі затримок від LatencyProfiler: таймаут і поріг для кожного ендпоінта
+        self.latency_profiles = latency_profiles or {}
+        self.concurrency = max(1, concurrency)
+        # Ліміт на ендпоінт не може бути більшим за загальний
+        self.per_endpoint_concurrency = max(1, min(per_endpoint_concurrency, self.concurrency))
+        # Окрема смуга для time-based атак (див. tester/scheduler.py)
+        self.isolate_timing = isolate_timing
+        self.scheduler: Optional[TimingScheduler] = None
+        # Однакові запити з різних тестів надсилаємо один раз (див. tester/dedup.py)
+        self.deduplicate = deduplicate
+        self.dedup_cache_size = dedup_cache_size
+        self.dedup: Optional[RequestDeduplicator] = None
+        # Адаптивний ліміт на хост цілі: --concurrency - його стеля, min_concurrency - підлога
+        self.adaptive = adaptive
+        self.min_concurrency = min_concurrency
+        self.max_retry_after = max_retry_after
+        # Скільки разів повторювати запит, на який ціль відповіла 429/503 (тест не губиться)
+        self.throttle_retries = throttle_retries if adaptive else 0
+        self.on_limit_decision = on_limit_decision
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self.host = httpx.URL(self.base_url).host
+        # Безнадійні тести (див. tester/pruning.py) не надсилаються; None - надсилати все
+        self.pruner = pruner
+        self.transport = transport or HTTPTransport()
+
+        # Створюються всередині event loop (див. __aenter__)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        # Пул з'єднань розміром з глобальний ліміт: кожен активний запит
+        # отримує своє keep-alive з'єднання і не відкриває нове.
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        self._client = httpx.AsyncClient(transport=await self.transport.open(limits), timeout=self.default_timeout)
+        self._global_limit = asyncio.Semaphore(self.concurrency)
+        self._endpoint_limits = {}
+        if self.isolate_timing:
+            self.scheduler = TimingScheduler(self)
+        if self.deduplicate:
+            self.dedup = RequestDeduplicator(self.dedup_cache_size)
+        if self.adaptive:
+            self.limiter = AdaptiveLimiter(self.concurrency, min_limit=self.min_concurrency,
+                                           max_pause=self.max_retry_after, on_decision=self._limit_decision)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.aclose()
+        self._client = None
+        await self.transport.close()
+
+    def timeout_for(self, method: str, path: str) -> float:
+        profile = self.latency_profiles.get(f"[{method}] {path}")
+        return profile['timeout'] if profile else self.default_timeout
+
+    def threshold_for(self, method: str, path: str) -> Optional[float]:
+        profile = self.latency_profiles.get(f"[{method}] {path}")
+        return profile['threshold'] if profile else None
+
+    def _endpoint_limit(self, method: str, path: str) -> asyncio.Semaphore:
+        key = f"[{method}] {path}"
+        if key not in self._endpoint_limits:
+            self._endpoint_limits[key] = asyncio.Semaphore(self.per_endpoint_concurrency)
+        return self._endpoint_limits[key]
+
+    def _limit_decision(self, decision: Dict[str, Any]):
+        METRICS.inc("rate_limit_decisions_total", host=self.host, decision=decision['decision'])
+        if self.on_limit_decision:
+            self.on_limit_decision({**decision, "host": self.host})
+
+    @staticmethod
+    def _record(method: str, path: str, elapsed: float, status_code: Optional[int] = None,
+                error: Optional[str] = None):
+        """Метрики запиту (тест, розігрів або повторна перевірка): спан http_request, статуси та помилки."""
+        endpoint = f"[{method}] {path}"
+        METRICS.inc("http_requests_total", endpoint=endpoint)
+        METRICS.record_span("http_request", elapsed, endpoint=endpoint)
+        if error:
+            METRICS.inc("http_errors_total", kind=error)
+        else:
+            METRICS.inc("http_responses_total", status_class=f"{status_code // 100}xx")
+
+    async def execute_test(self,
+                           method: str,
+                           path: str,
+                           json_payload: Optional[Dict] = None,
+                           url_param_payload: Optional[str] = None,
+                           param_name: Optional[str] = None,
+                           latency_sample: bool = True) -> Dict[str, Any]:
+        """
+        Виконує один тест-кейс з урахуванням лімітів паралельності.
+        latency_sample=False - затримка запиту не є сигналом перевантаження
+        (time-based атаки повільні навмисно).
+        """
+        full_url = self.base_url + path
+        if param_name and url_param_payload is not None:
+            full_url = self.base_url + fill_path_param(path, param_name, url_param_payload)
+        timeout = self.timeout_for(method, path)
+
+        for attempt in range(self.throttle_retries + 1):
+            async with self._endpoint_limit(method, path), self._global_limit:
+                result, retry_after = await self._send_once(method, path, full_url, json_payload,
+                                                            timeout, latency_sample)
+            if result['status_code'] not in THROTTLE_STATUSES or attempt == self.throttle_retries:
+                return result
+            # Ціль просить пригальмувати: ліміт уже зменшено, повторюємо після паузи
+            self.limiter.stats["retries"] += 1
+            METRICS.inc("rate_limit_retries_total", host=self.host)
+            if retry_after is None:
+                await asyncio.sleep(min(2 ** attempt * 0.5, self.max_retry_after))
+        return result
+
+    async def _send_once(self, method: str, path: str, full_url: str, json_payload: Optional[Dict],
+                         timeout: float, latency_sample: bool):
+        """Один запит у слоті адаптивного ліміту. Повертає (результат, Retry-After у секундах)."""
+        if self.limiter:
+            await self.limiter.acquire()
+        # Час міряємо тільки після отримання слота, щоб черга
+        # всередині тестувальника не додавалась до часу відповіді
+        start_time = time.perf_counter()
+        status_code, error, retry_after = None, None, None
+        try:
+            async with self._client.stream(method, full_url, json=json_payload, timeout=timeout) as response:
+                raw_body = bytearray()
+                truncated = False
+                async for chunk in response.aiter_bytes():
+                    raw_body += chunk
+                    if len(raw_body) >= self.max_body_bytes:
+                        # Решту тіла не читаємо: з'єднання закриється разом з response
+                        truncated = True
+                        break
+                elapsed = time.perf_counter() - start_time
+                status_code = response.status_code
+                retry_after = parse_retry_after(response.headers.get('retry-after'))
+                self._record(method, path, elapsed, status_code)
+                return ExecutionResult(status_code, bytes(raw_body[:self.max_body_bytes]),
+                                       elapsed, truncated=truncated, encoding=response.encoding), retry_after
+
+        except httpx.TimeoutException as e:
+            error = "timeout"
+            self._record(method, path, time.perf_counter() - start_time, error=error)
+            return {
+                "status_code": 408, # Request Timeout
+                "body": f"Запит перевищив таймаут {timeout:.1f}s: {e}",
+                "time_seconds": time.perf_counter() - start_time,
+                "error": "Timeout"
+            }, None
+
+        except httpx.HTTPError as e:
+            error = "connection"
+            self._record(method, path, time.perf_counter() - start_time, error=error)
+            return {
+                "status_code": -1, # Наш код для помилки з'єднання
+                "body": str(e),
+                "time_seconds": time.perf_counter() - start_time,
+                "error": str(e)
+            }, None
+
+        finally:
+            if self.limiter:
+                # Таймаут time-based атаки - теж не ознака перевантаження
+                await self.limiter.release(time.perf_counter() - start_time, status_code,
+                                           error if latency_sample else None, retry_after, latency_sample)
+
+    def baseline_request_args(self, endpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """Аргументи для нешкідливого запиту до ендпоінта (базова лінія часу)."""
+        return build_request_args(endpoint, build_benign_test(endpoint))
+
+    async def run_test(self, endpoint: Dict[str, Any], test: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Виконує тест-кейс з плану і повертає запис {endpoint, test, result}.
+        Пропущений тест: result = None, а в 'skipped' - причина.
+        """
+        request_args = build_request_args(endpoint, test)
+        if self.pruner:
+            skip = self.pruner.check(endpoint, test, request_args)
+            if skip:
+                kind, reason = skip
+                METRICS.inc("tests_skipped_total", reason=kind)
+                return {"endpoint": endpoint, "test": test, "result": None, "skipped": reason}
+
+        if self.dedup:
+            key = RequestDeduplicator.make_key(
+                canonical_request(self.base_url, request_args, timing_probe=is_time_based_probe(test)))
+            result, shared = await self.dedup.run(key, lambda: self._send(endpoint, test, request_args))
+        else:
+            result, shared = await self._send(endpoint, test, request_args), False
+
+        entry = {"endpoint": endpoint, "test": test, "result": result}
+        if shared:
+            # Результат отримано від іншого тесту з таким самим запитом
+            entry["deduplicated"] = True
+            METRICS.inc("requests_deduplicated_total")
+        elif self.pruner:
+            self.pruner.observe(endpoint, test, request_args, result)
+        return entry
+
+    async def _send(self, endpoint: Dict[str, Any], test: Dict[str, Any],
+                    request_args: Dict[str, Any]) -> Dict[str, Any]:
+        if self.scheduler:
+            return await self.scheduler.run_test(endpoint, test, request_args)
+        return await self.execute_test(**request_args, latency_sample=not is_time_based_probe(test))
+
+    async def run_plans(self, test_plans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Запускає всі тести з усіх планів одночасно (в межах лімітів).
+        Порядок результатів збігається з порядком тестів у планах.
+        """
+        async with self:
+            tasks = [self.run_test(plan['endpoint'], test)
+                     for plan in test_plans
+                     for test in plan['tests']]
+            return await asyncio.gather(*tasks)
+
+    def execute_plans(self, test_plans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Синхронна обгортка над run_plans для виклику з run_tester.
+        """
+        return asyncio.run(self.run_plans(test_plans))
@@ -1,79 +1,73 @@
-import google.generativeai as genai
 import os
 import json
-from dotenv import load_dotenv
-from typing import Dict, Any, List, Optional
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from tester.cache import GenerationCache
+from tester.rules import ensure_classified
+from tester.llm import MODEL_NAME, LLMClient, GeminiClient, QuotaExceededError, TokenBucket
+from tester.metrics import METRICS
+from tester.prompts import build_prompt, has_attack_surface
+
+# Промпти, коротші за цей розмір, можна пакувати по кілька в один запит
+SMALL_PROMPT_CHARS = 4000
 
 class AttackGenerator:
-    def __init__(self):
-        load_dotenv()
-        api_key = os.getenv("GOOGLE_API_KEY")
-
-        if not api_key:
-            print("Помилка: Не знайдено GOOGLE_API_KEY у .env файлі.")
-            print("Будь ласка, створіть .env та додайте ключ з Google AI Studio.")
-            exit(1)
-        
-        try:
-            genai.configure(api_key=api_key)
-            #Ініціалізуємо модель
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-            print("Модель Gemini 2.5 Flash успішно ініціалізована.")
-        except Exception as e:
-            print(f"Помилка ініціалізації Gemini: {e}")
-            exit(1)
+    def __init__(self,
+                 cache: Optional[GenerationCache] = None,
+                 client: Optional[LLMClient] = None,
+                 workers: int = 1,
+                 requests_per_minute: Optional[float] = None,
+                 max_retries: int = 5,
+                 batch_size: int = 1):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.rate_limiter = TokenBucket(requests_per_minute)
+        self.max_retries = max_retries
+        # Скільки малих ендпоінтів пакувати в один промпт (1 - без пакетів)
+        self.batch_size = max(1, batch_size)
+
+        # Клієнт Gemini (і перевірку ключа) створюємо тільки при першому промаху кешу:
+        # якщо всі тест-кейси є в кеші, ні SDK, ні GOOGLE_API_KEY не потрібні
+        self._client = client
+        self.api_key = None
+
+    @property
+    def client(self) -> LLMClient:
+        if self._client is None:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            self.api_key = os.getenv("GOOGLE_API_KEY")
+            if not self.api_key:
+                print("Помилка: Не знайдено GOOGLE_API_KEY у .env файлі.")
+                print("Будь ласка, створіть .env та додайте ключ з Google AI Studio.")
+                exit(1)
+            try:
+                self._client = GeminiClient(api_key=self.api_key)
+                print("Модель Gemini 2.5 Flash успішно ініціалізована.")
+            except Exception as e:
+                print(f"Помилка ініціалізації Gemini: {e}")
+                exit(1)
+        return self._client
+
+    @property
+    def model_name(self) -> str:
+        return self._client.model_name if self._client else MODEL_NAME
 
     def _create_prompt(self, endpoint_data: Dict[str, Any]) -> Optional[str]:
         """
-        Приватний метод для створення "промпту" (запиту) до LLM.
-        ОНОВЛЕНА ВЕРСІЯ: Забороняє деструктивні атаки.
+        Промпт до LLM для одного ендпоінта (див. tester/prompts.py): компактна схема
+        лише з рядковими полями. Забороняє деструктивні атаки.
+        None - в ендпоінті немає чого атакувати (напр. GET /).
         """
-        method = endpoint_data['method']
-        path = endpoint_data['path']
-        schema = endpoint_data.get('requestBodySchema')
-        params = endpoint_data.get('parameters')
-
-        # Базовий шаблон промпту
-        base_prompt = (
-            "Ти — етичний експерт з тестування безпеки API (пентестер)."
-            "Твоє завдання — згенерувати 5 прикладів тест-кейсів для *виявлення* вразливостей на"
-            f"ендпоінті: [{method}] {path}\n"
-            "Сконцентруйся на не-деструктивних атаках: XSS (Cross-Site Scripting) та SQL Injection (тільки 'read-only' та 'time-based', наприклад, `SLEEP` або `' OR 1=1`).\n"
-            "**КАТЕГОРИЧНО ЗАБОРОНЕНО** генерувати деструктивні команди, що змінюють дані, такі як `DROP TABLE`, `DELETE FROM`, `UPDATE`, `INSERT INTO`.\n"
-        )
-
-        # 1. Якщо є тіло запиту (POST, PUT, PATCH)
-        if schema:
-            schema_json = json.dumps(schema, indent=4)
-            base_prompt += (
-                f"Ендпоінт очікує тіло запиту у форматі JSON, що відповідає цій схемі:\n"
-                f"```json\n{schema_json}\n```\n"
-                "Знайди всі поля типу 'string' у схемі та згенеруй JSON-об'єкти для 'payload', "
-                "які намагаються експлуатувати XSS або не-деструктивні SQLi у цих полях.\n"
-                "Формат відповіді: JSON-список об'єктів. Кожен об'єкт: "
-                "{'description': 'Опис атаки (напр., XSS в полі title)', 'payload': {...сам JSON...}}\n"
-            )
-            return base_prompt
-
-        # 2. Якщо є параметри в URL (GET, DELETE)
-        if params:
-            param_names = [p.get('name') for p in params if p.get('in') == 'path']
-            if not param_names:
-                return None # Немає параметрів для атаки
-                
-            base_prompt += (
-                f"Ендпоінт приймає параметри в URL: {param_names}.\n"
-                "Згенеруй рядкові значення для 'payload', "
-                "які намагаються експлуатувати не-деструктивні SQL Injection у цих параметрах.\n"
-                "Формат відповіді: JSON-список об'єктів. Кожен об'єкт: "
-                "{'description': 'Опис атаки (напр., Time-based SQLi в item_id)', 'payload': '...сам рядок для параметра...'}\n"
-            )
-            return base_prompt
-
-        # 3. Якщо нічого тестувати (напр. GET /)
-        return None
-    
-    def _parse_llm_response(self, response_text: str) -> List[Dict[str, Any]]:
+        if not has_attack_surface(endpoint_data):
+            return None
+        return build_prompt([endpoint_data])
+
+    def _parse_llm_response(self, response_text: str, expect: type = list) -> Any:
         """
         Приватний метод для очистки та парсингу відповіді від LLM.
         LLM люблять загортати JSON у ```json ... ``` та додавати текст до/після.
@@ -95,18 +89,87 @@ class AttackGenerator:
 
             # 3. Парсимо JSON
             test_cases = json.loads(json_text)
-            if isinstance(test_cases, list):
+            if isinstance(test_cases, expect):
                 return test_cases
             else:
-                print(f"  > Помилка парсингу: LLM повернув не список. Відповідь: {json_text}")
-                return []
+                print(f"  > Помилка парсингу: LLM повернув не {expect.__name__}. Відповідь: {json_text}")
+                return expect()
         
         except json.JSONDecodeError as e:
             # Цей except спрацює, якщо json_text все ще містить вступний текст
             print(f"  > Помилка парсингу: LLM повернув невалідний JSON. Помилка: {e}")
             print(f"  > Отримана відповідь (оригінал): {response_text}")
-            return []
+            return expect()
         
+    @staticmethod
+    def _classify(test_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Класифікуємо тести один раз при генерації, а не при аналізі кожного результату."""
+        for test in test_cases:
+            ensure_classified(test)
+        return test_cases
+
+    def _create_batch_prompt(self, endpoints: List[Dict[str, Any]]) -> str:
+        """
+        Пакує кілька ендпоінтів в один запит до LLM: інструкція і спільні схеми - один раз.
+        Відповідь очікуємо JSON-об'єктом {"[METHOD] path": [...тест-кейси...]}.
+        """
+        return build_prompt(endpoints)
+
+    def _call_llm(self, prompt: str, tasks: int = 1) -> Optional[str]:
+        """
+        Надсилає промпт до LLM з урахуванням ліміту частоти.
+        При перевищенні квоти повторює запит з експоненційною затримкою.
+        Повертає текст відповіді або None, якщо всі спроби невдалі.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            METRICS.inc("llm_requests_total")
+            try:
+                with METRICS.span("llm_request", model=self.model_name):
+                    response = self.client.generate(prompt)
+                METRICS.inc("llm_prompt_tokens_total", response.prompt_tokens or 0)
+                METRICS.inc("llm_response_tokens_total", response.response_tokens or 0)
+                print(f"  > LLM: {tasks} ендп., промпт {len(prompt)} симв. / {response.prompt_tokens} токенів, "
+                      f"відповідь {response.response_tokens} токенів")
+                return response.text
+            except QuotaExceededError as e:
+                METRICS.inc("llm_quota_errors_total")
+                if attempt == self.max_retries:
+                    print(f"  > Квоту LLM вичерпано після {attempt + 1} спроб: {e}")
+                    return None
+                METRICS.inc("llm_retries_total")
+                delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                print(f"  > Квоту LLM перевищено, повтор через {delay:.1f} сек...")
+                time.sleep(delay)
+            except Exception as e:
+                METRICS.inc("llm_errors_total")
+                print(f"  > Помилка під час запиту до LLM: {e}")
+                return None
+        return None
+
+    def _generate_batch(self, tasks: List[Tuple[Dict[str, Any], str, str]]) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Генерує тест-кейси для пакета [(endpoint, prompt, cache_key)] одним запитом.
+        """
+        if len(tasks) == 1:
+            endpoint, prompt, cache_key = tasks[0]
+            response_text = self._call_llm(prompt)
+            test_cases = self._parse_llm_response(response_text) if response_text else []
+            results = [(endpoint, test_cases)]
+        else:
+            batch_prompt = self._create_batch_prompt([ep for ep, _, _ in tasks])
+            response_text = self._call_llm(batch_prompt, tasks=len(tasks))
+            answer = self._parse_llm_response(response_text, expect=dict) if response_text else {}
+            results = [(ep, answer.get(f"[{ep['method']}] {ep['path']}", [])) for ep, _, _ in tasks]
+        results = [(ep, self._classify(test_cases)) for ep, test_cases in results]
+
+        # Порожній список - це помилка генерації чи парсингу, його не кешуємо
+        if self.cache:
+            for (_, _, cache_key), (_, test_cases) in zip(tasks, results):
+                if test_cases:
+                    self.cache.put(cache_key, test_cases)
+        return results
+
     def generate_test_cases_for_endpoint(self, endpoint_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Публічний метод для генерації тест-кейсів для одного ендпоінта.
@@ -117,15 +180,45 @@ class AttackGenerator:
         if prompt is None:
             # Для цього ендпоінта немає чого тестувати
             return []
-        
-        #Відправляємо запит до Gemini
-        try:
-            response = self.model.generate_content(prompt)
-            
-            # 3. Парсимо відповідь
-            test_cases = self._parse_llm_response(response.text)
-            return test_cases
-            
-        except Exception as e:
-            print(f"  > Помилка під час запиту до Gemini API: {e}")
-            return []
\ No newline at end of file
+
+        # Якщо промпт (а отже і ендпоінт) не змінився - беремо тести з кешу
+        cache_key = GenerationCache.make_key(self.model_name, prompt)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._classify(cached)
+
+        return self._generate_batch([(endpoint_data, prompt, cache_key)])[0][1]
+
+    def generate_all(self, endpoints: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Генерує тест-кейси для всіх ендпоінтів паралельно (self.workers потоків).
+        Повертає пари (endpoint, test_cases) у порядку завершення.
+        Ендпоінти з кешу повертаються одразу, малі промпти пакуються по batch_size.
+        """
+        pending = []
+        for endpoint in endpoints:
+            prompt = self._create_prompt(endpoint)
+            if prompt is None:
+                yield endpoint, []
+                continue
+            cache_key = GenerationCache.make_key(self.model_name, prompt)
+            cached = self.cache.get(cache_key) if self.cache else None
+            if cached is not None:
+                yield endpoint, self._classify(cached)
+            else:
+                pending.append((endpoint, prompt, cache_key))
+
+        # Великі промпти йдуть окремо, малі - пакетами
+        batches = [[task] for task in pending if len(task[1]) >= SMALL_PROMPT_CHARS]
+        small = [task for task in pending if len(task[1]) < SMALL_PROMPT_CHARS]
+        batches += [small[i:i + self.batch_size] for i in range(0, len(small), self.batch_size)]
+
+        if batches:
+            # Клієнт (SDK і перевірка ключа) - один раз і в цьому потоці, а не в кожному воркері
+            self.client
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._generate_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                yield from future.result()
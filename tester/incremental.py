@@ -0,0 +1,85 @@
+# Цей файл знаходиться в: tester/incremental.py
+
+import glob
+import hashlib
+import json
+import os
+from typing import List, Dict, Any, Optional
+
+from tester.report import read_records
+from tester.state import ScanState, endpoint_key
+
+
+def operation_fingerprint(endpoint: Dict[str, Any]) -> str:
+    """
+    Відбиток операції: розвʼязані параметри та схема тіла запиту (саме від них залежать атаки).
+    Опис (summary) і теги на відбиток не впливають.
+    """
+    surface = {
+        "method": endpoint['method'],
+        "path": endpoint['path'],
+        "parameters": endpoint.get('parameters', []),
+        "requestBodySchema": endpoint.get('requestBodySchema'),
+    }
+    text = json.dumps(surface, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def find_last_scan(results_dir: str, exclude: Optional[str] = None) -> Optional[str]:
+    """Ідентифікатор останнього завершеного сканування (ідентифікатор - час запуску, тож сортується)."""
+    prefix = os.path.join(results_dir, "scan_state_")
+    scan_ids = sorted((path[len(prefix):-len(".jsonl")] for path in glob.glob(f"{prefix}*.jsonl")), reverse=True)
+    for scan_id in scan_ids:
+        if scan_id == exclude:
+            continue
+        state = ScanState.load(results_dir, scan_id)
+        if state.finished is not None and state.endpoints is not None:
+            return scan_id
+    return None
+
+
+class SpecDiff:
+    """
+    Інкрементальне сканування: порівняння операцій поточної специфікації
+    з ендпоінтами попереднього завершеного сканування (зі scan_state_<id>.jsonl).
+      added     - нові операції;
+      changed   - змінились параметри або схема тіла;
+      unchanged - без змін: не тестуються, їхні знахідки переносяться з попереднього звіту;
+      removed   - операції, яких більше немає (їхні знахідки не переносяться).
+    """
+
+    def __init__(self, previous: List[Dict[str, Any]], current: List[Dict[str, Any]]):
+        before = {endpoint_key(ep): operation_fingerprint(ep) for ep in previous}
+        self.added: List[Dict[str, Any]] = []
+        self.changed: List[Dict[str, Any]] = []
+        self.unchanged: List[Dict[str, Any]] = []
+        for endpoint in current:
+            fingerprint = before.pop(endpoint_key(endpoint), None)
+            if fingerprint is None:
+                self.added.append(endpoint)
+            elif fingerprint != operation_fingerprint(endpoint):
+                self.changed.append(endpoint)
+            else:
+                self.unchanged.append(endpoint)
+        self.removed: List[str] = list(before)
+
+    @property
+    def to_scan(self) -> List[Dict[str, Any]]:
+        return self.added + self.changed
+
+
+def carried_findings(results_dir: str, scan_id: str, unchanged: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Знахідки попереднього сканування для незмінених операцій, позначені як перенесені.
+    Знахідка, яку попереднє сканування саме перенесло, зберігає початкове сканування (carried_from).
+    """
+    keys = {endpoint_key(ep) for ep in unchanged}
+    path = os.path.join(results_dir, f"test_results_{scan_id}.jsonl")
+    if not os.path.isfile(path):
+        return []
+    findings = []
+    for record in read_records(path):
+        if record['type'] == 'finding' and record['endpoint'] in keys:
+            findings.append({**record, "carried_forward": True,
+                             "carried_from": record.get('carried_from') or scan_id})
+    return findings
@@ -0,0 +1,165 @@
+# Цей файл знаходиться в: tester/llm.py
+
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Dict, Any, List, Optional
+
+
+MODEL_NAME = 'gemini-2.5-flash'
+
+
+class QuotaExceededError(Exception):
+    """LLM відхилила запит через ліміт квоти (HTTP 429 / ResourceExhausted)."""
+
+
+class LLMResponse:
+    """Відповідь LLM: текст та (якщо відомо) кількість токенів."""
+
+    def __init__(self, text: str, prompt_tokens: Optional[int] = None, response_tokens: Optional[int] = None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+
+class LLMClient(ABC):
+    """
+    Інтерфейс LLM-клієнта для AttackGenerator.
+    Реалізації: GeminiClient (справжня модель) та FakeLLMClient (офлайн).
+    Клієнт без generate не вдасться навіть створити - помилка буде до сканування, а не посеред нього.
+    """
+    model_name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str) -> LLMResponse:
+        """Надсилає промпт моделі і повертає її відповідь (QuotaExceededError - ліміт квоти)."""
+
+
+class GeminiClient(LLMClient):
+    """Клієнт Google Gemini."""
+
+    def __init__(self, api_key: str, model_name: str = MODEL_NAME):
+        # SDK важкий (~1 сек. на імпорт), тож імпортуємо його тільки тоді, коли справді потрібна модель
+        import google.generativeai as genai
+
+        self.model_name = model_name
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    @staticmethod
+    def _is_quota_error(e: Exception) -> bool:
+        text = str(e).lower()
+        return type(e).__name__ in ('ResourceExhausted', 'TooManyRequests') or '429' in text or 'quota' in text
+
+    def generate(self, prompt: str) -> LLMResponse:
+        try:
+            response = self.model.generate_content(prompt)
+        except Exception as e:
+            if self._is_quota_error(e):
+                raise QuotaExceededError(str(e)) from e
+            raise
+
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            response.text,
+            prompt_tokens=getattr(usage, 'prompt_token_count', None),
+            response_tokens=getattr(usage, 'candidates_token_count', None),
+        )
+
+
+class FakeLLMClient(LLMClient):
+    """
+    Детермінована локальна "модель" для офлайн-тестів і бенчмарків.
+    Читає з промпту завдання і компактні схеми тіл та повертає фіксований набір атак
+    у тому ж форматі, що й справжня модель (у тому числі для пакетних промптів).
+    """
+    model_name = "fake-llm"
+
+    ATTACKS = [
+        ("XSS з тегом script", "<script>alert('xss')</script>"),
+        ("XSS через img onerror", "<img src=x onerror=alert(1)>"),
+        ("Boolean-based SQLi (read-only)", "1 OR 1=1"),
+        ("Error-based SQLi (незакрита лапка)", "1'"),
+        ("Time-based SQLi через SLEEP", "1 AND SLEEP(5)"),
+    ]
+
+    _TASK_SEPARATOR = "### Завдання "
+    _SCHEMAS_HEADER = "Схеми тіл:\n"
+
+    def __init__(self, latency_seconds: float = 0.0):
+        # Штучна затримка, щоб імітувати час відповіді справжньої моделі
+        self.latency_seconds = latency_seconds
+
+    def _schemas(self, prompt: str) -> Dict[str, Dict[str, Any]]:
+        """Компактні схеми тіл з промпту (рядки 'Ім'я={...}', див. tester/prompts.py)."""
+        if self._SCHEMAS_HEADER not in prompt:
+            return {}
+        block = prompt.split(self._SCHEMAS_HEADER, 1)[1].split(self._TASK_SEPARATOR, 1)[0]
+        return {name: json.loads(text) for name, _, text in
+                (line.partition("=") for line in block.splitlines() if "=" in line)}
+
+    def _cases_for(self, task: str, schemas: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        lines = task.splitlines()
+        body = next((schemas.get(line[len("тіло: "):].strip()) for line in lines
+                     if line.startswith("тіло: ")), None)
+        params = next(([param.split(":", 1)[0].strip() for param in line[len("параметри шляху: "):].split(",")]
+                       for line in lines if line.startswith("параметри шляху: ")), [])
+        if not body and not params:
+            return [{"description": desc, "payload": payload} for desc, payload in self.ATTACKS]
+
+        cases = []
+        for field in (body['strings'] if body else []):
+            for desc, payload in self.ATTACKS:
+                cases.append({"description": f"{desc} в полі {field}",
+                              "payload": {**body['base'], field: payload}})
+        for param in params:
+            for desc, payload in self.ATTACKS:
+                cases.append({"description": f"{desc} в параметрі {param}", "param": param, "payload": payload})
+        return cases
+
+    def generate(self, prompt: str) -> LLMResponse:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        schemas = self._schemas(prompt)
+        tasks = prompt.split(self._TASK_SEPARATOR)[1:]
+        if len(tasks) > 1:
+            # Пакетний промпт: відповідаємо об'єктом {"[METHOD] path": [...]}
+            answer: Any = {}
+            for task in tasks:
+                task_id = task.split("\n", 1)[0].strip()
+                answer[task_id] = self._cases_for(task, schemas)
+        else:
+            answer = self._cases_for(tasks[0] if tasks else prompt, schemas)
+
+        text = f"```json\n{json.dumps(answer, ensure_ascii=False)}\n```"
+        return LLMResponse(text, prompt_tokens=len(prompt) // 4, response_tokens=len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Обмежувач частоти запитів "відро з токенами" (потокобезпечний).
+    rate_per_minute=None - без обмежень.
+    """
+
+    def __init__(self, rate_per_minute: Optional[float], burst: int = 1):
+        self.rate = rate_per_minute / 60.0 if rate_per_minute else None
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
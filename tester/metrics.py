@@ -0,0 +1,332 @@
+# Цей файл знаходиться в: tester/metrics.py
+
+import cProfile
+import heapq
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+# Префікс усіх метрик у форматі Prometheus
+METRIC_PREFIX = "security_tester_"
+
+# Межі кошиків гістограм затримок, сек.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Скільки найповільніших спанів тримати для JSON-зведення
+SLOWEST_SPANS = 20
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (key + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+               for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Гістограма з фіксованими кошиками (як у Prometheus) + максимум."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Останній кошик - +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оцінка квантиля: верхня межа кошика, в який він потрапляє (для +Inf - максимум)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"buckets": list(self.buckets), "counts": self.counts, "count": self.count,
+                "sum": self.sum, "max": self.max}
+
+    def merge(self, data: Dict[str, Any]):
+        if tuple(data['buckets']) != self.buckets:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, data['counts'])]
+        self.count += data['count']
+        self.sum += data['sum']
+        self.max = max(self.max, data['max'])
+
+
+class Metrics:
+    """
+    Реєстр метрик сканування (потокобезпечний):
+      - лічильники (надіслані тести, помилки, таймаути, повтори, токени LLM);
+      - гістограми затримок (запити за ендпоінтом, виклики LLM, етапи);
+      - спани: тривалість ділянки коду йде в гістограму <назва>_seconds,
+        а найповільніші спани зберігаються для JSON-зведення;
+      - (опційно) cProfile окремо для кожного етапу - див. enable_profiling.
+    Експорт: текст Prometheus (файл або HTTP /metrics) та JSON-зведення.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        # Мін-купа (тривалість, назва, мітки) - лишаються SLOWEST_SPANS найповільніших
+        self._slowest: List[Tuple[float, str, Labels]] = []
+
+        # Профілювання етапів: назва етапу -> cProfile.Profile
+        self.profiling = False
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        # Стек активних етапів профілювання в кожному потоці
+        self._local = threading.local()
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._slowest = []
+
+    # --- Запис ---
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def record_span(self, name: str, seconds: float, **labels):
+        """Спан, час якого вже виміряно (напр., виконавець міряє запит сам)."""
+        key = (name + "_seconds", _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+            item = (seconds, name, key[1])
+            if len(self._slowest) < SLOWEST_SPANS:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, time.perf_counter() - started, **labels)
+
+    # --- Профілювання етапів ---
+
+    def enable_profiling(self):
+        self.profiling = True
+
+    @contextmanager
+    def profile(self, stage: str):
+        """
+        cProfile для етапу в поточному потоці. Етапи можуть вкладатися
+        (напр., analyze всередині циклу execute): зовнішній профіль
+        призупиняється, поки працює внутрішній, тож час не рахується двічі.
+        """
+        if not self.profiling:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        with self._lock:
+            profiler = self._profiles.setdefault(stage, cProfile.Profile())
+        if stack and stack[-1]:
+            stack[-1].disable()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+: cProfile не можна вмикати одночасно в кількох потоках
+            profiler = None
+        stack.append(profiler)
+        try:
+            yield
+        finally:
+            stack.pop()
+            if profiler:
+                profiler.disable()
+            if stack and stack[-1]:
+                stack[-1].enable()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Етап сканування: спан stage_seconds{stage=...} + (опційно) профіль."""
+        with self.profile(name), self.span("stage", stage=name):
+            yield
+
+    def dump_profiles(self, path_prefix: str) -> List[str]:
+        """Зберігає профілі етапів у <path_prefix>_<етап>.prof (читати: python -m pstats)."""
+        paths = []
+        for stage, profiler in self._profiles.items():
+            path = f"{path_prefix}_{stage}.prof"
+            profiler.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    # --- Експорт ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Стан реєстру у JSON-сумісному вигляді (напр., щоб передати з воркера шарду)."""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), histogram.to_dict()]
+                               for (name, labels), histogram in self.histograms.items()],
+                "slowest": [[seconds, name, list(labels)] for seconds, name, labels in self._slowest],
+            }
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """Додає метрики з іншого процесу (див. snapshot)."""
+        with self._lock:
+            for name, labels, value in snapshot.get('counters', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, data in snapshot.get('histograms', []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(tuple(data['buckets']))
+                histogram.merge(data)
+            for seconds, name, labels in snapshot.get('slowest', []):
+                item = (seconds, name, tuple(tuple(pair) for pair in labels))
+                if len(self._slowest) < SLOWEST_SPANS:
+                    heapq.heappush(self._slowest, item)
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, item)
+
+    def to_prometheus(self) -> str:
+        """Текстовий формат Prometheus / OpenMetrics."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            declared = set()
+            for (name, labels), value in counters:
+                # OpenMetrics: ім'я сімейства лічильника - без '_total', суфікс має лише значення
+                family = METRIC_PREFIX + name.removesuffix("_total")
+                if family not in declared:
+                    declared.add(family)
+                    lines.append(f"# TYPE {family} counter")
+                lines.append(f"{family}_total{_format_labels(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                metric = METRIC_PREFIX + name
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        """Коротке JSON-зведення: лічильники, p50/p95/p99 гістограм і найповільніші спани."""
+        def label_text(labels):
+            return ",".join(f"{key}={value}" for key, value in labels)
+
+        with self._lock:
+            return {
+                "counters": {f"{name}{{{label_text(labels)}}}" if labels else name: value
+                             for (name, labels), value in sorted(self.counters.items())},
+                "histograms": {
+                    f"{name}{{{label_text(labels)}}}" if labels else name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                        "p50": histogram.quantile(0.50),
+                        "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99),
+                        "max": histogram.max,
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0])
+                },
+                "slowest_spans": [{"span": name, "labels": dict(labels), "seconds": seconds}
+                                  for seconds, name, labels in sorted(self._slowest, reverse=True)],
+            }
+
+    def totals(self, histogram_name: str, label: str) -> Dict[str, float]:
+        """Сума гістограми за значенням мітки (напр., сумарний час кожного етапу)."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for (name, labels), histogram in self.histograms.items():
+                if name == histogram_name:
+                    value = dict(labels).get(label, "")
+                    totals[value] = totals.get(value, 0.0) + histogram.sum
+        return totals
+
+    def counter(self, name: str) -> float:
+        """Значення лічильника, просумоване за всіма мітками."""
+        with self._lock:
+            return sum(value for (counter_name, _), value in self.counters.items() if counter_name == name)
+
+    def write(self, prometheus_path: str, json_path: str):
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+# Спільний реєстр процесу (воркери шардів повертають свій snapshot координатору)
+METRICS = Metrics()
+
+
+def serve_metrics(port: int, metrics: Metrics = METRICS) -> ThreadingHTTPServer:
+    """OpenMetrics-ендпоінт http://127.0.0.1:<port>/metrics у фоновому потоці (на час сканування)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = metrics.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Не засмічуємо вивід сканування
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,72 +1,276 @@
 # Цей файл знаходиться в: tester/parser.py
 
+import fnmatch
+import hashlib
 import json
-from typing import List, Dict, Any
+import os
+import pickle
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from urllib.parse import unquote
+
+DEFAULT_PARSE_CACHE_DIR = os.path.join(".cache", "parse")
+
+# Ключі path item, які є HTTP-методами (решта - summary, parameters, servers, ...)
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Змінюється, коли змінюється формат ендпоінтів - старий кеш тоді ігнорується
+_CACHE_VERSION = 2
+
+
+def _file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class APIParser:
     """
     Модуль 1: Парсер.
-    Відповідає за читання openapi.json та вилучення
+    Відповідає за читання openapi.json (або .yaml) та вилучення
     інформації про ендпоінти.
+    Специфікація завантажується лише тоді, коли вона справді потрібна:
+    результат парсингу зберігається у кеші (.cache/parse) з ключем
+    "хеш файлу + mtime", тож повторний запуск на великій специфікації
+    просто читає готовий список ендпоінтів.
     """
-    def __init__(self, filepath: str):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                self.spec = json.load(f)
-        except FileNotFoundError:
+    def __init__(self, filepath: str, cache_dir: Optional[str] = DEFAULT_PARSE_CACHE_DIR):
+        if not os.path.isfile(filepath):
             print(f"Помилка: Файл {filepath} не знайдено.")
             print("Будь ласка, запустіть API та збережіть openapi.json у корінь проєкту.")
             exit(1) # Виходимо з програми, якщо файлу немає
-        except json.JSONDecodeError:
-            print(f"Помилка: Файл {filepath} має неправильний JSON формат.")
-            exit(1)
-            
+
+        self.filepath = filepath
+        # None - без кешу парсингу
+        self.cache_dir = cache_dir
         self.endpoints = []
-        self.schemas = self.spec.get('components', {}).get('schemas', {})
+        self.cache_hit = False
 
-    def _get_schema_from_ref(self, ref_string: str) -> Dict[str, Any]:
+        self._spec = None
+        # Ендпоінти з кешу парсингу (False - ще не читали кеш)
+        self._cached = False
+        # Кеш розвʼязаних $ref: посилання -> розвʼязаний обʼєкт
+        self._resolved: Dict[str, Any] = {}
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """Сама специфікація (JSON або YAML), завантажується при першому зверненні."""
+        if self._spec is None:
+            self._spec = self._load_spec()
+        return self._spec
+
+    @property
+    def schemas(self) -> Dict[str, Any]:
+        return self.spec.get('components', {}).get('schemas', {})
+
+    def _load_spec(self) -> Dict[str, Any]:
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            if self.filepath.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError:
+                    print("Помилка: Для YAML-специфікацій потрібен пакет PyYAML (pip install pyyaml).")
+                    exit(1)
+                # C-реалізація завантажувача у рази швидша, якщо вона є
+                loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+                try:
+                    return yaml.load(f, Loader=loader)
+                except yaml.YAMLError:
+                    print(f"Помилка: Файл {self.filepath} має неправильний YAML формат.")
+                    exit(1)
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                print(f"Помилка: Файл {self.filepath} має неправильний JSON формат.")
+                exit(1)
+
+    # --- Розвʼязання $ref ---
+
+    def _get_by_pointer(self, ref_string: str) -> Any:
         """
-        Допоміжна функція для отримання повної схеми за її $ref посиланням.
+        Обʼєкт специфікації за локальним JSON Pointer.
         Приклад ref_string: '#/components/schemas/Item'
         """
+        if not ref_string.startswith('#'):
+            # Зовнішні посилання (інші файли) не підтримуються
+            return None
+        target = self.spec
+        for token in ref_string[1:].split('/')[1:]:
+            token = unquote(token).replace('~1', '/').replace('~0', '~')
+            if isinstance(target, list):
+                try:
+                    target = target[int(token)]
+                except (ValueError, IndexError):
+                    return None
+            elif isinstance(target, dict) and token in target:
+                target = target[token]
+            else:
+                return None
+        return target
+
+    def _get_schema_from_ref(self, ref_string: str) -> Dict[str, Any]:
+        """Повністю розвʼязана схема за її $ref посиланням (або {}, якщо посилання бите)."""
+        resolved = self.resolve({"$ref": ref_string})
+        return resolved if isinstance(resolved, dict) else {}
+
+    def resolve(self, node: Any, _stack: Tuple[str, ...] = ()) -> Any:
+        """
+        Рекурсивно підставляє всі $ref у вузлі специфікації.
+        Кожне посилання розвʼязується один раз (мемоізація), а циклічні посилання
+        (напр., Category.children -> Category) обриваються: на повторному вході
+        лишається {"$ref": ...} з позначкою "x-circular".
+        """
+        if isinstance(node, list):
+            return [self.resolve(item, _stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        ref = node.get('$ref')
+        if isinstance(ref, str):
+            if ref in _stack:
+                return {"$ref": ref, "x-circular": True}
+            if ref in self._resolved:
+                resolved = self._resolved[ref]
+            else:
+                target = self._get_by_pointer(ref)
+                resolved = self.resolve(target, _stack + (ref,)) if target is not None else {"$ref": ref}
+                self._resolved[ref] = resolved
+            # OpenAPI 3.1 дозволяє поля поруч з $ref (напр., default) - вони мають пріоритет
+            siblings = {key: self.resolve(value, _stack) for key, value in node.items() if key != '$ref'}
+            if siblings and isinstance(resolved, dict):
+                return {**resolved, **siblings}
+            return resolved
+
+        return {key: self.resolve(value, _stack) for key, value in node.items()}
+
+    # --- Ендпоінти ---
+
+    def _parameters(self, path_info: Dict[str, Any], method_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Параметри шляху (рівень path item) + параметри операції; параметр операції перекриває однойменний."""
+        merged = {}
+        for param in self.resolve(path_info.get('parameters', [])) + self.resolve(method_info.get('parameters', [])):
+            if isinstance(param, dict):
+                merged[(param.get('name'), param.get('in'))] = param
+        return list(merged.values())
+
+    def _request_body(self, method_info: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """(розвʼязана схема JSON-тіла, її $ref або None)."""
+        request_body_info = self.resolve(method_info.get('requestBody'))
+        try:
+            schema = request_body_info['content']['application/json']['schema']
+        except (KeyError, TypeError):
+            return None, None
+        # Посилання на компонент (з raw-специфікації, до розвʼязання) - для групування спільних схем
         try:
-            # Отримуємо назву схеми з посилання (напр., "Item")
-            schema_name = ref_string.split('/')[-1]
-            # Повертаємо саму схему з нашого кешу
-            return self.schemas.get(schema_name, {})
-        except (AttributeError, IndexError):
-            return {}
-        
-    def parse_endpoints(self) -> List[Dict[str, Any]]:
+            ref = method_info['requestBody']['content']['application/json']['schema'].get('$ref')
+        except (KeyError, TypeError, AttributeError):
+            ref = None
+        return schema, ref
+
+    def _build_endpoint(self, path: str, method: str, path_info: Dict[str, Any],
+                        method_info: Dict[str, Any]) -> Dict[str, Any]:
+        request_body_schema, request_body_ref = self._request_body(method_info)
+        return {
+            "path": path,
+            "method": method.upper(),
+            "summary": method_info.get('summary', 'No summary'),
+            "tags": method_info.get('tags', []),
+            "parameters": self._parameters(path_info, method_info),
+            "requestBodySchema": request_body_schema,
+            "requestBodyRef": request_body_ref,
+        }
+
+    @staticmethod
+    def _matches(operation: Tuple[str, str, List[str]],
+                 tags: Optional[List[str]], paths: Optional[List[str]], methods: Optional[List[str]]) -> bool:
+        path, method, op_tags = operation
+        if methods and method.upper() not in {m.upper() for m in methods}:
+            return False
+        if paths and not any(fnmatch.fnmatchcase(path, pattern) for pattern in paths):
+            return False
+        if tags and not set(tags) & set(op_tags or []):
+            return False
+        return True
+
+    def iter_operations(self,
+                        tags: Optional[List[str]] = None,
+                        paths: Optional[List[str]] = None,
+                        methods: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
         """
-        Головний метод, який витягує всі ендпоінти.
+        Ліниво повертає ендпоінти, відібрані за тегами, шляхами (можна шаблони, напр. '/items/*')
+        та методами. Схеми розвʼязуються тільки для відібраних операцій.
+        Якщо є кеш парсингу - ендпоінти береться з нього, без завантаження специфікації.
         """
-        paths = self.spec.get('paths', {}) 
-        
-        for path, path_info in paths.items():
+        if self._cached is False:
+            self._cached = self._load_cache()
+        cached = self._cached
+        if cached is not None:
+            for endpoint in cached:
+                if self._matches((endpoint['path'], endpoint['method'], endpoint['tags']), tags, paths, methods):
+                    yield endpoint
+            return
+
+        for path, path_info in self.spec.get('paths', {}).items():
+            path_info = self.resolve(path_info) if '$ref' in path_info else path_info
             for method, method_info in path_info.items():
+                if method not in HTTP_METHODS:
+                    continue
+                if self._matches((path, method, method_info.get('tags')), tags, paths, methods):
+                    yield self._build_endpoint(path, method, path_info, method_info)
+
+    def parse_endpoints(self, **filters) -> List[Dict[str, Any]]:
+        """
+        Головний метод, який витягує всі ендпоінти (або відібрані, див. iter_operations).
+        Повний список зберігається в кеш парсингу.
+        """
+        self.endpoints = list(self.iter_operations(**filters))
+        if self.cache_dir and not filters and not self.cache_hit:
+            self._save_cache(self.endpoints)
+        return self.endpoints
+
+    # --- Кеш парсингу ---
+
+    def _cache_path(self) -> str:
+        name = hashlib.sha256(os.path.abspath(self.filepath).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pickle")
+
+    def _load_cache(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Ендпоінти з кешу, якщо файл специфікації не змінився.
+        Той самий mtime і розмір - кеш дійсний без читання файлу;
+        інакше порівнюємо sha256 вмісту (напр., після git checkout вміст той самий).
+        """
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(), 'rb') as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return None
+        if entry.get('version') != _CACHE_VERSION:
+            return None
+
+        stat = os.stat(self.filepath)
+        if (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+            if entry['size'] != stat.st_size or entry['sha256'] != _file_sha256(self.filepath):
+                return None
+        self.cache_hit = True
+        return entry['endpoints']
 
-                request_body_schema = None
-                request_body_info = method_info.get('requestBody', None)
-
-                if request_body_info:
-                    try:
-                        ref = request_body_info['content']['application/json']['schema']['$ref']
-                        request_body_schema = self._get_schema_from_ref(ref)
-                    except (KeyError, TypeError):
-                        try:
-                            request_body_schema = request_body_info['content']['application/json']['schema']
-                        except (KeyError, TypeError):
-                            pass
-
-                endpoint_data = {
-                    "path": path,
-                    "method": method.upper(),
-                    "summary": method_info.get('summary', 'No summary'),
-                    "parameters": method_info.get('parameters', []),
-                    "requestBodySchema": request_body_schema
-                }
-                
-                self.endpoints.append(endpoint_data)
-        
-        return self.endpoints
\ No newline at end of file
+    def _save_cache(self, endpoints: List[Dict[str, Any]]):
+        """Пишемо у тимчасовий файл і перейменовуємо, щоб не лишити "битий" кеш."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        stat = os.stat(self.filepath)
+        entry = {
+            "version": _CACHE_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": _file_sha256(self.filepath),
+            "endpoints": endpoints,
+        }
+        path = self._cache_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
@@ -0,0 +1,267 @@
+# Цей файл знаходиться в: tester/pipeline.py
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from tester.metrics import METRICS
+from tester.scheduler import is_time_based_probe
+
+# Маркер завершення черги
+_DONE = None
+
+# Як часто потік генератора перевіряє, чи не зупинено конвеєр, поки чекає місця в черзі, сек.
+_PUT_POLL_SECONDS = 0.2
+
+
+class _Cancelled(Exception):
+    """Конвеєр зупинено (Ctrl+C або помилка): event loop більше не прийме тестів."""
+
+
+class ScanPipeline:
+    """
+    Конвеєр generate -> execute -> analyze.
+    Замість трьох послідовних етапів кожен тест-кейс іде на виконання,
+    щойно його згенеровано, а кожен результат аналізується, щойно він
+    надійшов. Черги між етапами обмежені: якщо виконавець не встигає,
+    генератор чекає (backpressure), і в пам'яті одночасно лежить не
+    більше queue_size тестів і результатів.
+    """
+
+    def __init__(self,
+                 generator,
+                 executor,
+                 analyzer,
+                 queue_size: int = 100,
+                 state=None,
+                 on_plan: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], None]] = None,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_finding: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_skip: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.generator = generator
+        self.executor = executor
+        self.analyzer = analyzer
+        self.queue_size = max(1, queue_size)
+        # ScanState: зберігає плани та виконані тести, щоб сканування можна було відновити
+        self.state = state
+        # Колбеки для виводу прогресу (викликаються в потоці event loop)
+        self.on_plan = on_plan
+        self.on_result = on_result
+        self.on_finding = on_finding
+        # Тест, який виконавець не надіслав (безнадійний, див. tester/pruning.py)
+        self.on_skip = on_skip
+        self.stats = {"plans": 0, "tests": 0, "results": 0, "findings": 0, "resumed": 0, "skipped": 0,
+                      "time_to_first_finding": None}
+        self._targets = 1
+        self._done_targets: Dict[Tuple[str, int], int] = {}
+
+    def _plans(self, endpoints: List[Dict[str, Any]]):
+        """
+        Пари (endpoint, test_cases): спочатку збережені плани з ScanState,
+        потім згенеровані для решти ендпоінтів (їх одразу зберігаємо у стан).
+        """
+        to_generate = []
+        for endpoint in endpoints:
+            saved = self.state.get_plan(endpoint) if self.state else None
+            if saved is not None:
+                yield endpoint, saved
+            else:
+                to_generate.append(endpoint)
+
+        for endpoint, test_cases in self.generator.generate_all(to_generate):
+            if self.state:
+                self.state.save_plan(endpoint, test_cases)
+            yield endpoint, test_cases
+
+    def _produce(self, endpoints: List[Dict[str, Any]], loop: asyncio.AbstractEventLoop,
+                 test_queues: List[asyncio.Queue], workers: List[int], cancelled: threading.Event):
+        """
+        Працює в окремому потоці: ітерує генератор і кладе кожен тест у чергу кожної цілі.
+        put(...) блокує потік, поки в черзі немає місця, але раз на _PUT_POLL_SECONDS
+        перевіряє cancelled: після Ctrl+C event loop зупинено, і чекати на нього не можна -
+        інакше потік не завершиться, а з ним і процес.
+        """
+        def check():
+            if cancelled.is_set() or loop.is_closed():
+                raise _Cancelled()
+
+        def put(queue, item):
+            check()
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=_PUT_POLL_SECONDS)
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set() or loop.is_closed():
+                        future.cancel()
+                        raise _Cancelled()
+
+        try:
+            plans = self._plans(endpoints)
+            while True:
+                check()
+                # Час етапу generate - тільки сама генерація, без очікування місця в черзі
+                with METRICS.stage("generate"):
+                    plan = next(plans, None)
+                if plan is None:
+                    break
+                endpoint, test_cases = plan
+                if not test_cases:
+                    continue
+                check()
+                loop.call_soon_threadsafe(self._plan_ready, endpoint, test_cases)
+                for index, test in enumerate(test_cases):
+                    if self.state and self.state.is_done(endpoint, index):
+                        self.stats["resumed"] += 1
+                        continue
+                    for queue in test_queues:
+                        put(queue, (endpoint, index, test))
+        except _Cancelled:
+            return
+        finally:
+            # Після скасування воркерів уже немає - маркери завершення нікому не потрібні
+            if not cancelled.is_set():
+                try:
+                    for queue, count in zip(test_queues, workers):
+                        for _ in range(count):
+                            put(queue, _DONE)
+                except _Cancelled:
+                    pass
+
+    def _plan_ready(self, endpoint: Dict[str, Any], test_cases: List[Dict[str, Any]]):
+        self.stats["plans"] += 1
+        self.stats["tests"] += len(test_cases)
+        if self.on_plan:
+            self.on_plan(endpoint, test_cases)
+
+    async def _execute(self, executor, test_queue: asyncio.Queue, result_queue: asyncio.Queue,
+                       target: Optional[str], timing_queue: Optional[asyncio.Queue] = None):
+        while True:
+            item = await test_queue.get()
+            if item is _DONE:
+                return
+            endpoint, index, test = item
+            # Time-based тест чекає на смугу TimingScheduler (по одному, з підтвердженням ~10 с):
+            # віддаємо його воркеру смуги, щоб загальний воркер брав наступні швидкі тести
+            if timing_queue is not None and is_time_based_probe(test):
+                await timing_queue.put(item)
+                continue
+            await self._run_one(executor, result_queue, target, endpoint, index, test)
+
+    async def _run_one(self, executor, result_queue: asyncio.Queue, target: Optional[str],
+                       endpoint: Dict[str, Any], index: int, test: Dict[str, Any]):
+        entry = await executor.run_test(endpoint, test)
+        if not entry.get('skipped'):
+            METRICS.inc("tests_sent_total")
+        entry['test_index'] = index
+        if target:
+            entry['target'] = target
+        await result_queue.put(entry)
+
+    async def _execute_timing(self, executor, timing_queue: asyncio.Queue, result_queue: asyncio.Queue,
+                              target: Optional[str]):
+        """Воркер смуги time-based атак цілі: смуга пропускає один тест за раз, тож воркер один."""
+        while True:
+            item = await timing_queue.get()
+            if item is _DONE:
+                return
+            await self._run_one(executor, result_queue, target, *item)
+
+    @staticmethod
+    def _target_of(executor, executors: List) -> Optional[str]:
+        return executor.base_url if len(executors) > 1 else None
+
+    def _all_targets_done(self, entry: Dict[str, Any]) -> bool:
+        """Тест вважається виконаним (для --resume), коли надійшли результати від усіх цілей."""
+        if self._targets == 1:
+            return True
+        endpoint = entry['endpoint']
+        key = (f"[{endpoint['method']}] {endpoint['path']}", entry['test_index'])
+        count = self._done_targets.get(key, 0) + 1
+        if count < self._targets:
+            self._done_targets[key] = count
+            return False
+        self._done_targets.pop(key, None)
+        return True
+
+    async def _analyze(self, result_queue: asyncio.Queue, started_at: float):
+        while True:
+            entry = await result_queue.get()
+            if entry is _DONE:
+                return
+            if entry.get('skipped'):
+                self.stats["skipped"] += 1
+                if self.on_skip:
+                    self.on_skip(entry)
+                finding = None
+            else:
+                self.stats["results"] += 1
+                if self.on_result:
+                    self.on_result(entry)
+                with METRICS.stage("analyze"):
+                    finding = self.analyzer.analyze_result(entry)
+            if finding:
+                self.stats["findings"] += 1
+                METRICS.inc("findings_total", type=finding['vulnerability']['type'])
+                if self.stats["time_to_first_finding"] is None:
+                    self.stats["time_to_first_finding"] = time.perf_counter() - started_at
+                if self.on_finding:
+                    self.on_finding(finding)
+            # Позначаємо тест виконаним тільки після того, як результат оброблено
+            if self.state and self._all_targets_done(entry):
+                self.state.mark_done(entry['endpoint'], entry['test_index'])
+
+    async def run(self, endpoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Запускає конвеєр для всіх ендпоінтів і повертає статистику."""
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        # Кілька цілей (TargetGroup, tester/targets.py): у кожної своя черга тестів і свої воркери
+        executors = getattr(self.executor, 'executors', None) or [self.executor]
+        self._targets = len(executors)
+        self._done_targets = {}
+        test_queues = [asyncio.Queue(maxsize=self.queue_size) for _ in executors]
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Воркерів стільки ж, скільки дозволено одночасних запитів до цілі
+        workers = [executor.concurrency for executor in executors]
+
+        # Сигнал потоку генератора: конвеєр зупинено (Ctrl+C, помилка) - більше не чекати на чергу
+        cancelled = threading.Event()
+        try:
+            async with self.executor:
+                analyzer_task = asyncio.create_task(self._analyze(result_queue, started_at))
+                # Черга смуги time-based атак для кожної цілі з TimingScheduler. Вона обмежена, як і решта:
+                # воркери чекають на смугу лише тоді, коли в черзі вже queue_size повільних тестів,
+                # і тоді backpressure доходить до генератора, а не накопичуються всі такі тести в пам'яті
+                timing_queues = [asyncio.Queue(maxsize=self.queue_size) if getattr(executor, 'scheduler', None) else None
+                                 for executor in executors]
+                timing_tasks = [asyncio.create_task(self._execute_timing(executor, timing_queue, result_queue,
+                                                                         self._target_of(executor, executors)))
+                                for executor, timing_queue in zip(executors, timing_queues) if timing_queue]
+                worker_tasks = [asyncio.create_task(self._execute(executor, test_queue, result_queue,
+                                                                  self._target_of(executor, executors),
+                                                                  timing_queue))
+                                for executor, test_queue, timing_queue, count
+                                in zip(executors, test_queues, timing_queues, workers)
+                                for _ in range(count)]
+                await asyncio.gather(
+                    asyncio.to_thread(self._produce, endpoints, loop, test_queues, workers, cancelled),
+                    *worker_tasks)
+                for timing_queue in timing_queues:
+                    if timing_queue:
+                        await timing_queue.put(_DONE)
+                await asyncio.gather(*timing_tasks)
+                await result_queue.put(_DONE)
+                await analyzer_task
+        finally:
+            cancelled.set()
+
+        self.stats["elapsed_seconds"] = time.perf_counter() - started_at
+        return self.stats
+
+    def run_sync(self, endpoints: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Синхронна обгортка над run для виклику з run_tester."""
+        # Цикл подій - це етап execute (analyze всередині нього профілюється окремо)
+        with METRICS.profile("execute"):
+            return asyncio.run(self.run(endpoints))
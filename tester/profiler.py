@@ -0,0 +1,94 @@
+# Цей файл знаходиться в: tester/profiler.py
+
+import asyncio
+import math
+from typing import List, Dict, Any, Optional
+
+from tester.analyzer import TIME_BASED_THRESHOLD
+
+# Методи, які можна безпечно викликати під час "розігріву"
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Мінімальний запас над p99, щоб звичайний "шум" мережі не виглядав як атака
+JITTER_MARGIN = 1.0
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Перцентиль методом найближчого рангу (samples не мають бути порожні)."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_latency_profile(samples: List[float]) -> Dict[str, Any]:
+    """
+    Рахує перцентилі та виводить з них поріг для time-based атак і таймаут запиту.
+    Поріг: звичайний час відповіді (p50) + мінімальна затримка атаки,
+    але не менше ніж p99 + запас на "шум". Таймаут - з запасом над порогом,
+    щоб атака SLEEP встигла завершитись, але повільні запити не з'їдали 10 сек.
+    """
+    p50 = percentile(samples, 50)
+    p95 = percentile(samples, 95)
+    p99 = percentile(samples, 99)
+    threshold = max(p50 + TIME_BASED_THRESHOLD, p99 + JITTER_MARGIN)
+    return {
+        "samples": len(samples),
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "threshold": threshold,
+        "timeout": max(threshold * 1.5, p99 * 3),
+    }
+
+
+class LatencyProfiler:
+    """
+    Модуль 2.5: Профайлер (The Scout).
+    Перед атаками надсилає кілька звичайних запитів до кожного ендпоінта
+    та вимірює типовий час відповіді цілі. На основі перцентилів
+    встановлює поріг для time-based атак і таймаут для кожного ендпоінта.
+    """
+
+    def __init__(self, executor, samples: int = 5, safe_methods_only: bool = True):
+        self.executor = executor
+        self.samples = max(1, samples)
+        # Не-безпечні методи (POST, DELETE...) змінюють дані, тому за замовчуванням
+        # вони отримують загальний профіль хоста, зібраний з безпечних запитів
+        self.safe_methods_only = safe_methods_only
+
+    async def _measure(self, endpoint: Dict[str, Any]) -> List[float]:
+        request_args = self.executor.baseline_request_args(endpoint)
+        latencies = []
+        for _ in range(self.samples):
+            result = await self.executor.execute_test(**request_args)
+            if not result['error']:
+                latencies.append(result['time_seconds'])
+        return latencies
+
+    async def profile(self, endpoints: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Повертає профілі затримок у форматі {"[METHOD] /path": {...}}.
+        Ендпоінти без власних вимірів отримують профіль хоста.
+        """
+        measured = [ep for ep in endpoints
+                    if not self.safe_methods_only or ep['method'] in SAFE_METHODS]
+
+        async with self.executor:
+            all_samples = await asyncio.gather(*[self._measure(ep) for ep in measured])
+
+        profiles = {}
+        host_samples = []
+        for ep, samples in zip(measured, all_samples):
+            if samples:
+                profiles[f"[{ep['method']}] {ep['path']}"] = build_latency_profile(samples)
+                host_samples.extend(samples)
+
+        host_profile: Optional[Dict[str, Any]] = build_latency_profile(host_samples) if host_samples else None
+        if host_profile:
+            for ep in endpoints:
+                profiles.setdefault(f"[{ep['method']}] {ep['path']}", host_profile)
+        return profiles
+
+    def profile_endpoints(self, endpoints: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Синхронна обгортка над profile для виклику з run_tester."""
+        return asyncio.run(self.profile(endpoints))
@@ -0,0 +1,109 @@
+# Цей файл знаходиться в: tester/prompts.py
+
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from tester.scheduler import build_benign_test
+from tester.templates import string_fields
+
+# Обмеження рядкового поля, від яких залежить, чи дійде payload до логіки (решту схеми не надсилаємо)
+STRING_CONSTRAINTS = ('maxLength', 'minLength', 'pattern', 'format')
+
+# Загальна частина промпту: в пакетному запиті вона одна на всі завдання
+INSTRUCTIONS = (
+    "Ти — етичний експерт з тестування безпеки API (пентестер). "
+    "Для кожного завдання згенеруй 5 тест-кейсів для *виявлення* вразливостей: XSS та не-деструктивні "
+    "SQL Injection (тільки 'read-only' та 'time-based', наприклад, `SLEEP` або `' OR 1=1`).\n"
+    "**КАТЕГОРИЧНО ЗАБОРОНЕНО** генерувати деструктивні команди, що змінюють дані, такі як "
+    "`DROP TABLE`, `DELETE FROM`, `UPDATE`, `INSERT INTO`.\n"
+    "Тіло: 'payload' - JSON-об'єкт 'base' зі схеми, де одне з полів 'strings' замінено атакою "
+    "(з урахуванням обмежень поля).\n"
+    "Параметри шляху: 'payload' - рядок для параметра, 'param' - ім'я параметра.\n"
+    "Тест-кейс: {\"description\": \"Опис атаки (напр., XSS в полі title)\", \"payload\": ...}\n"
+)
+SINGLE_ANSWER = "Формат відповіді: JSON-список тест-кейсів.\n"
+BATCH_ANSWER = ("Формат відповіді: один JSON-об'єкт, де ключ - ідентифікатор завдання "
+                "(напр., '[GET] /items/{item_id}'), а значення - JSON-список тест-кейсів для нього.\n")
+
+TASK_HEADER = "### Завдання "
+SCHEMAS_HEADER = "Схеми тіл:\n"
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def _field_schema(schema: Dict[str, Any], path: Tuple[str, ...]) -> Dict[str, Any]:
+    for name in path:
+        schema = schema.get('properties', {}).get(name, {})
+    # Optional[str] у FastAPI: обмеження лежать у рядковому варіанті anyOf
+    for variant in schema.get('anyOf', []):
+        if variant.get('type') == 'string':
+            return variant
+    return schema
+
+
+def compact_body(endpoint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Схема тіла, зведена до того, що потрібно моделі: 'base' - мінімальне валідне тіло
+    (обов'язкові поля з безпечними значеннями) та 'strings' - рядкові поля (крім enum),
+    в які можна підставити атаку, з їхніми обмеженнями. None - немає рядкових полів.
+    """
+    schema = endpoint.get('requestBodySchema')
+    if not schema:
+        return None
+    strings = {}
+    for path in string_fields(schema):
+        field_schema = _field_schema(schema, path)
+        strings[".".join(path)] = {key: field_schema[key] for key in STRING_CONSTRAINTS if key in field_schema}
+    if not strings:
+        return None
+    return {"base": build_benign_test(endpoint)['payload'], "strings": strings}
+
+
+def _path_params(endpoint: Dict[str, Any]) -> List[str]:
+    return [f"{p['name']}:{p.get('schema', {}).get('type', 'string')}"
+            for p in endpoint.get('parameters') or [] if p.get('in') == 'path' and p.get('name')]
+
+
+def has_attack_surface(endpoint: Dict[str, Any]) -> bool:
+    """Чи є в ендпоінті що атакувати: рядкові поля тіла або параметри шляху."""
+    return compact_body(endpoint) is not None or bool(_path_params(endpoint))
+
+
+def _component_name(endpoint: Dict[str, Any], taken: Dict[str, str], text: str) -> str:
+    """Ім'я схеми тіла в промпті: ім'я компонента з $ref (напр., Item), заголовок схеми або 'Тіло'."""
+    ref = endpoint.get('requestBodyRef')
+    base = (ref.rsplit('/', 1)[-1] if ref else None) or endpoint['requestBodySchema'].get('title') or "Тіло"
+    name, suffix = base, 2
+    while name in taken and taken[name] != text:
+        name, suffix = f"{base}{suffix}", suffix + 1
+    return name
+
+
+def build_prompt(endpoints: List[Dict[str, Any]]) -> str:
+    """
+    Компактний промпт для одного ендпоінта (відповідь - список) або пакета (відповідь - об'єкт).
+    Інструкція - одна на промпт, схема тіла - компактний JSON лише з рядковими полями,
+    а спільна схема (той самий компонент, напр. Item, у POST і PUT) записується один раз.
+    """
+    components: Dict[str, str] = {}
+    tasks = []
+    for endpoint in endpoints:
+        task = f"{TASK_HEADER}[{endpoint['method']}] {endpoint['path']}\n"
+        body = compact_body(endpoint)
+        if body is not None:
+            text = _compact(body)
+            name = _component_name(endpoint, components, text)
+            components[name] = text
+            task += f"тіло: {name}\n"
+        # Параметри шляху атакуємо і тоді, коли є тіло (напр., item_id у PUT /items/{item_id})
+        path_params = _path_params(endpoint)
+        if path_params:
+            task += f"параметри шляху: {', '.join(path_params)}\n"
+        tasks.append(task)
+
+    prompt = INSTRUCTIONS + (BATCH_ANSWER if len(endpoints) > 1 else SINGLE_ANSWER)
+    if components:
+        prompt += SCHEMAS_HEADER + "".join(f"{name}={text}\n" for name, text in components.items())
+    return prompt + "".join(tasks)
@@ -0,0 +1,176 @@
+# Цей файл знаходиться в: tester/pruning.py
+
+import bisect
+import hashlib
+import json
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import unquote
+
+from tester.rules import ensure_classified
+
+# Відповіді валідації вводу: запит відхилено до того, як він дійшов до логіки (і до БД)
+VALIDATION_STATUSES = (400, 422)
+
+# Межі "кошиків" часу відповіді, сек.: 0.05 і 0.07 - та сама відповідь, 0.05 і 5.0 - ні
+LATENCY_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0)
+
+# Скільки однакових відхилень валідацією поспіль, щоб решту тестів класу не надсилати
+DEFAULT_PRUNE_AFTER = 3
+
+_DIGITS = re.compile(r"\d+")
+_INTEGER = re.compile(r"[+-]?\d+")
+_BOOLEANS = {"true", "false", "1", "0", "yes", "no", "on", "off"}
+
+
+def latency_bucket(seconds: float) -> int:
+    return bisect.bisect_left(LATENCY_BUCKETS, seconds)
+
+
+def normalize_body(body: str, payload: Any) -> str:
+    """
+    Тіло відповіді без того, що залежить від конкретного тесту: payload (як є, розкодований
+    з URL і в JSON-екрануванні - напр., FastAPI повертає його в полі 'input' помилки 422) та числа.
+    """
+    text = str(payload) if not isinstance(payload, (dict, list)) else ""
+    for variant in {text, unquote(text), json.dumps(text)[1:-1], json.dumps(unquote(text))[1:-1]}:
+        if len(variant) > 1:
+            body = body.replace(variant, "<payload>")
+    return _DIGITS.sub("0", body)
+
+
+def response_fingerprint(result: Dict[str, Any], payload: Any) -> Tuple[int, str, int]:
+    """(статус, sha256 нормалізованого тіла, кошик часу відповіді)."""
+    body = normalize_body(result.get('body') or "", payload)
+    return (result['status_code'],
+            hashlib.sha256(body.encode('utf-8', errors='replace')).hexdigest(),
+            latency_bucket(result['time_seconds']))
+
+
+def _schema_types(schema: Dict[str, Any]) -> set:
+    """Типи, які дозволяє схема (з урахуванням anyOf/oneOf у Optional[...] від FastAPI)."""
+    types = set()
+    if isinstance(schema.get('type'), list):
+        types.update(schema['type'])
+    elif schema.get('type'):
+        types.add(schema['type'])
+    for variant in schema.get('anyOf', []) + schema.get('oneOf', []):
+        types |= _schema_types(variant)
+    return types
+
+
+def accepts_value(schema: Dict[str, Any], value: Any) -> bool:
+    """
+    Чи може значення пройти перевірку типу схеми. Рядки для числових і булевих полів
+    перевіряються так, як їх розбирає валідатор (напр., "1" для integer - допустимо).
+    Невідомий тип або string - допускаємо все.
+    """
+    types = _schema_types(schema or {}) - {"null"}
+    if not types or "string" in types:
+        return True
+    if isinstance(value, bool):
+        return "boolean" in types
+    if isinstance(value, (int, float)):
+        return bool(types & {"integer", "number"})
+    if isinstance(value, (dict, list)):
+        return bool(types & {"object", "array"})
+    if value is None:
+        return True
+    text = unquote(str(value)).strip()
+    if "integer" in types and _INTEGER.fullmatch(text):
+        return True
+    if "number" in types:
+        try:
+            float(text)
+            return True
+        except ValueError:
+            pass
+    return "boolean" in types and text.lower() in _BOOLEANS
+
+
+def type_mismatch(endpoint: Dict[str, Any], request_args: Dict[str, Any]) -> Optional[str]:
+    """
+    Причина, з якої запит гарантовано не пройде валідацію типів (за розібраною схемою APIParser),
+    або None. Перевіряються параметр шляху, в який іде payload, і поля верхнього рівня JSON-тіла.
+    """
+    if request_args['param_name'] and request_args['url_param_payload'] is not None:
+        for param in endpoint.get('parameters') or []:
+            if param.get('name') == request_args['param_name'] and param.get('in') == 'path':
+                if not accepts_value(param.get('schema', {}), request_args['url_param_payload']):
+                    return f"параметр {param['name']} має тип {param.get('schema', {}).get('type')}"
+    body = request_args['json_payload']
+    schema = endpoint.get('requestBodySchema') or {}
+    if isinstance(body, dict):
+        for name, field_schema in schema.get('properties', {}).items():
+            if name in body and not accepts_value(field_schema, body[name]):
+                return f"поле {name} має тип {field_schema.get('type')}"
+    return None
+
+
+def _target(endpoint: Dict[str, Any], test: Dict[str, Any], request_args: Dict[str, Any]) -> str:
+    """Куди йде payload: параметр шляху, поле тіла або тіло загалом."""
+    place = (test.get('field') and f"field:{test['field']}") or \
+            (request_args['param_name'] and f"param:{request_args['param_name']}") or "body"
+    return f"[{endpoint['method']}] {endpoint['path']} {place}"
+
+
+class TestPruner:
+    """
+    Відсікання безнадійних тест-кейсів у межах сканування.
+      - Перед надсиланням: payload несумісний з типом параметра / поля (сервер відповість 422,
+        не виконавши жодної логіки) - тест не надсилається.
+      - Після відповіді: відбиток (статус, нормалізоване тіло, кошик часу). Якщо для пари
+        "ендпоінт + параметр/поле" клас атаки prune_after разів поспіль отримує те саме
+        відхилення валідацією (400/422), решта тестів цього класу там не надсилається.
+        Клас, який хоча б раз дійшов далі валідації, тестується повністю.
+    Пропущені тести потрапляють у звіт із причиною (див. JSONLResultSink.skipped).
+    """
+
+    def __init__(self, prune_after: int = DEFAULT_PRUNE_AFTER, type_filter: bool = True):
+        self.prune_after = max(1, prune_after)
+        self.type_filter = type_filter
+        # (ціль, клас атаки) -> {"fingerprint", "count", "reached"}
+        self._classes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.stats = {"type_mismatch": 0, "short_circuited": 0, "pruned_classes": 0}
+
+    @staticmethod
+    def _classes_of(test: Dict[str, Any]) -> List[str]:
+        return ensure_classified(test) or ["other"]
+
+    def check(self, endpoint: Dict[str, Any], test: Dict[str, Any],
+              request_args: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """(вид, причина) пропуску тесту - 'type' або 'validation', або None, якщо тест треба надіслати."""
+        if self.type_filter:
+            mismatch = type_mismatch(endpoint, request_args)
+            if mismatch:
+                self.stats["type_mismatch"] += 1
+                return "type", f"несумісний тип: {mismatch}"
+
+        target = _target(endpoint, test, request_args)
+        states = [self._classes.get((target, attack_class)) for attack_class in self._classes_of(test)]
+        if all(state and not state['reached'] and state['count'] >= self.prune_after for state in states):
+            self.stats["short_circuited"] += 1
+            status = states[0]['fingerprint'][0]
+            return "validation", (f"клас атаки відхиляється валідацією "
+                                   f"(статус {status} {self.prune_after}+ разів поспіль)")
+        return None
+
+    def observe(self, endpoint: Dict[str, Any], test: Dict[str, Any],
+                request_args: Dict[str, Any], result: Dict[str, Any]):
+        """Враховує відповідь на надісланий тест."""
+        target = _target(endpoint, test, request_args)
+        rejected = result['status_code'] in VALIDATION_STATUSES
+        fingerprint = response_fingerprint(result, test.get('payload')) if rejected else None
+        for attack_class in self._classes_of(test):
+            state = self._classes.setdefault((target, attack_class),
+                                             {"fingerprint": None, "count": 0, "reached": False})
+            if state['reached']:
+                continue
+            if not rejected:
+                state['reached'] = True
+            elif fingerprint == state['fingerprint']:
+                state['count'] += 1
+                if state['count'] == self.prune_after:
+                    self.stats["pruned_classes"] += 1
+            else:
+                state['fingerprint'], state['count'] = fingerprint, 1
@@ -0,0 +1,187 @@
+# Цей файл знаходиться в: tester/report.py
+
+import hashlib
+import json
+import threading
+import time
+from typing import List, Dict, Any, Iterator
+
+# Скільки байтів тіла відповіді читає виконавець (tester/executor.py). Аналізатору потрібен лише
+# початок тіла (SQL-помилки, відображений payload), тож великі списки (напр., GET /items/)
+# не роздувають пам'ять. Тут, а не у виконавці: опції CLI не мають тягнути за собою httpx
+DEFAULT_MAX_BODY_BYTES = 64 * 1024
+
+# Скільки байтів тіла відповіді зберігаємо у JSONL (решту - тільки хешем)
+BODY_PREVIEW_BYTES = 2048
+
+
+def _where(record: Dict[str, Any]) -> str:
+    """Ендпоінт запису, а при скануванні кількох цілей - і ціль (tester/targets.py)."""
+    return f"{record['endpoint']} @ {record['target']}" if record.get('target') else record['endpoint']
+
+
+def format_result_lines(record: Dict[str, Any]) -> List[str]:
+    """Рядки людського звіту для одного результату (запис типу 'result')."""
+    lines = [
+        f"    - {_where(record)} | Атака: {record['description'][:70]}...",
+        f"    - > РЕЗУЛЬТАТ: Статус {record['status_code']} за {record['time_seconds']:.2f} сек.",
+    ]
+    if record['error']:
+        lines.append(f"    - > ❗️ ПОМИЛКА: {record['body_preview']}")
+    return lines
+
+
+def format_finding_line(record: Dict[str, Any]) -> str:
+    """Рядок людського звіту для знайденої вразливості (запис типу 'finding')."""
+    line = f"    - > 🚨 ЗНАЙДЕНО: {record['vulnerability']['type']} у {_where(record)}"
+    if record.get('carried_forward'):
+        line += f" (перенесено зі сканування {record['carried_from']})"
+    return line
+
+
+def format_skipped_line(record: Dict[str, Any]) -> str:
+    """Рядок людського звіту для тесту, який не надсилали (запис типу 'skipped')."""
+    return f"    - {_where(record)} | Пропущено: {record['description'][:70]}... ({record['reason']})"
+
+
+def format_limit_decision(decision: Dict[str, Any]) -> str:
+    """Рядок про рішення адаптивного ліміту (зменшення або пауза, див. tester/throttle.py)."""
+    if decision['decision'] == "pause":
+        return f"  ⏸ {decision['host']}: пауза - {decision['reason']}"
+    return (f"  ⬇ {decision['host']}: ліміт {decision['limit_before']} -> {decision['limit_after']} "
+            f"({decision['reason']})")
+
+
+class JSONLResultSink:
+    """
+    Потоковий запис сканування у JSONL: один рядок - один запис
+    ('log', 'result', 'finding' або 'skipped'), щойно він з'явився.
+    Нічого не накопичується в пам'яті, а дані скидаються на диск
+    кожні flush_every записів або flush_interval секунд, тож при
+    падінні в кінці сканування втрачається щонайбільше кілька записів.
+    Потокобезпечний: flush викликає і потік генератора (ScanState.before_flush),
+    поки event loop пише результати у той самий файл.
+    """
+
+    def __init__(self, filepath: str, flush_every: int = 50, flush_interval: float = 2.0):
+        self.filepath = filepath
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._file = open(filepath, 'a', encoding='utf-8')
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        # RLock: _write скидає файл через flush, не відпускаючи замок
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._flushed_at >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+            self._pending = 0
+            self._flushed_at = time.monotonic()
+
+    def log(self, message: str):
+        self._write({"type": "log", "message": message})
+
+    def result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Записує результат тесту: тіло обрізане до BODY_PREVIEW_BYTES + sha256 прочитаного тіла."""
+        endpoint = entry['endpoint']
+        test = entry['test']
+        result = entry['result']
+        # Хешуємо і обрізаємо сирі байти, не декодуючи все тіло (див. ExecutionResult)
+        raw_body = getattr(result, 'raw_body', None)
+        if raw_body is None:
+            raw_body = (result['body'] or '').encode('utf-8', errors='replace')
+        record = {
+            "type": "result",
+            "endpoint": f"[{endpoint['method']}] {endpoint['path']}",
+            "description": test.get('description', ''),
+            "payload": test.get('payload'),
+            "status_code": result['status_code'],
+            "time_seconds": result['time_seconds'],
+            "error": result['error'],
+            "body_size": len(raw_body),
+            "body_truncated": result.get('body_truncated', False),
+            "deduplicated": entry.get('deduplicated', False),
+            "timing_confirmed": result.get('timing_confirmed'),
+            "body_sha256": hashlib.sha256(raw_body).hexdigest(),
+            "body_preview": raw_body[:BODY_PREVIEW_BYTES].decode(getattr(result, 'encoding', 'utf-8'), errors='replace'),
+        }
+        if entry.get('target'):
+            record["target"] = entry['target']
+        self._write(record)
+        return record
+
+    def record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Записує готовий запис (напр., з JSONL шарду розподіленого сканування)."""
+        self._write(record)
+        return record
+
+    def skipped(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Записує тест, який виконавець відсік, не надсилаючи (entry['skipped'] - причина)."""
+        endpoint = entry['endpoint']
+        record = {
+            "type": "skipped",
+            "endpoint": f"[{endpoint['method']}] {endpoint['path']}",
+            "description": entry['test'].get('description', ''),
+            "payload": entry['test'].get('payload'),
+            "reason": entry['skipped'],
+        }
+        if entry.get('target'):
+            record["target"] = entry['target']
+        self._write(record)
+        return record
+
+    def finding(self, vuln: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"type": "finding", **vuln}
+        self._write(record)
+        return record
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._file.close()
+
+
+def read_records(jsonl_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Читає записи з JSONL по одному.
+    Обрізаний останній рядок (падіння під час запису) пропускається.
+    """
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def render_text_report(jsonl_path: str, report_path: str):
+    """Рендерить людський звіт з JSONL, рядок за рядком (без завантаження файлу в пам'ять)."""
+    with open(report_path, 'w', encoding='utf-8') as out:
+        for record in read_records(jsonl_path):
+            if record['type'] == 'log':
+                lines = [record['message']]
+            elif record['type'] == 'result':
+                lines = format_result_lines(record)
+            elif record['type'] == 'finding':
+                lines = [format_finding_line(record)]
+            elif record['type'] == 'skipped':
+                lines = [format_skipped_line(record)]
+            else:
+                continue
+            out.write("\n".join(lines) + "\n")
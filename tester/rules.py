@@ -0,0 +1,186 @@
+# Цей файл знаходиться в: tester/rules.py
+
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+# --- Класифікація тест-кейсів ---
+# Клас атаки визначається за ключовими словами в описі тест-кейсу.
+# Класифікуємо один раз, коли тест згенеровано (див. AttackGenerator),
+# і зберігаємо у test['attack_classes'].
+ATTACK_CLASS_KEYWORDS = {
+    "time_based_sqli": ("time-based", "sleep", "waitfor"),
+    "error_based_sqli": ("error-based", "помил"),
+    "reflected_xss": ("xss",),
+}
+
+# Один регулярний вираз на всі класи: один прохід по опису замість .lower() + `in` у кожному правилі
+_CLASSIFIER = re.compile("|".join(
+    f"(?P<{attack_class}>{'|'.join(re.escape(k) for k in keywords)})"
+    for attack_class, keywords in ATTACK_CLASS_KEYWORDS.items()
+), re.IGNORECASE)
+
+# Ознаки SQL-помилки в тілі відповіді
+SQL_ERROR_KEYWORDS = ("sql", "syntax", "database", "query")
+
+# Символи, які ігноруємо при пошуку відображеного payload (сервер міг їх змінити)
+_REFLECTION_IGNORED = " '"
+
+
+def classify_test(test: Dict[str, Any]) -> List[str]:
+    """Повертає класи атаки для тест-кейсу (за описом)."""
+    return sorted({match.lastgroup for match in _CLASSIFIER.finditer(test.get('description', ''))})
+
+
+def ensure_classified(test: Dict[str, Any]) -> List[str]:
+    """Класифікує тест-кейс, якщо це ще не зроблено, і повертає його класи."""
+    if 'attack_classes' not in test:
+        test['attack_classes'] = classify_test(test)
+    return test['attack_classes']
+
+
+@lru_cache(maxsize=4096)
+def _reflection_matcher(payload: str) -> Tuple[str, re.Pattern]:
+    """
+    Скомпільований пошук відображеного payload (кешується на payload):
+    "очищений" payload (без пробілів і лапок) для швидкої перевірки `in`
+    та вираз, що дозволяє пробіли й лапки між символами payload у тілі.
+    Це те саме, що порівняння "очищених" рядків, але без створення копій тіла.
+    """
+    payload_simple = "".join(c for c in payload if c not in _REFLECTION_IGNORED)
+    ignored = f"[{re.escape(_REFLECTION_IGNORED)}]*"
+    return payload_simple, re.compile(ignored.join(re.escape(c) for c in payload_simple))
+
+
+def match_body(body: str, payload: str, needed: Tuple[str, ...]) -> set:
+    """
+    Шукає в тілі відповіді потрібні ознаки ('sql_error', 'payload').
+    Кожна ознака перевіряється не більше одного разу на тіло, і лише якщо вона потрібна:
+    ключові слова SQL - пошуком підрядків у тілі, переведеному в нижній регістр один раз;
+    payload - спершу прямим пошуком, потім скомпільованим виразом.
+    (Комбінований regex з альтернативами в модулі re працює повільніше за пошук підрядків.)
+    """
+    found = set()
+    if 'sql_error' in needed:
+        body_lower = body.lower()
+        if any(keyword in body_lower for keyword in SQL_ERROR_KEYWORDS):
+            found.add('sql_error')
+    if 'payload' in needed:
+        payload_simple, matcher = _reflection_matcher(payload)
+        # Порожній "очищений" payload відображається завжди (як і `'' in body`)
+        if payload_simple in body or matcher.search(body):
+            found.add('payload')
+    return found
+
+
+class Rule:
+    """
+    Декларативне правило детектора.
+    Правило спрацьовує, якщо:
+      - тест-кейс належить до attack_class;
+      - статус відповіді потрапляє в один з діапазонів statuses [від, до);
+      - (якщо requires_delay) час відповіді не менший за поріг і затримку не спростовано;
+      - (якщо body_match) у тілі знайдено 'sql_error' або 'payload'.
+    details - шаблон опису з полями description, time, status, body_prefix.
+    """
+
+    def __init__(self, attack_class: str, vuln_type: str, statuses: Tuple[Tuple[int, int], ...],
+                 details: str, requires_delay: bool = False, body_match: Optional[str] = None):
+        self.attack_class = attack_class
+        self.vuln_type = vuln_type
+        self.statuses = statuses
+        self.details = details
+        self.requires_delay = requires_delay
+        self.body_match = body_match
+        # Перевірка статусу через range - це порівняння в C, без генератора на кожен результат
+        self._status_ranges = tuple(range(low, high) for low, high in statuses)
+
+    def precheck(self, result: Dict[str, Any], threshold: float) -> bool:
+        """Все, що не потребує тіла відповіді (клас атаки вже перевірено в RuleEngine)."""
+        status = result['status_code']
+        for status_range in self._status_ranges:
+            if status in status_range:
+                break
+        else:
+            return False
+        if self.requires_delay:
+            # Планувальник перевірив затримку повторно і не підтвердив її - це була черга на сервері
+            if result['time_seconds'] < threshold or result.get('timing_confirmed') is False:
+                return False
+        return True
+
+    def describe(self, test: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, str]:
+        body_prefix = result['body'][:100] if '{body_prefix}' in self.details else ''
+        return {
+            "type": self.vuln_type,
+            "details": self.details.format(description=test['description'], time=result['time_seconds'],
+                                           status=result['status_code'], body_prefix=body_prefix),
+        }
+
+
+DEFAULT_RULES = [
+    # 1. Time-based SQLi: сервер "завис", і це не помилка валідації (2xx або 5xx)
+    Rule("time_based_sqli", "Time-based SQL Injection (CRITICAL)", statuses=((200, 300), (500, 1000)),
+         requires_delay=True,
+         details="Атака '{description}' змусила сервер 'зависнути' на {time:.2f} сек. (Статус: {status})"),
+    # 2. Error-based SQLi: 500 Internal Server Error з ознаками SQL у тілі
+    Rule("error_based_sqli", "Error-based SQL Injection (HIGH)", statuses=((500, 501),),
+         body_match="sql_error",
+         details="Атака '{description}' змусила сервер повернути Статус 500 з SQL-помилкою: {body_prefix}..."),
+    # 3. Reflected XSS: payload повернувся у тілі відповіді зі статусом 200
+    # (Ми не знайдемо її у нашому API, бо в нас немає HTML-відповідей)
+    Rule("reflected_xss", "Reflected Cross-Site Scripting (MEDIUM)", statuses=((200, 201),),
+         body_match="payload",
+         details="Атака '{description}' була відображена у відповіді сервера."),
+]
+
+
+class RuleEngine:
+    """
+    Рушій правил для APIAnalyzer.
+    Тест-кейси класифіковано заздалегідь, тож для кожного результату рушій бере
+    тільки правила його класу атаки, відсіює їх за статусом і часом і лише тоді
+    (якщо потрібно) шукає ознаки в тілі відповіді. Повертає перше правило, що спрацювало.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        # Індекс: класи тесту -> правила для них (у порядку пріоритету)
+        self._rules_by_classes: Dict[Any, List[Rule]] = {}
+
+    def _rules_for(self, attack_classes: List[str]) -> List[Rule]:
+        # Для одного класу ключ - сам рядок (найчастіший випадок, без створення tuple)
+        key = attack_classes[0] if len(attack_classes) == 1 else tuple(attack_classes)
+        rules = self._rules_by_classes.get(key)
+        if rules is None:
+            rules = [rule for rule in self.rules if rule.attack_class in attack_classes]
+            self._rules_by_classes[key] = rules
+        return rules
+
+    def evaluate(self, test: Dict[str, Any], result: Dict[str, Any], threshold: float) -> Optional[Dict[str, str]]:
+        attack_classes = test.get('attack_classes')
+        if attack_classes is None:
+            attack_classes = ensure_classified(test)
+        if not attack_classes:
+            return None
+        rules = self._rules_by_classes.get(attack_classes[0]) if len(attack_classes) == 1 else None
+        if rules is None:
+            rules = self._rules_for(attack_classes)
+
+        candidates = []
+        for rule in rules:
+            if rule.precheck(result, threshold):
+                # Перше правило без перевірки тіла - тіло не потрібне взагалі
+                if rule.body_match is None and not candidates:
+                    return rule.describe(test, result)
+                candidates.append(rule)
+        if not candidates:
+            return None
+
+        needed = tuple({rule.body_match for rule in candidates if rule.body_match})
+        found = match_body(result.get('body') or '', str(test.get('payload', '')), needed)
+
+        for rule in candidates:
+            if rule.body_match is None or rule.body_match in found:
+                return rule.describe(test, result)
+        return None
